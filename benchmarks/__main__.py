@@ -0,0 +1,139 @@
+"""Run the benchmark suite: ``python -m benchmarks [--scale small] [--only NAME] [--save]``.
+
+Each scenario runs in a fresh interpreter, so peak RSS belongs to that scenario alone, against a stand-in for
+S3 and CloudFront served from this process. Results are compared to the stored baseline for the scale.
+"""
+
+import argparse
+import importlib.metadata
+import json
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from typing import Any
+
+from benchmarks.fake_aws import FakeAWS
+from benchmarks.scenarios import SCENARIOS, Bench
+
+BASELINES = pathlib.Path(__file__).parent / "baselines"
+HIGHER_IS_BETTER = ("ops_per_s", "mb_per_s")
+LOWER_IS_BETTER = ("requests", "peak_rss_mb")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=("smoke", "small", "full"), default="small", help="size of the workloads")
+    parser.add_argument("--only", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline for this scale")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="relative slowdown or growth reported as a regression"
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--endpoint", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=pathlib.Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return run_child(args.child, args.scale, args.endpoint, args.workdir)
+
+    results = {}
+    with FakeAWS() as fake:
+        for name in args.only or SCENARIOS:
+            print(f"{name} ...", end="", flush=True, file=sys.stderr)
+            results[name] = run_scenario(fake, name, args.scale)
+            print(" done.", file=sys.stderr)
+
+    baseline_path = BASELINES / f"{args.scale}.json"
+    baseline = json.loads(baseline_path.read_text())["results"] if baseline_path.exists() else {}
+    regressions = report(results, baseline, args.tolerance)
+    if args.save:
+        BASELINES.mkdir(exist_ok=True)
+        saved = {**baseline, **results}
+        baseline_path.write_text(json.dumps({**environment(), "results": saved}, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+    return 1 if regressions and not args.save else 0
+
+
+def run_scenario(fake: FakeAWS, name: str, scale: str) -> dict[str, Any]:
+    """Seed the stand-in, run one scenario in a child process, and combine its timing with the requests served."""
+    scenario = SCENARIOS[name]
+    fake.reset()
+    if scenario.seed:
+        scenario.seed(fake, scenario.scales[scale])
+    fake.requests.clear()
+    with tempfile.TemporaryDirectory(prefix="sobe-bench-") as workdir:
+        env = {
+            **os.environ,
+            "AWS_ACCESS_KEY_ID": "benchmark",
+            "AWS_SECRET_ACCESS_KEY": "benchmark",
+            "AWS_CONFIG_FILE": os.path.join(workdir, "aws-config"),
+            "AWS_SHARED_CREDENTIALS_FILE": os.path.join(workdir, "aws-credentials"),
+            "AWS_EC2_METADATA_DISABLED": "true",
+            "XDG_CONFIG_HOME": os.path.join(workdir, "config"),
+            "XDG_CACHE_HOME": os.path.join(workdir, "cache"),
+        }
+        command = [sys.executable, "-m", "benchmarks", "--child", name, "--scale", scale]
+        command += ["--endpoint", fake.endpoint, "--workdir", workdir]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    child = json.loads(output.splitlines()[-1])
+    seconds = child["seconds"]
+    return {
+        "seconds": round(seconds, 4),
+        "ops_per_s": round(child["ops"] / seconds, 1),
+        "mb_per_s": round(child["nbytes"] / seconds / 1024**2, 2),
+        "requests": sum(fake.requests.values()),
+        "requests_by_operation": dict(sorted(fake.requests.items())),
+        "peak_rss_mb": child["peak_rss_mb"],
+    }
+
+
+def run_child(name: str, scale: str, endpoint: str, workdir: pathlib.Path) -> int:
+    bench = Bench(workdir, endpoint)
+    SCENARIOS[name].run(bench, SCENARIOS[name].scales[scale])
+    assert bench.measurement is not None, f"{name} did not measure anything"
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss = maxrss / 1024**2 if sys.platform == "darwin" else maxrss / 1024  # bytes on macOS, KiB elsewhere
+    print(json.dumps({**bench.measurement._asdict(), "peak_rss_mb": round(peak_rss, 1)}))
+    return 0
+
+
+def report(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float) -> list[str]:
+    """Print a table of results against the baseline. Returns the names of the scenarios that regressed."""
+    columns = ("ops_per_s", "mb_per_s", "requests", "peak_rss_mb")
+    print(f"{'scenario':<24}" + "".join(f"{column:>22}" for column in columns))
+    regressions = []
+    for name, result in results.items():
+        cells = []
+        for column in columns:
+            value, before = result[column], baseline.get(name, {}).get(column)
+            cell = f"{value:g}"
+            if before:
+                change = (value - before) / before
+                worse = -change if column in HIGHER_IS_BETTER else change
+                # Request counts are deterministic, so any growth is a change in behavior.
+                limit = 0 if column == "requests" else tolerance
+                flag = "!" if worse > limit else " "
+                if flag == "!":
+                    regressions.append(name)
+                cell = f"{cell} ({change:+.0%}){flag}"
+            cells.append(f"{cell:>22}")
+        print(f"{name:<24}" + "".join(cells))
+        print(f"{'':<24}  {', '.join(f'{op} {n}' for op, n in result['requests_by_operation'].items())}")
+    if regressions:
+        print(f"Regressions beyond {tolerance:.0%} (marked !): {', '.join(sorted(set(regressions)))}")
+    return regressions
+
+
+def environment() -> dict[str, str]:
+    try:
+        version = importlib.metadata.version("sobe")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return {"sobe": version, "python": platform.python_version(), "platform": platform.platform()}
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
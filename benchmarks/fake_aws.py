@@ -0,0 +1,405 @@
+"""In-process stand-in for the parts of S3 and CloudFront that sobe uses, served over real HTTP.
+
+Requests go through the whole boto3 stack (signing, retries, connection pooling, XML parsing), so timings
+reflect the client side of sobe. Object bodies are hashed and dropped as they arrive: only keys, sizes, ETags
+and metadata are kept, so uploads of any size and listings of millions of keys fit in memory.
+Signatures are not checked.
+"""
+
+import bisect
+import collections
+import datetime
+import hashlib
+import http.server
+import itertools
+import re
+import threading
+import urllib.parse
+from typing import NamedTuple, Self
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+S3_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+CLOUDFRONT_NS = "http://cloudfront.amazonaws.com/doc/2020-05-31/"
+READ_SIZE = 1024 * 1024
+MAX_KEYS = 1000
+
+
+class StoredObject(NamedTuple):
+    size: int
+    etag: str
+    last_modified: datetime.datetime
+    metadata: dict[str, str]
+
+
+class Upload(NamedTuple):
+    key: str
+    metadata: dict[str, str]
+    parts: dict[int, tuple[int, str]]  # part number: (size, etag)
+
+
+class FakeAWS:
+    """A threaded HTTP server holding any number of buckets. Use as a context manager.
+
+    ``requests`` counts each operation by its S3 or CloudFront name, for comparing how many calls a flow makes.
+    """
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], StoredObject] = {}
+        self.keys: dict[str, list[str]] = collections.defaultdict(list)  # sorted, per bucket
+        self.uploads: dict[str, Upload] = {}
+        self.invalidations: dict[str, str] = {}
+        self.requests: collections.Counter[str] = collections.Counter()
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def seed(self, bucket: str, objects: dict[str, tuple[int, str]]) -> None:
+        """Add objects directly, as ``{key: (size, etag)}``, without going through HTTP."""
+        now = datetime.datetime.now(datetime.UTC)
+        with self.lock:
+            for key, (size, etag) in objects.items():
+                self.objects[bucket, key] = StoredObject(size, etag, now, {})
+            self.keys[bucket] = sorted({*self.keys[bucket], *objects})
+
+    def reset(self) -> None:
+        with self.lock:
+            self.objects.clear()
+            self.keys.clear()
+            self.uploads.clear()
+            self.invalidations.clear()
+            self.requests.clear()
+
+    def put(self, bucket: str, key: str, obj: StoredObject) -> None:
+        with self.lock:
+            if (bucket, key) not in self.objects:
+                bisect.insort(self.keys[bucket], key)
+            self.objects[bucket, key] = obj
+
+    def remove(self, bucket: str, key: str) -> None:
+        with self.lock:
+            if self.objects.pop((bucket, key), None) is not None:
+                keys = self.keys[bucket]
+                del keys[bisect.bisect_left(keys, key)]
+
+    def new_id(self) -> str:
+        return f"ID{next(self._ids):012d}"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real service
+
+    @property
+    def fake(self) -> FakeAWS:
+        return self.server.fake  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_HEAD(self) -> None:
+        self._dispatch("HEAD")
+
+    def do_PUT(self) -> None:
+        self._dispatch("PUT")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        self.query = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+        path = urllib.parse.unquote(url.path)
+        if match := re.fullmatch(r"/2020-05-31/distribution/([^/]+)/invalidation(?:/([^/]+))?", path):
+            return self._cloudfront(method, match[2])
+        bucket, _, key = path.lstrip("/").partition("/")
+        try:
+            self._s3(method, bucket, key)
+        except KeyError:
+            self._error(404, "NoSuchKey" if "uploadId" not in self.query else "NoSuchUpload")
+
+    def _s3(self, method: str, bucket: str, key: str) -> None:
+        q = self.query
+        if not key:
+            if method == "GET" and "uploads" in q:
+                return self._list_uploads(bucket)
+            if method == "GET":
+                return self._list(bucket)
+            if method == "POST" and "delete" in q:
+                return self._delete_objects(bucket)
+        elif method == "PUT" and "uploadId" in q:
+            return self._upload_part(bucket, key)
+        elif method == "PUT":
+            return self._put_object(bucket, key)
+        elif method == "POST" and "uploads" in q:
+            return self._create_upload(bucket, key)
+        elif method == "POST" and "uploadId" in q:
+            return self._complete_upload(bucket, key)
+        elif method == "DELETE" and "uploadId" in q:
+            self._count("AbortMultipartUpload")
+            del self.fake.uploads[q["uploadId"]]
+            return self._reply(204)
+        elif method == "DELETE":
+            self._count("DeleteObject")
+            self.fake.remove(bucket, key)
+            return self._reply(204)
+        elif method == "GET" and "uploadId" in q:
+            return self._list_parts(key)
+        elif method == "HEAD":
+            self._count("HeadObject")
+            obj = self.fake.objects[bucket, key]
+            return self._reply(200, headers=self._object_headers(obj), length=obj.size)
+        self._error(400, "NotImplemented")
+
+    def _put_object(self, bucket: str, key: str) -> None:
+        if "x-amz-copy-source" in self.headers:
+            self._count("CopyObject")
+            source = self._copy_source()
+            metadata = source.metadata
+            if self.headers.get("x-amz-metadata-directive") == "REPLACE":
+                metadata = self._metadata()
+            obj = source._replace(last_modified=_now(), metadata=metadata)
+            self.fake.put(bucket, key, obj)
+            body = f"<CopyObjectResult><ETag>{escape(obj.etag)}</ETag></CopyObjectResult>"
+            return self._reply(200, body)
+        self._count("PutObject")
+        size, digest = self._consume_body()
+        obj = StoredObject(size, f'"{digest.hexdigest()}"', _now(), self._metadata())
+        self.fake.put(bucket, key, obj)
+        self._reply(200, headers={"ETag": obj.etag})
+
+    def _create_upload(self, bucket: str, key: str) -> None:
+        self._count("CreateMultipartUpload")
+        upload_id = self.fake.new_id()
+        self.fake.uploads[upload_id] = Upload(key, self._metadata(), {})
+        body = (
+            f"<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+            f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+        )
+        self._reply(200, body)
+
+    def _upload_part(self, bucket: str, key: str) -> None:
+        upload = self.fake.uploads[self.query["uploadId"]]
+        number = int(self.query["partNumber"])
+        if "x-amz-copy-source" in self.headers:
+            self._count("UploadPartCopy")
+            source = self._copy_source()
+            first, last = map(int, self.headers["x-amz-copy-source-range"].removeprefix("bytes=").split("-"))
+            etag = f'"{hashlib.md5(f"{source.etag}{first}".encode()).hexdigest()}"'
+            upload.parts[number] = (min(last, source.size - 1) - first + 1, etag)
+            return self._reply(200, f"<CopyPartResult><ETag>{escape(etag)}</ETag></CopyPartResult>")
+        self._count("UploadPart")
+        size, digest = self._consume_body()
+        upload.parts[number] = (size, f'"{digest.hexdigest()}"')
+        self._reply(200, headers={"ETag": upload.parts[number][1]})
+
+    def _complete_upload(self, bucket: str, key: str) -> None:
+        self._count("CompleteMultipartUpload")
+        self._read_xml()
+        upload = self.fake.uploads.pop(self.query["uploadId"])
+        parts = [upload.parts[n] for n in sorted(upload.parts)]
+        combined = hashlib.md5(b"".join(bytes.fromhex(etag.strip('"')) for _, etag in parts))
+        etag = f'"{combined.hexdigest()}-{len(parts)}"'
+        self.fake.put(bucket, key, StoredObject(sum(size for size, _ in parts), etag, _now(), upload.metadata))
+        body = (
+            f"<CompleteMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+            f"<ETag>{escape(etag)}</ETag></CompleteMultipartUploadResult>"
+        )
+        self._reply(200, body)
+
+    def _list_parts(self, key: str) -> None:
+        self._count("ListParts")
+        upload = self.fake.uploads[self.query["uploadId"]]
+        parts = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{escape(etag)}</ETag><Size>{size}</Size></Part>"
+            for n, (size, etag) in sorted(upload.parts.items())
+        )
+        self._reply(
+            200, f"<ListPartsResult><Key>{escape(key)}</Key><IsTruncated>false</IsTruncated>{parts}</ListPartsResult>"
+        )
+
+    def _list_uploads(self, bucket: str) -> None:
+        self._count("ListMultipartUploads")
+        prefix = self.query.get("prefix", "")
+        uploads = "".join(
+            f"<Upload><Key>{escape(upload.key)}</Key><UploadId>{upload_id}</UploadId></Upload>"
+            for upload_id, upload in list(self.fake.uploads.items())
+            if upload.key.startswith(prefix)
+        )
+        body = f"<ListMultipartUploadsResult><IsTruncated>false</IsTruncated>{uploads}</ListMultipartUploadsResult>"
+        self._reply(200, body)
+
+    def _list(self, bucket: str) -> None:
+        """ListObjects, in both versions: V2 pages with continuation tokens, V1 with markers."""
+        q = self.query
+        v2 = q.get("list-type") == "2"
+        self._count("ListObjectsV2" if v2 else "ListObjects")
+        prefix, delimiter = q.get("prefix", ""), q.get("delimiter", "")
+        start_after = q.get("continuation-token") or q.get("start-after", "") if v2 else q.get("marker", "")
+        limit = min(int(q.get("max-keys", MAX_KEYS)), MAX_KEYS)
+        with self.fake.lock:
+            keys = self.fake.keys.get(bucket, [])
+            index = (
+                bisect.bisect_right(keys, max(start_after, prefix)) if start_after else bisect.bisect_left(keys, prefix)
+            )
+            contents, prefixes, last = [], [], ""
+            while index < len(keys) and len(contents) + len(prefixes) < limit:
+                key = keys[index]
+                if not key.startswith(prefix):
+                    break
+                cut = key.find(delimiter, len(prefix)) if delimiter else -1
+                if cut >= 0:
+                    common = key[: cut + len(delimiter)]
+                    prefixes.append(common)
+                    last = common + "\U0010ffff"  # sorts after every key in this "directory"
+                    index = bisect.bisect_left(keys, last)
+                    continue
+                obj = self.fake.objects[bucket, key]
+                contents.append((key, obj))
+                last = key
+                index += 1
+            truncated = index < len(keys) and keys[index].startswith(prefix)
+        xml = [f"<ListBucketResult><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"]
+        xml.append(f"<MaxKeys>{limit}</MaxKeys><IsTruncated>{str(truncated).lower()}</IsTruncated>")
+        if delimiter:
+            xml.append(f"<Delimiter>{escape(delimiter)}</Delimiter>")
+        if truncated:
+            xml.append(f"<NextContinuationToken>{escape(last)}</NextContinuationToken>" if v2 else "")
+            xml.append("" if v2 else f"<NextMarker>{escape(last)}</NextMarker>")
+        if v2:
+            xml.append(f"<KeyCount>{len(contents) + len(prefixes)}</KeyCount>")
+        for key, obj in contents:
+            xml.append(
+                f"<Contents><Key>{escape(key)}</Key><LastModified>{_timestamp(obj.last_modified)}</LastModified>"
+                f"<ETag>{escape(obj.etag)}</ETag><Size>{obj.size}</Size><StorageClass>STANDARD</StorageClass></Contents>"
+            )
+        xml.extend(f"<CommonPrefixes><Prefix>{escape(p)}</Prefix></CommonPrefixes>" for p in prefixes)
+        xml.append("</ListBucketResult>")
+        self._reply(200, "".join(xml))
+
+    def _delete_objects(self, bucket: str) -> None:
+        self._count("DeleteObjects")
+        root = self._read_xml()
+        deleted = []
+        for key in root.iter(f"{{{S3_NS}}}Key"):
+            self.fake.remove(bucket, key.text or "")
+            deleted.append(key.text or "")
+        quiet = (root.findtext(f"{{{S3_NS}}}Quiet") or "").lower() == "true"
+        entries = "" if quiet else "".join(f"<Deleted><Key>{escape(key)}</Key></Deleted>" for key in deleted)
+        self._reply(200, f"<DeleteResult>{entries}</DeleteResult>")
+
+    def _cloudfront(self, method: str, invalidation: str | None) -> None:
+        if method == "POST":
+            self._count("CreateInvalidation")
+            batch = self._read_xml(CLOUDFRONT_NS)
+            invalidation = self.fake.new_id()
+            self.fake.invalidations[invalidation] = ElementTree.tostring(batch, encoding="unicode")
+            status = 201
+        else:
+            self._count("GetInvalidation")
+            status = 200
+        body = (
+            f'<Invalidation xmlns="{CLOUDFRONT_NS}"><Id>{invalidation}</Id><Status>Completed</Status>'
+            f"<CreateTime>{_timestamp(_now())}</CreateTime>"
+            f"<InvalidationBatch><Paths><Quantity>0</Quantity></Paths><CallerReference>x</CallerReference>"
+            f"</InvalidationBatch></Invalidation>"
+        )
+        self._reply(status, body, namespace=None)
+
+    def _copy_source(self) -> StoredObject:
+        source = urllib.parse.unquote(self.headers["x-amz-copy-source"].lstrip("/"))
+        bucket, _, key = source.partition("/")
+        return self.fake.objects[bucket, key.partition("?")[0]]
+
+    def _metadata(self) -> dict[str, str]:
+        return {
+            name[11:].lower(): value for name, value in self.headers.items() if name.lower().startswith("x-amz-meta-")
+        }
+
+    def _object_headers(self, obj: StoredObject) -> dict[str, str]:
+        headers = {"ETag": obj.etag, "Last-Modified": self.date_time_string(obj.last_modified.timestamp())}
+        headers.update((f"x-amz-meta-{name}", value) for name, value in obj.metadata.items())
+        return headers
+
+    def _consume_body(self):
+        """Read the request body into a running MD5, decoding aws-chunked framing when the SDK uses it."""
+        digest = hashlib.md5()
+        size = 0
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            while chunk_size := int(self.rfile.readline().split(b";")[0], 16):
+                data = self.rfile.read(chunk_size)
+                digest.update(data)
+                size += len(data)
+                self.rfile.readline()
+            while self.rfile.readline() not in (b"\r\n", b""):  # trailing checksums
+                pass
+            return size, digest
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            data = self.rfile.read(min(remaining, READ_SIZE))
+            digest.update(data)
+            size += len(data)
+            remaining -= len(data)
+        return size, digest
+
+    def _read_xml(self, namespace: str = S3_NS) -> ElementTree.Element:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        return ElementTree.fromstring(body)
+
+    def _count(self, operation: str) -> None:
+        with self.fake.lock:
+            self.fake.requests[operation] += 1
+
+    def _error(self, status: int, code: str) -> None:
+        self._reply(status, f"<Error><Code>{code}</Code><Message>{code}</Message></Error>", namespace=None)
+
+    def _reply(
+        self,
+        status: int,
+        body: str = "",
+        *,
+        headers: dict[str, str] | None = None,
+        length: int | None = None,
+        namespace: str | None = S3_NS,
+    ) -> None:
+        if body and namespace:
+            body = re.sub(r"^<(\w+)>", rf'<\1 xmlns="{namespace}">', body, count=1)
+        payload = f'<?xml version="1.0" encoding="UTF-8"?>\n{body}'.encode() if body else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if payload:
+            self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(payload) if length is None else length))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC)
+
+
+def _timestamp(moment: datetime.datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
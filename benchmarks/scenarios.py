@@ -0,0 +1,192 @@
+"""Benchmark scenarios: what each one seeds on the stand-in, and what it runs and measures in a fresh process."""
+
+import contextlib
+import hashlib
+import os
+import pathlib
+import sys
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, NamedTuple
+
+from benchmarks.fake_aws import FakeAWS
+
+BUCKET = "bench-bucket"
+DISTRIBUTION = "EBENCHMARK0000"
+PREFIX = "bench/"
+MEBIBYTE = 1024**2
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    ops: int
+    nbytes: int
+
+
+class Bench:
+    """What a scenario gets to work with in the child process: a scratch directory and the stand-in's endpoint."""
+
+    def __init__(self, workdir: pathlib.Path, endpoint: str) -> None:
+        self.workdir = workdir
+        self.endpoint = endpoint
+        self.measurement: Measurement | None = None
+
+    def aws(self, jobs: int = 1):
+        from sobe.aws import AWS
+        from sobe.config import AWSConfig
+
+        config = AWSConfig(BUCKET, DISTRIBUTION, {"region_name": "us-east-1"}, {"endpoint_url": self.endpoint})
+        return AWS(config, jobs=jobs)
+
+    def make_files(self, count: int, size: int, directory: str = "files") -> pathlib.Path:
+        """Write ``count`` files of ``size`` bytes each, with contents given by :func:`file_chunks`."""
+        root = self.workdir / directory
+        for i in range(count):
+            path = root / file_name(i)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("wb") as f:
+                for chunk in file_chunks(i, size):
+                    f.write(chunk)
+        return root
+
+    def write_config(self) -> None:
+        """Write a sobe config file for CLI scenarios, in the XDG_CONFIG_HOME set up for this process."""
+        path = pathlib.Path(os.environ["XDG_CONFIG_HOME"]) / "sobe" / "config.toml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            f'url = "https://bench.example.com/"\n\n[aws]\nbucket = "{BUCKET}"\ncloudfront = "{DISTRIBUTION}"\n\n'
+            f'[aws.session]\nregion_name = "us-east-1"\n\n[aws.service]\nendpoint_url = "{self.endpoint}"\n'
+        )
+
+    @contextlib.contextmanager
+    def measure(self, ops: int, nbytes: int = 0) -> Iterator[None]:
+        """Time the block, which performs ``ops`` operations moving ``nbytes`` in total."""
+        start = time.perf_counter()
+        yield
+        self.measurement = Measurement(time.perf_counter() - start, ops, nbytes)
+
+
+def file_name(i: int) -> str:
+    return f"{i % 100:02d}/file{i:07d}.bin"  # spread over directories, as real trees are
+
+
+def file_chunks(i: int, size: int) -> Iterator[bytes]:
+    """Deterministic contents of file ``i``, in chunks of at most 1 MiB, so the seed can know their ETags."""
+    pattern = f"{i:015d}\n".encode()
+    block = pattern * (MEBIBYTE // len(pattern))
+    while size > 0:
+        yield block[:size]
+        size -= len(block[:size])
+
+
+def file_etag(i: int, size: int) -> str:
+    digest = hashlib.md5()
+    for chunk in file_chunks(i, size):
+        digest.update(chunk)
+    return f'"{digest.hexdigest()}"'
+
+
+def seed_keys(fake: FakeAWS, params: dict[str, Any]) -> None:
+    fake.seed(BUCKET, {f"{PREFIX}{i:09d}": (4096, '"0"') for i in range(params["keys"])})
+
+
+def seed_synced_files(fake: FakeAWS, params: dict[str, Any]) -> None:
+    objects = {
+        f"{PREFIX}{file_name(i)}": (params["size"], file_etag(i, params["size"])) for i in range(params["files"])
+    }
+    fake.seed(BUCKET, objects)
+
+
+def run_upload(bench: Bench, params: dict[str, Any]) -> None:
+    from sobe.pool import ordered_map
+
+    root = bench.make_files(params["files"], params["size"])
+    aws = bench.aws(params["jobs"])
+    paths = sorted(root.rglob("*.bin"))
+
+    def upload(path: pathlib.Path) -> None:
+        aws.upload(PREFIX, path, path.relative_to(root).as_posix())
+
+    with bench.measure(len(paths), params["files"] * params["size"]):
+        for _ in ordered_map(upload, paths, params["jobs"]):
+            pass
+
+
+def run_list(bench: Bench, params: dict[str, Any]) -> None:
+    aws = bench.aws()
+    with bench.measure(params["keys"]):
+        count = sum(1 for _ in aws.list(PREFIX))
+    assert count == params["keys"], count
+
+
+def run_delete_many(bench: Bench, params: dict[str, Any]) -> None:
+    aws = bench.aws(params["jobs"])
+    names = [f"{i:09d}" for i in range(params["keys"])]
+    with bench.measure(len(names)):
+        aws.delete_many(PREFIX, names, jobs=params["jobs"])
+
+
+def run_delete_each(bench: Bench, params: dict[str, Any]) -> None:
+    from sobe.pool import ordered_map
+
+    aws = bench.aws(params["jobs"])
+    names = [f"{i:09d}" for i in range(params["keys"])]
+    with bench.measure(len(names)):
+        for _ in ordered_map(lambda name: aws.delete(PREFIX, name), names, params["jobs"]):
+            pass
+
+
+def run_cli(bench: Bench, params: dict[str, Any]) -> None:
+    """Run ``sobe.main.main`` with the scenario's arguments, output discarded, on a tree of generated files."""
+    from sobe.main import main
+
+    root = bench.make_files(params["files"], params["size"])
+    bench.write_config()
+    argv = [arg.replace("{root}", str(root)) for arg in params["argv"]]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        sys.argv = ["sobe", *argv]
+        with bench.measure(params["files"], params["files"] * params["size"]):
+            main()
+
+
+class Scenario(NamedTuple):
+    run: Callable[[Bench, dict[str, Any]], None]
+    scales: dict[str, dict[str, Any]]  # parameters for each scale
+    seed: Callable[[FakeAWS, dict[str, Any]], None] | None = None
+
+
+def _sizes(smoke: dict[str, Any], small: dict[str, Any], full: dict[str, Any], **common) -> dict[str, dict[str, Any]]:
+    return {"smoke": {**common, **smoke}, "small": {**common, **small}, "full": {**common, **full}}
+
+
+CLI_UPLOAD = ["-R", "{root}/", "--year", PREFIX, "--jobs", "8", "--invalidate", "--no-wait"]
+CLI_SYNC = ["--sync", "{root}", "--year", PREFIX, "--jobs", "8"]
+
+SCENARIOS: dict[str, Scenario] = {
+    "upload-small-files": Scenario(
+        run_upload,
+        _sizes({"files": 20}, {"files": 1000}, {"files": 10_000}, size=4096, jobs=8),
+    ),
+    "upload-large-files": Scenario(
+        run_upload,
+        _sizes(
+            {"files": 2, "size": 9 * MEBIBYTE},
+            {"files": 4, "size": 64 * MEBIBYTE},
+            {"files": 100, "size": 100 * MEBIBYTE},
+            jobs=4,
+        ),
+    ),
+    "list": Scenario(run_list, _sizes({"keys": 2500}, {"keys": 50_000}, {"keys": 1_000_000}), seed_keys),
+    "delete-many": Scenario(
+        run_delete_many, _sizes({"keys": 2500}, {"keys": 20_000}, {"keys": 100_000}, jobs=8), seed_keys
+    ),
+    "delete-each": Scenario(run_delete_each, _sizes({"keys": 20}, {"keys": 500}, {"keys": 5000}, jobs=8), seed_keys),
+    "cli-recursive-upload": Scenario(
+        run_cli, _sizes({"files": 20}, {"files": 1000}, {"files": 10_000}, size=4096, argv=CLI_UPLOAD)
+    ),
+    "cli-sync-unchanged": Scenario(
+        run_cli,
+        _sizes({"files": 20}, {"files": 1000}, {"files": 10_000}, size=4096, argv=CLI_SYNC),
+        seed_synced_files,
+    ),
+}
@@ -1,30 +1,580 @@
 """Everything related to AWS. In the future, we may support other cloud providers."""
 
 import datetime
+import hashlib
+import io
+import itertools
 import json
+import mmap
+import os
 import pathlib
+import random
 import time
+import urllib.parse
+import warnings
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, BinaryIO, NamedTuple
 
 import boto3
+import boto3.exceptions
+import boto3.s3.transfer
+import botocore.config
 import botocore.exceptions
+import urllib3.exceptions
 
+from sobe import checksum
 from sobe.config import AWSConfig
+from sobe.dedup import METADATA_KEY, HashIndex
+from sobe.mime import HEADER_SIZE, ContentTypes, guess_content_type  # noqa: F401 (re-exported for compatibility)
+from sobe.pool import batched, ordered_map
+from sobe.resume import DownloadState, UploadState
+from sobe.rules import Rules
+from sobe.stats import RequestStats
+from sobe.throttle import RateLimiter
+
+warnings.filterwarnings("ignore", category=urllib3.exceptions.InsecureRequestWarning)
+
+MIN_CHUNKSIZE = 8 * 1024**2  # boto3's default
+MAX_CHUNKSIZE = 5 * 1024**3  # S3 limit per part
+TARGET_PARTS = 1000  # well under S3's limit of 10,000 parts, without tiny parts on huge files
+STREAM_CHUNKSIZE = 16 * 1024**2  # streams of unknown size: up to 160 GB within S3's 10,000 parts
+DELETE_BATCH_SIZE = 1000  # S3 limit per DeleteObjects call
+HEAD_CHECK_LIMIT = 100  # fewer names than this are checked for existence one HEAD each, rather than by listing
+INVALIDATION_PATH_LIMIT = 3000  # CloudFront limit of file paths in progress at once
+INVALIDATION_WILDCARD_LIMIT = 15  # CloudFront limit of wildcard paths in progress at once
+INVALIDATION_POLL_MIN = 2.0  # seconds before the first status check
+INVALIDATION_POLL_MAX = 30.0  # seconds between status checks, at most
+DOWNLOAD_READ_SIZE = 1024**2  # bytes read from a response at a time, and written straight into the file
+# What a single transfer can fail with, short of a bug: the local file, the network, or S3 refusing it.
+TRANSFER_ERRORS = (
+    OSError,
+    boto3.exceptions.Boto3Error,
+    botocore.exceptions.BotoCoreError,
+    botocore.exceptions.ClientError,
+)
+# Headers of an object that a copy in parts has to set again, since only CopyObject can copy them over.
+COPIED_HEADERS = (
+    "CacheControl",
+    "ContentDisposition",
+    "ContentEncoding",
+    "ContentLanguage",
+    "ContentType",
+    "Expires",
+    "Metadata",
+    "StorageClass",
+    "WebsiteRedirectLocation",
+)
+
+
+class RemoteObject(NamedTuple):
+    key: str
+    size: int
+    last_modified: datetime.datetime
+    etag: str
+
+
+class PrefixedStream:
+    """Read-only stream that returns some already-read bytes before the rest of another stream."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO) -> None:
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to ``size`` bytes, or everything left. Only short at the end of the stream, like a file."""
+        prefix = self._prefix
+        if size < 0:
+            self._prefix = b""
+            return prefix + self._stream.read()
+        if len(prefix) >= size:
+            self._prefix = prefix[size:]
+            return prefix[:size]
+        self._prefix = b""
+        return prefix + self._stream.read(size - len(prefix))
+
+
+class BufferBody(io.RawIOBase):
+    """Seekable request body over a slice of a mapped file, read no faster than ``limiter`` allows, if given.
+
+    Bytes are copied out only as the connection reads them, a block at a time. Closing releases the slice.
+    """
+
+    def __init__(self, view: memoryview, limiter: RateLimiter | None = None) -> None:
+        self._view = view
+        self._position = 0
+        self.limiter = limiter
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        start = self._position
+        end = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        data = self._view[start:end].tobytes() if end > start else b""
+        self._position += len(data)
+        if self.limiter:
+            self.limiter.consume(len(data))
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+class BatchDeleteError(Exception):
+    """Some objects could not be deleted by a DeleteObjects call."""
+
+    def __init__(self, bucket: str, errors: list[dict[str, str]]):
+        self.errors = errors
+        details = ", ".join(f"{e.get('Key')} ({e.get('Code')}: {e.get('Message')})" for e in errors)
+        super().__init__(f"Could not delete {len(errors)} object(s) from bucket {bucket}: {details}")
+
+
+class InvalidationTimeout(Exception):
+    """A CloudFront invalidation did not complete within the configured time."""
+
+    def __init__(self, invalidation: str, status: str):
+        self.invalidation = invalidation
+        self.status = status
+        super().__init__(f"Invalidation {invalidation} still {status} after the configured timeout")
+
+
+class ETagMismatch(Exception):
+    """A downloaded file doesn't match the ETag of its object, or the object changed while it was downloaded."""
+
+    def __init__(self, key: str, reason: str):
+        self.key = key
+        super().__init__(f"{key}: {reason}")
 
 
 class AWS:
-    def __init__(self, config: AWSConfig) -> None:
+    def __init__(
+        self,
+        config: AWSConfig,
+        *,
+        jobs: int = 1,
+        content_types: ContentTypes | None = None,
+        hash_index: HashIndex | None = None,
+        stats: RequestStats | None = None,
+        limiter: RateLimiter | None = None,
+        rules: Rules | None = None,
+    ) -> None:
         self.config = config
+        self.content_types = content_types or ContentTypes()
+        self.rules = rules or Rules()
+        self.hash_index = hash_index
+        self.limiter = limiter
         self._session = boto3.Session(**self.config.session)
-        self._s3_resource = self._session.resource("s3", **self.config.service)
+        retries: dict[str, Any] = {}
+        if config.retry_mode:
+            retries["mode"] = config.retry_mode
+        if config.max_attempts:
+            retries["total_max_attempts"] = config.max_attempts
+        # One connection per thread: each job sends up to max_concurrency parts at once. Never fewer than
+        # botocore's default pool.
+        transfer = self.transfer_config(0)
+        threads = jobs * (transfer.max_concurrency if transfer.use_threads else 1)
+        client_config = botocore.config.Config(max_pool_connections=max(threads, 10), retries=retries or None)
+        self._s3_resource = self._session.resource("s3", config=client_config, **self.config.service)
+        self._s3_client = self._s3_resource.meta.client
         self._bucket = self._s3_resource.Bucket(self.config.bucket)  # type: ignore[attr-defined]
-        self._cloudfront = self._session.client("cloudfront", **self.config.service)
+        cloudfront_config = botocore.config.Config(retries=retries or None)
+        self._cloudfront = self._session.client("cloudfront", config=cloudfront_config, **self.config.service)
+        if stats:
+            stats.attach(self._s3_client)
+            stats.attach(self._cloudfront)
 
-    def upload(self, prefix: str, local_path: pathlib.Path, remote_name: str = "", *, content_type: str = "") -> None:
-        """Upload a file."""
-        extra_args = {"ContentType": content_type or guess_content_type(local_path)}
+    def upload(
+        self,
+        prefix: str,
+        local_path: pathlib.Path,
+        remote_name: str = "",
+        *,
+        content_type: str = "",
+        content_encoding: str = "",
+        dedup: bool = False,
+        progress: Callable[[int], None] | None = None,
+    ) -> str | None:
+        """Upload a file. Named pipes and other files that aren't regular files are streamed.
+
+        ``content_encoding`` labels an already-compressed file, whose ``content_type`` is that of the original.
+        With ``dedup`` (and a ``hash_index``), a file whose bytes are already in the bucket is copied server-side
+        instead of uploaded. Returns the key it was copied from, or None when the bytes were sent. The file is
+        mapped into memory once, both to hash it and to send it.
+
+        The ``rules`` matching the remote name or content type add their headers and storage class.
+        ``progress`` is called with the number of bytes transferred as they go, from the transfer's threads.
+        """
         if not remote_name:
             remote_name = local_path.name
-        self._bucket.upload_file(str(local_path), f"{prefix}{remote_name}", ExtraArgs=extra_args)
+        if not local_path.is_file():
+            with local_path.open("rb") as stream:
+                self.upload_stream(prefix, stream, remote_name, content_type=content_type, progress=progress)
+            return None
+        key = f"{prefix}{remote_name}"
+        extra_args: dict[str, Any] = {"ContentType": content_type or self.content_types.guess(local_path)}
+        extra_args.update(self.rules.extra_args(remote_name, extra_args["ContentType"]))
+        if content_encoding:
+            extra_args["ContentEncoding"] = content_encoding
+        size = local_path.stat().st_size
+        config = self.transfer_config(size)
+        if self.config.checksum_algorithm:
+            extra_args["ChecksumAlgorithm"] = self.config.checksum_algorithm
+        if not (dedup and self.hash_index):
+            self._upload_file(local_path, key, extra_args, config, progress)
+            return None
+
+        with checksum.mapped(local_path) as view:
+            digest = hashlib.sha256(view).hexdigest()
+            extra_args["Metadata"] = {METADATA_KEY: digest}
+            source = self.hash_index.get(digest)
+            if source and self._holds(source, digest, size):
+                copy_source = {"Bucket": self.config.bucket, "Key": source}
+                copy_args = {**extra_args, "MetadataDirective": "REPLACE"}
+                # multipart above 5 GB
+                self._bucket.copy(copy_source, key, ExtraArgs=copy_args, Callback=progress, Config=config)
+            else:
+                if source:
+                    self.hash_index.discard(digest)
+                source = None
+                self._upload_file(local_path, key, extra_args, config, progress, view)
+        self.hash_index.add(digest, key)
+        return source
+
+    def _upload_file(
+        self,
+        local_path: pathlib.Path,
+        key: str,
+        extra_args: dict[str, Any],
+        config: boto3.s3.transfer.TransferConfig,
+        progress: Callable[[int], None] | None = None,
+        view: memoryview | None = None,
+    ) -> None:
+        """Upload a regular file, in resumable parts when it reaches the multipart threshold.
+
+        Parts are sent from ``view``, the file already mapped into memory, or else from a new mapping.
+        """
+        if local_path.stat().st_size < config.multipart_threshold:
+            callback = self._limited(progress)
+            self._bucket.upload_file(str(local_path), key, ExtraArgs=extra_args, Callback=callback, Config=config)
+        elif view is None:
+            with checksum.mapped(local_path) as mapping:
+                self._upload_resumable(local_path, mapping, key, extra_args, config, progress)
+        else:
+            self._upload_resumable(local_path, view, key, extra_args, config, progress)
+
+    def _upload_resumable(
+        self,
+        local_path: pathlib.Path,
+        view: memoryview,
+        key: str,
+        extra_args: dict[str, Any],
+        config: boto3.s3.transfer.TransferConfig,
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """Upload a file in parts, recording each one so an interrupted upload resumes where it stopped.
+
+        Progress is kept in a state file that is removed once the upload completes. A state file left by an
+        earlier attempt is used if the file is unchanged and S3 still has the upload; otherwise that upload is
+        aborted, so it doesn't linger, and a new one is started. ``progress`` hears of each part once it is sent,
+        and of the parts a resumed upload already had at the start.
+
+        Each part is sent from ``view`` with its checksum, computed from the same pages just before, so botocore
+        doesn't read the part again to compute one itself, and S3 verifies every part as it arrives.
+        """
+        stat = local_path.stat()
+        part_size = config.multipart_chunksize
+        algorithm = extra_args.get("ChecksumAlgorithm", checksum.DEFAULT_ALGORITHM)
+        state_path = UploadState.location(self.config.bucket, key, local_path)
+        state = UploadState.load(state_path)
+        if state is not None and not (
+            state.matches(stat.st_size, stat.st_mtime_ns, part_size, algorithm) and self._confirm_parts(key, state)
+        ):
+            self._abort_upload(key, state.upload_id)
+            state = None
+        if state is None:
+            response = self._s3_client.create_multipart_upload(
+                Bucket=self.config.bucket, Key=key, **{"ChecksumAlgorithm": algorithm, **extra_args}
+            )
+            state = UploadState(
+                state_path,
+                upload_id=response["UploadId"],
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                part_size=part_size,
+                checksum_algorithm=algorithm,
+            )
+            state.save()
+
+        def send(part: int) -> None:
+            start = (part - 1) * part_size
+            with view[start : start + part_size] as data, BufferBody(data, self.limiter) as body:
+                value = checksum.checksum(algorithm, data)
+                response = self._s3_client.upload_part(
+                    Bucket=self.config.bucket,
+                    Key=key,
+                    UploadId=state.upload_id,
+                    PartNumber=part,
+                    Body=body,
+                    ChecksumAlgorithm=algorithm,
+                    **{f"Checksum{algorithm}": value},
+                )
+                state.record(part, response["ETag"], value)
+                if progress:
+                    progress(len(data))
+            checksum.release(view, start, part_size)
+
+        count = max(-(-stat.st_size // part_size), 1)
+        missing = [part for part in range(1, count + 1) if part not in state.parts]
+        if progress and len(missing) < count:
+            progress(stat.st_size - sum(min(part_size, stat.st_size - (part - 1) * part_size) for part in missing))
+        for _ in ordered_map(send, missing, config.max_concurrency if config.use_threads else 1):
+            pass
+        parts = [
+            {"PartNumber": part, "ETag": etag, f"Checksum{algorithm}": state.checksums[part]}
+            for part, etag in sorted(state.parts.items())
+        ]
+        self._s3_client.complete_multipart_upload(
+            Bucket=self.config.bucket, Key=key, UploadId=state.upload_id, MultipartUpload={"Parts": parts}
+        )
+        state.remove()
+
+    def _confirm_parts(self, key: str, state: UploadState) -> bool:
+        """Keep only the recorded parts that S3 still has. Returns False if the upload itself is gone."""
+        paginator = self._s3_client.get_paginator("list_parts")
+        remote = {}
+        try:
+            for page in paginator.paginate(Bucket=self.config.bucket, Key=key, UploadId=state.upload_id):
+                remote.update((part["PartNumber"], part["ETag"]) for part in page.get("Parts", []))
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                return False
+            raise
+        state.parts = {part: etag for part, etag in state.parts.items() if remote.get(part) == etag}
+        return True
+
+    def _abort_upload(self, key: str, upload_id: str) -> None:
+        try:
+            self._s3_client.abort_multipart_upload(Bucket=self.config.bucket, Key=key, UploadId=upload_id)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+
+    def abort_incomplete(self, prefix: str, *, started_before: datetime.datetime | None = None) -> Iterator[str]:
+        """Abort the multipart uploads under a prefix that were never completed, yielding each key as it's done.
+
+        Unfinished uploads keep their parts, which are billed as storage, until they're completed or aborted.
+        Only uploads started before ``started_before`` are aborted, so recent ones, which may still be running
+        elsewhere or be resumed, are left alone.
+        """
+        paginator = self._s3_client.get_paginator("list_multipart_uploads")
+        for page in paginator.paginate(Bucket=self.config.bucket, Prefix=prefix):
+            for upload in page.get("Uploads", []):
+                if started_before is not None and upload["Initiated"] >= started_before:
+                    continue
+                self._abort_upload(upload["Key"], upload["UploadId"])
+                yield upload["Key"]
+
+    def _holds(self, key: str, digest: str, size: int) -> bool:
+        """Whether an object still exists with the given size and recorded digest."""
+        try:
+            head = self._s3_client.head_object(Bucket=self.config.bucket, Key=key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "404":
+                return False
+            raise
+        return head["ContentLength"] == size and head.get("Metadata", {}).get(METADATA_KEY) == digest
+
+    def upload_stream(
+        self,
+        prefix: str,
+        stream: BinaryIO,
+        remote_name: str,
+        *,
+        content_type: str = "",
+        progress: Callable[[int], None] | None = None,
+    ) -> None:
+        """Upload everything read from a stream, such as stdin or a pipe, without a temporary file.
+
+        Large streams are sent in parts as they are read, with at most ``max_concurrency`` parts held in memory.
+        Without a content type, it is guessed from the remote name or else from the first bytes of the stream.
+        """
+        header = stream.read(HEADER_SIZE)
+        extra_args = {"ContentType": content_type or self.content_types.guess_stream(remote_name, header)}
+        extra_args.update(self.rules.extra_args(remote_name, extra_args["ContentType"]))
+        if self.config.checksum_algorithm:
+            extra_args["ChecksumAlgorithm"] = self.config.checksum_algorithm
+        config = self.transfer_config(None)
+        body = PrefixedStream(header, stream)
+        key = f"{prefix}{remote_name}"
+        self._bucket.upload_fileobj(body, key, ExtraArgs=extra_args, Callback=self._limited(progress), Config=config)
+
+    def _limited(self, progress: Callable[[int], None] | None) -> Callable[[int], None] | None:
+        """The transfer callback that holds uploads to the rate limit, if any, and reports progress."""
+        limiter = self.limiter
+        if limiter is None:
+            return progress
+        if progress is None:
+            return limiter.consume
+
+        def callback(sent: int) -> None:
+            limiter.consume(sent)
+            progress(sent)
+
+        return callback
+
+    def transfer_config(self, size: int | None) -> boto3.s3.transfer.TransferConfig:
+        """Return the multipart transfer settings for a file of the given size, or for a stream of unknown size."""
+        settings = dict(self.config.transfer)
+        if settings.get("multipart_chunksize", "auto") == "auto":
+            settings["multipart_chunksize"] = STREAM_CHUNKSIZE if size is None else auto_chunksize(size)
+        config = boto3.s3.transfer.TransferConfig(**settings)
+        if size is None:
+            config.max_in_memory_upload_chunks = config.max_concurrency  # bound the read-ahead buffer
+        return config
+
+    def copy(self, source: str, key: str, *, move: bool = False) -> bool:
+        """Copy an object to another key server-side, keeping its content type, metadata and other headers.
+
+        Objects up to 5 GB are copied by a single CopyObject request. Larger ones are copied in parts with
+        UploadPartCopy, ``max_concurrency`` at a time. With ``move``, the source is deleted once copied.
+        Returns False, and copies nothing, when the source doesn't exist.
+        """
+        if move and source == key:
+            raise ValueError(f"can't move {source} onto itself: deleting the source would delete the only copy")
+        try:
+            head = self._s3_client.head_object(Bucket=self.config.bucket, Key=source)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "404":
+                return False
+            raise
+        copy_source = {"Bucket": self.config.bucket, "Key": source}
+        storage = {"StorageClass": head["StorageClass"]} if "StorageClass" in head else {}  # else it'd be STANDARD
+        if head["ContentLength"] <= MAX_CHUNKSIZE:
+            self._s3_client.copy_object(Bucket=self.config.bucket, Key=key, CopySource=copy_source, **storage)
+        else:
+            extra_args = {name: head[name] for name in COPIED_HEADERS if name in head}
+            extra_args["MetadataDirective"] = "REPLACE"
+            config = self.transfer_config(head["ContentLength"])
+            self._bucket.copy(copy_source, key, ExtraArgs=extra_args, Config=config)
+        if move:
+            self._s3_client.delete_object(Bucket=self.config.bucket, Key=source)
+        return True
+
+    def download(
+        self, key: str, path: pathlib.Path, *, jobs: int = 1, progress: Callable[[int], None] | None = None
+    ) -> bool:
+        """Download an object into a local file with concurrent ranged GETs, ``jobs`` at a time.
+
+        The file is preallocated and mapped into memory, and every response is written straight into its place.
+        An object uploaded in parts is fetched part by part, and others in ranges of the multipart chunk size.
+        Each GET is made only if the object still has the ETag it had at the start, and the finished file is
+        checked against that ETag, unless it isn't an MD5 because the object is encrypted with KMS or a
+        customer key. A mismatch removes the file and raises :class:`ETagMismatch`.
+
+        The pieces written are recorded in a state file beside the download, so an interrupted download resumes
+        where it stopped, as long as the object is unchanged. Returns False, and writes nothing, when the object
+        doesn't exist.
+        """
+        try:
+            head = self._s3_client.head_object(Bucket=self.config.bucket, Key=key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "404":
+                return False
+            raise
+        etag, size = head["ETag"], head["ContentLength"]
+        _, _, parts = etag.strip('"').partition("-")
+        piece_size = 0 if parts else self.transfer_config(size).multipart_chunksize
+        count = int(parts) if parts else -(-size // piece_size)
+        state_path = DownloadState.location(path)
+        state = DownloadState.load(state_path)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if state is None or not state.matches(etag, size, piece_size) or os.fstat(fd).st_size != size:
+                state = DownloadState(state_path, etag=etag, size=size, piece_size=piece_size)
+                state.save()
+                preallocate(fd, size)
+            if size:
+                with mmap.mmap(fd, size, access=mmap.ACCESS_WRITE) as mapping:
+                    self._download_pieces(key, mapping, state, count, jobs, progress)
+                    # the ETag of an object encrypted with KMS or a customer key isn't an MD5 of its contents
+                    opaque = (
+                        head.get("ServerSideEncryption", "").startswith("aws:kms") or "SSECustomerAlgorithm" in head
+                    )
+                    if not opaque and composite_etag(mapping, state, count) != etag.strip('"'):
+                        raise ETagMismatch(key, f"the downloaded file doesn't match the ETag {etag}")
+                    mapping.flush()
+        except ETagMismatch:
+            state.remove()
+            path.unlink(missing_ok=True)
+            raise
+        finally:
+            os.close(fd)
+        state.remove()
+        return True
+
+    def _download_pieces(
+        self,
+        key: str,
+        mapping: mmap.mmap,
+        state: DownloadState,
+        count: int,
+        jobs: int,
+        progress: Callable[[int], None] | None,
+    ) -> None:
+        """Fetch the pieces of an object that ``state`` doesn't have yet, writing each one into ``mapping``."""
+        by_part = not state.piece_size
+
+        def fetch(piece: int) -> None:
+            if by_part:
+                selection: dict[str, Any] = {"PartNumber": piece}
+            else:
+                start = (piece - 1) * state.piece_size
+                selection = {"Range": f"bytes={start}-{min(start + state.piece_size, state.size) - 1}"}
+            try:
+                response = self._s3_client.get_object(
+                    Bucket=self.config.bucket, Key=key, IfMatch=state.etag, **selection
+                )
+            except botocore.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") == "PreconditionFailed":
+                    raise ETagMismatch(key, "the object changed while it was downloaded") from e
+                raise
+            # "bytes first-last/size"; a part's place in the object isn't known before it arrives
+            offset = int(response["ContentRange"].split()[1].partition("-")[0])
+            digest = hashlib.md5(usedforsecurity=False)
+            for chunk in response["Body"].iter_chunks(DOWNLOAD_READ_SIZE):
+                if self.limiter:
+                    self.limiter.consume(len(chunk))
+                mapping[offset : offset + len(chunk)] = chunk
+                offset += len(chunk)
+                if by_part:
+                    digest.update(chunk)
+                if progress:
+                    progress(len(chunk))
+            state.record(piece, digest.hexdigest() if by_part else "", response["ContentLength"])
+
+        missing = [piece for piece in range(1, count + 1) if piece not in state.pieces]
+        if progress and state.received:
+            progress(state.received)
+        for _ in ordered_map(fetch, missing, jobs):
+            pass
 
     def delete(self, prefix: str, remote_filename: str) -> bool:
         """Delete a file, if it exists. Returns whether it did."""
@@ -38,34 +588,144 @@ class AWS:
                 return False
             raise
 
-    def list(self, prefix: str) -> list[str]:
-        """Return a list of object filenames in the given prefix."""
-        objects = self._bucket.objects.filter(Prefix=prefix)
-        pos1 = len(prefix)
-        results = set()
-        for obj in objects:
-            if len(obj.key) == pos1:
-                continue  # skip the prefix entry itself
-            pos2 = obj.key.find("/", pos1)
-            if pos2 == -1:
-                results.add(obj.key[pos1:])
-            else:
-                results.add(obj.key[pos1:pos2] + "/")
-        return sorted(results)
+    def delete_many(self, prefix: str, remote_filenames: Iterable[str], *, jobs: int = 1) -> dict[str, bool]:
+        """Delete many files using batched DeleteObjects calls. Returns whether each file existed.
+
+        DeleteObjects succeeds for missing keys too, so existence is checked first, as :meth:`_existing_names` does.
+        """
+        names = list(dict.fromkeys(remote_filenames))
+        existing = self._existing_names(prefix, names, jobs=jobs)
+        self.delete_keys((f"{prefix}{name}" for name in names if name in existing), jobs=jobs)
+        return {name: name in existing for name in names}
 
-    def invalidate_cache(self):
-        """Create and wait for a full-path CloudFront invalidation. Iterates until completion."""
+    def delete_keys(self, keys: Iterable[str], *, jobs: int = 1) -> int:
+        """Delete the given full keys in concurrent batches of up to 1,000. Returns how many were sent."""
+        return sum(map(len, self.delete_batches(keys, jobs=jobs)))
+
+    def delete_batches(self, keys: Iterable[str], *, jobs: int = 1) -> Iterator[list[str]]:
+        """Delete the given full keys in concurrent batches of up to 1,000, yielding each batch once it's deleted.
+
+        Keys are consumed only as batches are sent, so they may come from a listing still in progress.
+        """
+
+        def delete(batch: list[str]) -> list[str]:
+            self._delete_batch(batch)
+            return batch
+
+        return ordered_map(delete, batched(keys, DELETE_BATCH_SIZE), jobs)
+
+    def _existing_names(self, prefix: str, names: list[str], *, jobs: int = 1) -> set[str]:
+        """Return which of the given names exist as objects directly under the prefix.
+
+        A few names are checked with a HEAD each, ``jobs`` at a time. More are looked up in a listing of the prefix
+        that starts at the first of them, in key order, and stops past the last, so the cost depends on the span of
+        the names rather than on the size of the directory.
+        """
+        if len(names) < HEAD_CHECK_LIMIT:
+            found = ordered_map(lambda name: self._exists(f"{prefix}{name}"), names, jobs)
+            return {name for name, exists in zip(names, found) if exists}
+        wanted = set(names)
+        first, last = min(wanted), max(wanted)
+        paginator = self._s3_client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(
+            Bucket=self.config.bucket,
+            Prefix=prefix,
+            Delimiter="/",
+            StartAfter=f"{prefix}{first[:-1]}",  # exclusive, and just before the first name
+        )
+        existing = set()
+        for page in pages:
+            listed = [obj["Key"][len(prefix) :] for obj in page.get("Contents", [])]
+            existing.update(name for name in listed if name in wanted)
+            listed.extend(common["Prefix"][len(prefix) :] for common in page.get("CommonPrefixes", []))
+            if any(name > last for name in listed):
+                break
+        return existing
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self._s3_client.head_object(Bucket=self.config.bucket, Key=key)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "404":
+                return False
+            raise
+        return True
+
+    def _delete_batch(self, keys: list[str]) -> int:
+        """Delete up to ``DELETE_BATCH_SIZE`` keys in a single request."""
+        delete = {"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        response = self._s3_client.delete_objects(Bucket=self.config.bucket, Delete=delete)
+        if response.get("Errors"):
+            raise BatchDeleteError(self.config.bucket, response["Errors"])
+        return len(keys)
+
+    def list(self, prefix: str) -> Iterator[str]:
+        """Yield object filenames and subdirectories (with a trailing slash) directly in the given prefix.
+
+        Uses a delimited listing, so nested objects are never transferred, and names are yielded page by page.
+        """
+        paginator = self._s3_client.get_paginator("list_objects_v2")
+        pos = len(prefix)
+        for page in paginator.paginate(Bucket=self.config.bucket, Prefix=prefix, Delimiter="/"):
+            files = (obj["Key"][pos:] for obj in page.get("Contents", []))
+            folders = (common["Prefix"][pos:] for common in page.get("CommonPrefixes", []))
+            yield from sorted(name for name in itertools.chain(files, folders) if name)  # skip the prefix entry
+
+    def list_keys(self, prefix: str, *, recursive: bool = True) -> Iterator[str]:
+        """Yield the full key of every object under the given prefix, page by page.
+
+        Without ``recursive``, only objects directly under it are listed, as by :meth:`list`.
+        """
+        paginator = self._s3_client.get_paginator("list_objects_v2")
+        delimiter = {} if recursive else {"Delimiter": "/"}
+        for page in paginator.paginate(Bucket=self.config.bucket, Prefix=prefix, **delimiter):
+            yield from (obj["Key"] for obj in page.get("Contents", []))
+
+    def list_objects(self, prefix: str) -> Iterator[RemoteObject]:
+        """Yield every object under the given prefix, including nested ones, with its size, date and ETag."""
+        for obj in self._bucket.objects.filter(Prefix=prefix):
+            yield RemoteObject(obj.key, obj.size, obj.last_modified, obj.e_tag.strip('"'))
+
+    def invalidate_cache(self, keys: Iterable[str] | None = None) -> Iterator[str]:
+        """Create and wait for a CloudFront invalidation. Iterates until completion.
+
+        Without keys, the whole distribution is invalidated. Otherwise only the given object keys are,
+        collapsed into wildcard prefixes when there are more than a single invalidation may hold.
+        """
+        invalidation = self.create_invalidation(keys)
+        yield from self.wait_for_invalidation(invalidation)
+
+    def create_invalidation(self, keys: Iterable[str] | None = None) -> str:
+        """Start a CloudFront invalidation without waiting for it. Returns the invalidation ID."""
+        paths = ["/*"] if keys is None else invalidation_paths(keys)
         ref = datetime.datetime.now().astimezone().isoformat()
-        batch = {"Paths": {"Quantity": 1, "Items": ["/*"]}, "CallerReference": ref}
+        batch = {"Paths": {"Quantity": len(paths), "Items": paths}, "CallerReference": ref}
         distribution = self.config.cloudfront
         response = self._cloudfront.create_invalidation(DistributionId=distribution, InvalidationBatch=batch)
-        invalidation = response["Invalidation"]["Id"]
+        return response["Invalidation"]["Id"]
+
+    def invalidation_status(self, invalidation: str) -> str:
+        """Return the current status of an invalidation, such as "InProgress" or "Completed"."""
+        response = self._cloudfront.get_invalidation(DistributionId=self.config.cloudfront, Id=invalidation)
+        return response["Invalidation"]["Status"]
+
+    def wait_for_invalidation(self, invalidation: str) -> Iterator[str]:
+        """Poll an invalidation until it completes, yielding its status before each wait.
+
+        Waits grow exponentially with random jitter, since invalidations usually take minutes.
+        Raises :class:`InvalidationTimeout` after ``invalidation_timeout`` seconds.
+        """
+        deadline = time.monotonic() + self.config.invalidation_timeout
+        delay = INVALIDATION_POLL_MIN
         status = "Created"
         while status != "Completed":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise InvalidationTimeout(invalidation, status)
             yield status
-            time.sleep(3)
-            response = self._cloudfront.get_invalidation(DistributionId=distribution, Id=invalidation)
-            status = response["Invalidation"]["Status"]
+            time.sleep(min(random.uniform(delay / 2, delay), remaining))
+            delay = min(delay * 2, INVALIDATION_POLL_MAX)
+            status = self.invalidation_status(invalidation)
 
     def generate_needed_permissions(self) -> str:
         """Return the minimal IAM policy statement required by the tool."""
@@ -77,6 +737,7 @@ class AWS:
 
         actions = """
             s3:PutObject s3:GetObject s3:ListBucket s3:DeleteObject
+            s3:ListBucketMultipartUploads s3:ListMultipartUploadParts s3:AbortMultipartUpload
             cloudfront:CreateInvalidation cloudfront:GetInvalidation
         """.split()
         resources = [
@@ -89,22 +750,47 @@ class AWS:
         return json.dumps(policy, indent=2)
 
 
-def guess_content_type(path: pathlib.Path) -> str:
-    """Return a guessed content type for the given file."""
-    import mimetypes
+def auto_chunksize(size: int) -> int:
+    """Pick a multipart chunk size that splits the file into at most about ``TARGET_PARTS`` parts."""
+    mebibyte = 1024**2
+    chunksize = -(-size // TARGET_PARTS // mebibyte) * mebibyte  # round up to a whole MiB
+    return min(max(chunksize, MIN_CHUNKSIZE), MAX_CHUNKSIZE)
+
+
+def invalidation_paths(keys: Iterable[str]) -> list[str]:
+    """Turn object keys into CloudFront invalidation paths that fit in a single invalidation.
+
+    Up to ``INVALIDATION_PATH_LIMIT`` keys are invalidated individually. Beyond that, keys are grouped
+    under the deepest directory wildcards that stay within ``INVALIDATION_WILDCARD_LIMIT``.
+    """
+    unique = sorted(set(keys))
+    if len(unique) <= INVALIDATION_PATH_LIMIT:
+        return [f"/{urllib.parse.quote(key)}" for key in unique]
+    directories = [key.split("/")[:-1] for key in unique]
+    for depth in range(max(map(len, directories)), 0, -1):
+        wildcards = {"/".join(parts[:depth]) for parts in directories}
+        if "" in wildcards:
+            break  # some keys are at the root, so only a full invalidation covers them
+        if len(wildcards) <= INVALIDATION_WILDCARD_LIMIT:
+            return sorted(f"/{urllib.parse.quote(prefix)}/*" for prefix in wildcards)
+    return ["/*"]
+
 
-    # Guess based on filename using standard library
-    guess, _ = mimetypes.guess_type(path.name)
-    if guess:
-        return guess
+def preallocate(fd: int, size: int) -> None:
+    """Empty a file and reserve ``size`` bytes of disk for it, or just extend it where that isn't supported."""
+    os.ftruncate(fd, 0)
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):  # not on macOS, nor on some file systems
+        os.ftruncate(fd, size)
 
-    import puremagic
 
-    # Guess based on file content using puremagic
-    for result in puremagic.magic_file(path):  # result is ordered by confidence
-        guess = getattr(result, "mime_type", None)
-        if guess:
-            return guess
+def composite_etag(mapping: mmap.mmap, state: DownloadState, count: int) -> str:
+    """The ETag S3 gives an object with the downloaded contents.
 
-    # Fallback
-    return "application/octet-stream"
+    That's the MD5 of the whole object, or for one uploaded in parts, the MD5 of the parts' MD5s and their count.
+    """
+    if state.piece_size:
+        return hashlib.md5(mapping, usedforsecurity=False).hexdigest()
+    digests = b"".join(bytes.fromhex(state.pieces[part]) for part in range(1, count + 1))
+    return f"{hashlib.md5(digests, usedforsecurity=False).hexdigest()}-{count}"
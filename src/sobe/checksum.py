@@ -0,0 +1,66 @@
+"""Checksums of uploaded bytes, computed from the same memory-mapped pages they are sent from.
+
+A mapped file is read from disk once: computing a checksum pulls its pages in, and sending it reuses them.
+"""
+
+import base64
+import contextlib
+import hashlib
+import mmap
+import os
+import pathlib
+import zlib
+from collections.abc import Iterator
+
+DEFAULT_ALGORITHM = "CRC32"  # what botocore sends when not told otherwise
+
+
+def checksum(algorithm: str, data: bytes | memoryview) -> str:
+    """Return the checksum of ``data`` the way S3 expects it: base64 of the big-endian CRC, or of the digest.
+
+    ``algorithm`` is one of S3's names: "CRC32", "CRC32C", "SHA1" or "SHA256".
+    """
+    if algorithm == "CRC32":
+        raw = zlib.crc32(data).to_bytes(4, "big")
+    elif algorithm == "CRC32C":
+        raw = crc32c(data).to_bytes(4, "big")
+    else:
+        raw = hashlib.new(algorithm.lower(), data).digest()
+    return base64.b64encode(raw).decode()
+
+
+def crc32c(data: bytes | memoryview) -> int:
+    """CRC32C, which the standard library lacks, from the same package botocore uses for it."""
+    try:
+        from awscrt import checksums
+    except ImportError as err:
+        raise ImportError('aws.checksum_algorithm = "CRC32C" needs the awscrt package: pip install awscrt') from err
+    return checksums.crc32c(data)
+
+
+@contextlib.contextmanager
+def mapped(path: pathlib.Path) -> Iterator[memoryview]:
+    """Map a file read-only for the duration of the block. Slices taken of it must be released before it ends."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:  # empty files can't be mapped
+            yield memoryview(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping, memoryview(mapping) as view:
+            yield view
+
+
+def release(view: memoryview, start: int, length: int) -> None:
+    """Drop a range of a mapped file, once sent, from the process's memory; the kernel keeps it cached.
+
+    Without this, every page of a large file would count towards the process's resident memory until the file
+    is unmapped. Dropping starts at the first page boundary in the range; a page dropped and needed again is
+    simply read back from the cache. Views of anything but a file mapping are left alone, as are systems without
+    ``madvise``.
+    """
+    mapping = view.obj
+    if not (isinstance(mapping, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED")):
+        return
+    aligned = -(-start // mmap.PAGESIZE) * mmap.PAGESIZE
+    end = min(start + length, len(mapping))
+    if end > aligned:
+        mapping.madvise(mmap.MADV_DONTNEED, aligned, end - aligned)
@@ -0,0 +1,89 @@
+"""Compression of text assets before upload, to be served with a ``Content-Encoding`` header."""
+
+import fnmatch
+import os
+import pathlib
+import tempfile
+import zlib
+from typing import Protocol
+
+from sobe.config import CompressionConfig
+
+READ_SIZE = 1024 * 1024
+GZIP_WBITS = 31  # zlib format selector for a gzip header and trailer
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+    def flush(self) -> bytes: ...
+
+
+class BrotliCompressor:
+    """Adapts :class:`brotli.Compressor` to the interface of zlib's compression objects."""
+
+    def __init__(self, level: int) -> None:
+        try:
+            import brotli
+        except ImportError as err:
+            raise ImportError('compress.encoding = "br" needs the brotli package: pip install brotli') from err
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def compressor(encoding: str, level: int | None = None) -> Compressor:
+    """Return a streaming compressor for ``encoding``, at the highest level unless told otherwise."""
+    if encoding == "br":
+        return BrotliCompressor(11 if level is None else level)
+    return zlib.compressobj(9 if level is None else level, zlib.DEFLATED, GZIP_WBITS)
+
+
+def should_compress(content_type: str, size: int, config: CompressionConfig) -> bool:
+    """Whether a file of this type and size is worth compressing, according to ``config``."""
+    if size < config.min_size:
+        return False
+    base = content_type.partition(";")[0].strip().lower()
+    return any(fnmatch.fnmatchcase(base, pattern.lower()) for pattern in config.types)
+
+
+def compress_file(
+    path: pathlib.Path, config: CompressionConfig, directory: pathlib.Path | None = None
+) -> pathlib.Path | None:
+    """Compress a file into a temporary file in ``directory``, reading it in chunks.
+
+    Returns None, leaving no file behind, when compression doesn't save at least ``config.min_savings`` of the size.
+    """
+    stream = compressor(config.encoding, config.level)
+    fd, name = tempfile.mkstemp(suffix=SUFFIXES[config.encoding], dir=directory)
+    output = pathlib.Path(name)
+    try:
+        with path.open("rb") as src, os.fdopen(fd, "wb") as dst:
+            while chunk := src.read(READ_SIZE):
+                dst.write(stream.compress(chunk))
+            dst.write(stream.flush())
+            original, compressed = src.tell(), dst.tell()
+    except BaseException:
+        output.unlink()
+        raise
+    if compressed > original * (1 - config.min_savings):
+        output.unlink()
+        return None
+    return output
+
+
+def prepare(
+    item: tuple[str, pathlib.Path, str | None], config: CompressionConfig, directory: pathlib.Path | None = None
+) -> tuple[str, pathlib.Path, str | None, pathlib.Path | None]:
+    """Pipeline stage: add the compressed copy of a detected file to its item, or None when it isn't compressed.
+
+    This runs in worker processes, so it only takes and returns picklable values.
+    """
+    name, path, content_type = item
+    if content_type is None or not path.is_file() or not should_compress(content_type, path.stat().st_size, config):
+        return name, path, content_type, None
+    return name, path, content_type, compress_file(path, config, directory)
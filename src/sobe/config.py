@@ -1,37 +1,178 @@
 """Everything related to user configuration file."""
 
+import datetime
+import email.utils
 import tomllib
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any, NamedTuple, Self
 
 from platformdirs import PlatformDirs
 
+SIZE_UNITS = {"KB": 1024, "MB": 1024**2, "GB": 1024**3}
+TRANSFER_SIZE_KEYS = ("multipart_threshold", "multipart_chunksize", "io_chunksize")
+TRANSFER_KEYS = (  # the arguments of boto3's TransferConfig
+    *TRANSFER_SIZE_KEYS,
+    "max_concurrency",
+    "num_download_attempts",
+    "max_io_queue",
+    "use_threads",
+    "max_bandwidth",
+    "preferred_transfer_client",
+)
+COMPRESSION_ENCODINGS = ("gzip", "br")
+RETRY_MODES = ("legacy", "standard", "adaptive")
+CHECKSUM_ALGORITHMS = ("CRC32", "CRC32C", "SHA1", "SHA256")  # as S3 names them
+STORAGE_CLASSES = (
+    "STANDARD",
+    "REDUCED_REDUNDANCY",
+    "STANDARD_IA",
+    "ONEZONE_IA",
+    "INTELLIGENT_TIERING",
+    "GLACIER",
+    "DEEP_ARCHIVE",
+    "GLACIER_IR",
+    "EXPRESS_ONEZONE",
+)
+
+
+def parse_size(value: int | str) -> int:
+    """Convert a byte count like ``8388608`` or ``"8MB"`` to an integer number of bytes."""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().upper().removesuffix("IB").removesuffix("B")
+    multiplier = SIZE_UNITS.get(f"{text[-1:]}B", 1)
+    if multiplier != 1:
+        text = text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        raise ValueError(f"invalid size {value!r}: expected a number of bytes, or one with KB, MB or GB") from None
+
+
+def size_setting(key: str, value: int | str) -> int:
+    """Parse a size from the config file, naming the setting if it isn't one."""
+    try:
+        return parse_size(value)
+    except ValueError:
+        raise ConfigError(key, f'must be a number of bytes or a size like "8MB", not {value!r}') from None
+
 
 class AWSConfig(NamedTuple):
     bucket: str
     cloudfront: str
     session: dict[str, Any]
     service: dict[str, Any]
+    transfer: Mapping[str, Any] = MappingProxyType({})
+    invalidation_timeout: float = 1800
+    retry_mode: str | None = None  # None leaves it to botocore, and the AWS config file
+    max_attempts: int | None = None
+    checksum_algorithm: str | None = None  # None keeps botocore's default, CRC32
 
     @classmethod
     def from_dict(cls, raw: dict[str, Any]) -> Self:
+        transfer = dict(raw.get("transfer", {}))
+        for key in transfer:
+            if key not in TRANSFER_KEYS:
+                raise ConfigError(f"aws.transfer.{key}", f"is not a setting; use one of: {', '.join(TRANSFER_KEYS)}")
+        max_concurrency = transfer.get("max_concurrency", 1)
+        if isinstance(max_concurrency, bool) or not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise ConfigError(
+                "aws.transfer.max_concurrency", f"must be a whole number of at least 1, not {max_concurrency!r}"
+            )
+        for key in TRANSFER_SIZE_KEYS:
+            if key in transfer and transfer[key] != "auto":
+                transfer[key] = size_setting(f"aws.transfer.{key}", transfer[key])
+        retry_mode = raw.get("retry_mode")
+        if retry_mode is not None and retry_mode not in RETRY_MODES:
+            raise ConfigError("aws.retry_mode", f"must be one of: {', '.join(RETRY_MODES)}")
+        max_attempts = raw.get("max_attempts")
+        if max_attempts is not None and max_attempts < 1:
+            raise ConfigError("aws.max_attempts", "must be at least 1")
+        checksum_algorithm = raw.get("checksum_algorithm")
+        if checksum_algorithm is not None and checksum_algorithm not in CHECKSUM_ALGORITHMS:
+            raise ConfigError("aws.checksum_algorithm", f"must be one of: {', '.join(CHECKSUM_ALGORITHMS)}")
         return cls(
             bucket=raw.get("bucket", "example-bucket"),
             cloudfront=raw.get("cloudfront", "E1111111111111"),
             session=raw.get("session", {}),
             service=raw.get("service", {}),
+            transfer=transfer,
+            invalidation_timeout=raw.get("invalidation_timeout", 1800),
+            retry_mode=retry_mode,
+            max_attempts=max_attempts,
+            checksum_algorithm=checksum_algorithm,
+        )
+
+
+class CompressionConfig(NamedTuple):
+    types: tuple[str, ...] = ()
+    encoding: str = "gzip"
+    level: int | None = None
+    min_size: int = 1024
+    min_savings: float = 0.1
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> Self:
+        encoding = raw.get("encoding", "gzip")
+        if encoding not in COMPRESSION_ENCODINGS:
+            raise ConfigError("compress.encoding", f"must be one of: {', '.join(COMPRESSION_ENCODINGS)}")
+        return cls(
+            types=tuple(raw.get("types", ())),
+            encoding=encoding,
+            level=raw.get("level"),
+            min_size=size_setting("compress.min_size", raw.get("min_size", 1024)),
+            min_savings=raw.get("min_savings", 0.1),
         )
 
 
+class RuleConfig(NamedTuple):
+    cache_control: str | None = None
+    expires: int | datetime.datetime | None = None  # seconds after each upload, or a fixed time
+    storage_class: str | None = None
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any], pattern: str = "") -> Self:
+        unknown = set(raw) - set(cls._fields)
+        if unknown:
+            raise ConfigError(f"rules.{pattern!r}", f"has unknown settings: {', '.join(sorted(unknown))}")
+        expires = raw.get("expires")
+        if isinstance(expires, str):
+            try:
+                expires = email.utils.parsedate_to_datetime(expires)
+            except ValueError:
+                raise ConfigError(f"rules.{pattern!r}.expires", f"is not an HTTP date: {expires}") from None
+        elif isinstance(expires, datetime.datetime):
+            if expires.tzinfo is None:
+                expires = expires.replace(tzinfo=datetime.UTC)  # TOML local date-times are taken as UTC
+        elif expires is not None and (isinstance(expires, bool) or not isinstance(expires, int) or expires < 0):
+            raise ConfigError(f"rules.{pattern!r}.expires", "must be a number of seconds, a date-time or an HTTP date")
+        storage_class = raw.get("storage_class")
+        if storage_class is not None and storage_class not in STORAGE_CLASSES:
+            raise ConfigError(f"rules.{pattern!r}.storage_class", f"must be one of: {', '.join(STORAGE_CLASSES)}")
+        return cls(cache_control=raw.get("cache_control"), expires=expires, storage_class=storage_class)
+
+
 class Config(NamedTuple):
     url: str
     aws: AWSConfig
+    jobs: int = 4
+    confirm_delete: int = 1000
+    content_types: Mapping[str, str] = MappingProxyType({})
+    compress: CompressionConfig = CompressionConfig()
+    rules: Mapping[str, RuleConfig] = MappingProxyType({})  # in the order of the file, which is the order they apply in
 
     @classmethod
     def from_dict(cls, raw: dict[str, Any]) -> Self:
         return cls(
             url=raw.get("url", "https://example.com/"),
             aws=AWSConfig.from_dict(raw.get("aws", {})),
+            jobs=raw.get("jobs", 4),
+            confirm_delete=raw.get("confirm_delete", 1000),
+            content_types=raw.get("content_types", {}),
+            compress=CompressionConfig.from_dict(raw.get("compress", {})),
+            rules={pattern: RuleConfig.from_dict(rule, pattern) for pattern, rule in raw.get("rules", {}).items()},
         )
 
 
@@ -42,14 +183,42 @@ class MustEditConfig(Exception):
         self.path = path
 
 
+class ConfigError(Exception):
+    """A setting of the config file has a value this tool can't use."""
+
+    def __init__(self, key: str, problem: str, path: Path | None = None):
+        super().__init__(key, problem)
+        self.key = key
+        self.problem = problem
+        self.path = path
+
+    def __str__(self) -> str:
+        where = f"{self.path}: " if self.path is not None else ""
+        return f"{where}{self.key} {self.problem}"
+
+
 DEFAULT_TEMPLATE = """
 # sobe configuration
 
 url = "https://example.com/"
 
+# Number of files transferred at the same time (overridden by --jobs).
+# jobs = 4
+
+# Deleting more files than this by --recursive or glob asks for confirmation first (overridden by --yes).
+# confirm_delete = 1000
+
 [aws]
 bucket = "example-bucket"
 cloudfront = "E1111111111111"
+# Seconds to wait for a cache invalidation before giving up (it keeps running on AWS).
+# invalidation_timeout = 1800
+# How throttled or failed requests are retried. "adaptive" also slows down requests on this side
+# when S3 answers 503 SlowDown. Attempts include the first one.
+# retry_mode = "standard"
+# max_attempts = 5
+# Checksum sent with every upload, and verified by S3. "CRC32C" needs the awscrt package.
+# checksum_algorithm = "CRC32"  # or "CRC32C", "SHA1", "SHA256"
 
 [aws.session]
 # If you already have AWS CLI set up, don't fill keys here.
@@ -60,6 +229,32 @@ cloudfront = "E1111111111111"
 
 [aws.service]
 # verify = true
+
+[aws.transfer]
+# Sizes are bytes or strings like "64MB". With "auto", chunk size grows with the file size.
+# multipart_threshold = "8MB"
+# multipart_chunksize = "auto"
+# max_concurrency = 10
+# use_threads = true
+
+[content_types]
+# Content types by file extension, overriding the detected ones.
+# ".md" = "text/markdown; charset=utf-8"
+
+[compress]
+# Content types compressed before upload, served with a Content-Encoding header. Off when empty.
+# types = ["text/*", "application/javascript", "application/json", "image/svg+xml"]
+# encoding = "gzip"  # or "br", which needs the brotli package
+# min_size = "1KB"
+# min_savings = 0.1
+
+[rules]
+# Headers and storage class of uploads, by glob of the remote name or by content type.
+# Every matching rule applies, and later rules override earlier ones.
+# "text/html" = { cache_control = "public, max-age=60" }
+# "assets/*" = { cache_control = "public, max-age=31536000, immutable" }
+# "*.pdf" = { expires = 86400 }  # seconds after the upload, or a date-time
+# "*.iso" = { storage_class = "STANDARD_IA" }
 """
 
 
@@ -69,7 +264,11 @@ def load_config() -> Config:
         with path.open("rb") as f:
             payload = tomllib.load(f)
             if payload.get("aws", {}).get("bucket", "example-bucket") != "example-bucket":
-                return Config.from_dict(payload)
+                try:
+                    return Config.from_dict(payload)
+                except ConfigError as err:
+                    err.path = path
+                    raise
 
     # create default file and exit for user to customize
     path.parent.mkdir(parents=True, exist_ok=True)
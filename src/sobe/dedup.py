@@ -0,0 +1,57 @@
+"""Content-addressed deduplication: remember where each file's bytes were uploaded, to copy instead of resending."""
+
+import json
+import os
+import pathlib
+import threading
+
+from platformdirs import PlatformDirs
+
+METADATA_KEY = "sha256"  # user metadata that records the digest on each object uploaded with dedup
+
+
+class HashIndex:
+    """Maps SHA-256 digests to the key of an object that held those bytes when it was uploaded.
+
+    Entries can go stale when objects are deleted or replaced, so they are only hints, to be checked remotely.
+    The index is kept in memory and written back by :meth:`save`.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._changed = False
+        try:
+            self._keys: dict[str, str] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self._keys = {}
+
+    @classmethod
+    def for_bucket(cls, bucket: str) -> "HashIndex":
+        """Open the index of a bucket, in the user cache directory."""
+        return cls(PlatformDirs("sobe").user_cache_path / "dedup" / f"{bucket}.json")
+
+    def get(self, digest: str) -> str | None:
+        return self._keys.get(digest)
+
+    def add(self, digest: str, key: str) -> None:
+        with self._lock:
+            if self._keys.get(digest) != key:
+                self._keys[digest] = key
+                self._changed = True
+
+    def discard(self, digest: str) -> None:
+        with self._lock:
+            if self._keys.pop(digest, None) is not None:
+                self._changed = True
+
+    def save(self) -> None:
+        """Write the index if it changed, replacing the old file atomically."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self._keys, sort_keys=True))
+            os.replace(temporary, self.path)
+            self._changed = False
@@ -0,0 +1,31 @@
+"""Lists of files to transfer, as read by ``--from-file``."""
+
+import os
+from collections.abc import Iterator
+from typing import BinaryIO
+
+READ_SIZE = 64 * 1024
+
+
+def read_entries(stream: BinaryIO, *, null: bool = False) -> Iterator[tuple[str, str]]:
+    """Yield ``(local_path, remote_name)`` for each entry of a list, reading only as far as entries are consumed.
+
+    Entries end with a newline, or with a NUL byte for ``null``. An entry may map a local path to a remote name,
+    separated by a tab; without one, the remote name is empty. Empty entries are skipped. Entries are decoded as
+    file names are, so paths that aren't valid UTF-8 can be listed too.
+    """
+    records = split(stream, b"\0") if null else (line.rstrip(b"\r\n") for line in stream)
+    for record in records:
+        if record:
+            local, _, remote = record.partition(b"\t")
+            yield os.fsdecode(local), os.fsdecode(remote)
+
+
+def split(stream: BinaryIO, separator: bytes) -> Iterator[bytes]:
+    """Split a stream on a separator, holding at most one read and one partial record in memory."""
+    pending = b""
+    while chunk := stream.read(READ_SIZE):
+        *records, pending = (pending + chunk).split(separator)
+        yield from records
+    if pending:
+        yield pending
@@ -1,20 +1,39 @@
 """Command-line interface entry point: input validation and output to user."""
 
 import argparse
+import collections
 import datetime
+import fnmatch
 import functools
-import importlib.metadata
+import glob
+import itertools
+import os
 import pathlib
-import warnings
+import sys
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING
 
-import urllib3.exceptions
+from sobe import compress, filelist, sync, walk
+from sobe.config import CompressionConfig, Config, ConfigError, MustEditConfig, load_config, parse_size
+from sobe.mime import ContentTypes
+from sobe.pool import ordered_map
+from sobe.rules import Rules
 
-from sobe.aws import AWS
-from sobe.config import MustEditConfig, load_config
+if TYPE_CHECKING:
+    # boto3 takes a few hundred milliseconds to import, so sobe.aws is only loaded when it's going to be used.
+    from sobe.aws import AWS
+    from sobe.progress import Progress
+
+STDIN = "-"  # file argument that uploads standard input
+UNTOUCHED = ("didn't exist.", "not found.", "is a directory.")  # statuses of files that changed nothing
+SETTLE = 2.0  # seconds without writes before --watch uploads a file
+STALE_UPLOAD = datetime.timedelta(days=1)  # --cleanup-incomplete leaves younger uploads, which may still be running
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+GLOB_CHARACTERS = "*?["
 
 write = functools.partial(print, flush=True, end="")
 print = functools.partial(print, flush=True)  # type: ignore
-warnings.filterwarnings("ignore", category=urllib3.exceptions.InsecureRequestWarning)
 
 
 def main() -> None:
@@ -24,49 +43,576 @@ def main() -> None:
         print("Created config file at the path below. You must edit it before use.")
         print(err.path)
         raise SystemExit(1) from err
+    except ConfigError as err:
+        print(f"Invalid config: {err}")
+        raise SystemExit(1) from err
 
     args = parse_args()
-    aws = AWS(config.aws)
+    jobs = args.jobs or config.jobs
+
+    from sobe.aws import AWS
+
+    hash_index = None
+    if args.dedup:
+        from sobe.dedup import HashIndex
+
+        hash_index = HashIndex.for_bucket(config.aws.bucket)
+    stats = None
+    if args.stats or args.stats_json:
+        from sobe.stats import RequestStats
+
+        stats = RequestStats()
+    limiter = None
+    if args.limit_rate:
+        from sobe.throttle import RateLimiter
+
+        limiter = RateLimiter(args.limit_rate)
+    aws = AWS(
+        config.aws,
+        jobs=jobs,
+        content_types=ContentTypes(config.content_types),
+        hash_index=hash_index,
+        stats=stats,
+        limiter=limiter,
+        rules=Rules(config.rules),
+    )
+
+    try:
+        run(aws, args, config, jobs)
+    finally:
+        if hash_index:
+            hash_index.save()  # keep what was learned, even from an interrupted run
+        if stats:
+            if args.stats:
+                print(stats.report())
+            if args.stats_json:
+                stats.write_json(args.stats_json)
+
 
+def run(aws: "AWS", args: argparse.Namespace, config: Config, jobs: int) -> None:
+    """Carry out what the command line asked for."""
     if args.policy:
         print(aws.generate_needed_permissions())
         return
 
+    if args.invalidation_status:
+        print(f"{args.invalidation_status}: {aws.invalidation_status(args.invalidation_status)}")
+        return
+
     if args.list:
-        files = aws.list(args.prefix)
-        if not files:
-            print(f"No files under {config.url}{args.prefix}")
-            return
-        for name in files:
+        found = False
+        for name in aws.list(args.prefix):
             print(f"{config.url}{args.prefix}{name}")
+            found = True
+        if not found:
+            print(f"No files under {config.url}{args.prefix}")
         return
 
-    for path in args.paths:
-        write(f"{config.url}{args.prefix}{args.remote_name or path.name} ...")
-        if args.delete:
-            existed = aws.delete(args.prefix, path.name)
-            print("deleted." if existed else "didn't exist.")
-        else:
-            aws.upload(args.prefix, path, args.remote_name, content_type=args.content_type)
-            print("ok.")
+    if args.cleanup_incomplete:
+        found = False
+        cutoff = datetime.datetime.now(datetime.UTC) - args.older_than
+        for key in aws.abort_incomplete(args.prefix, started_before=cutoff):
+            print(f"{config.url}{key} ...aborted.")
+            found = True
+        if not found:
+            print(f"No incomplete uploads under {config.url}{args.prefix} started before {cutoff:%Y-%m-%d %H:%M} UTC")
+        return
+
+    from sobe.progress import Progress
+
+    progress = Progress.for_terminal(enabled=not args.no_progress)
+    if args.watch:
+        watch_directory(aws, args, config.url, jobs, progress=progress)
+        return
+
+    touched: list[str] | None = None  # without any transfer, --invalidate clears everything
+    failed = 0
+    if args.sync:
+        touched = sync_directory(aws, args, config.url, jobs, progress=progress)
+    elif args.copy or args.move:
+        touched, failed = copy_objects(aws, args, config.url, jobs)
+    elif args.get:
+        failed = download_files(aws, args, config.url, jobs, progress=progress)
+    elif args.remote_delete:
+        touched = delete_matching(aws, args, config.url, jobs, confirm_over=config.confirm_delete)
+    elif args.paths or args.from_file:
+        touched, failed = transfer_files(aws, args, config.url, jobs, compression=config.compress, progress=progress)
     if args.invalidate:
-        write("Clearing cache...")
-        for _ in aws.invalidate_cache():
+        invalidate(aws, touched, wait=not args.no_wait)
+    if failed:
+        raise SystemExit(1)
+
+
+def invalidate(aws: "AWS", touched: list[str] | None, *, wait: bool) -> None:
+    """Invalidate the touched keys (or everything, for None), optionally waiting until CloudFront is done."""
+    if touched == []:
+        print("Nothing changed, cache left as is.")
+        return
+    if not wait:
+        invalidation = aws.create_invalidation(touched)
+        print(f"Cache invalidation {invalidation} started. Check it with: sobe --invalidation-status {invalidation}")
+        return
+    from sobe.aws import InvalidationTimeout
+
+    write("Clearing cache...")
+    try:
+        for _ in aws.invalidate_cache(touched):
             write(".")
-        print("complete.")
+    except InvalidationTimeout as err:
+        print("timed out.")
+        print(f"It is still running on AWS. Check it with: sobe --invalidation-status {err.invalidation}")
+        raise SystemExit(1) from err
+    print("complete.")
+
+
+def transfer_files(
+    aws: "AWS",
+    args: argparse.Namespace,
+    url: str,
+    jobs: int,
+    *,
+    compression: CompressionConfig,
+    progress: "Progress",
+) -> tuple[list[str], int]:
+    """Upload or delete each file given, reporting in input order.
+
+    Returns the keys changed, and the number of files from a ``--from-file`` list that weren't there to upload.
+
+    With ``compression`` types configured, matching files are compressed in a process pool before their upload.
+    Uploads report to ``progress``, shown after the line of the file being waited for.
+    """
+
+    def detect(item: tuple[str, pathlib.Path]) -> tuple[str, pathlib.Path, str | None]:
+        name, path = item
+        if args.content_type or args.delete or not path.is_file():
+            return name, path, args.content_type
+        return name, path, aws.content_types.guess(path)
+
+    def transfer(item: tuple[str, pathlib.Path, str | None, pathlib.Path | None]) -> str:
+        name, path, content_type, compressed = item
+        if args.delete:
+            existed = aws.delete(args.prefix, name)
+            return "deleted." if existed else "didn't exist."
+        if args.from_file and not path.is_file():  # listed files are only checked as they come up
+            if not path.exists():
+                return "not found."
+            if path.is_dir():
+                return "is a directory."
+        key = f"{args.prefix}{name}"
+        upload_path = compressed or path
+        regular = args.files != [STDIN] and upload_path.is_file()
+        callback = progress.track(key, upload_path.stat().st_size if regular else None)
+        try:
+            return upload(name, path, content_type, compressed, callback)
+        finally:
+            progress.finish(key)
+
+    def upload(
+        name: str,
+        path: pathlib.Path,
+        content_type: str | None,
+        compressed: pathlib.Path | None,
+        callback: Callable[[int], None] | None,
+    ) -> str:
+        if args.files == [STDIN]:
+            aws.upload_stream(args.prefix, sys.stdin.buffer, name, content_type=content_type, progress=callback)
+        elif compressed:
+            try:
+                source = aws.upload(
+                    args.prefix,
+                    compressed,
+                    name,
+                    content_type=content_type,
+                    content_encoding=compression.encoding,
+                    dedup=args.dedup,
+                    progress=callback,
+                )
+            finally:
+                compressed.unlink()
+            return f"ok (copy of {source})." if source else f"ok ({compression.encoding})."
+        else:
+            source = aws.upload(args.prefix, path, name, content_type=content_type, dedup=args.dedup, progress=callback)
+            if source:
+                return f"ok (copy of {source})."
+        return "ok."
+
+    with tempfile.TemporaryDirectory(prefix="sobe-") as scratch:  # holds compressed copies until uploaded
+        if args.delete and len(args.paths) > 1:
+            names = [path.name for path in args.paths]
+            existed = aws.delete_many(args.prefix, names, jobs=jobs)
+            items: Iterable[tuple[str, pathlib.Path]] = zip(names, args.paths)
+            results = iter("deleted." if existed[name] else "didn't exist." for name in names)
+        else:
+            # The pool reads ahead of the output loop; tee only buffers the items in between.
+            # Content types are detected in their own pool, ahead of the uploads that need them.
+            items, pending = itertools.tee(source_files(args))
+            detected = ordered_map(detect, pending, jobs)
+            if compression.types and not args.delete and args.files != [STDIN]:
+                # Compression is CPU-bound, so it gets processes rather than threads.
+                prepare = functools.partial(compress.prepare, config=compression, directory=pathlib.Path(scratch))
+                prepared = ordered_map(prepare, detected, jobs, processes=True)
+            else:
+                prepared = ((*item, None) for item in detected)
+            results = ordered_map(transfer, prepared, jobs)
+        totals: collections.Counter[str] = collections.Counter()
+        touched = []
+        for name, _ in items:
+            key = f"{args.prefix}{name}"
+            with progress.paused():
+                write(f"{url}{key} ...")
+                progress.begin_line(key, f"{url}{key} ...")
+            status = next(results)
+            with progress.paused():
+                print(status)
+            totals[status] += 1
+            if status not in UNTOUCHED:
+                touched.append(key)
+    if totals.total() > 1:
+        print(f"{totals.total()} files: {', '.join(f'{n} {status[:-1]}' for status, n in totals.items())}.")
+    return touched, totals["not found."] + totals["is a directory."]
+
+
+def source_files(args: argparse.Namespace) -> Iterator[tuple[str, pathlib.Path]]:
+    """Yield ``(remote_name, path)`` for each file to transfer, walking directories lazily with ``--recursive``.
+
+    As with rsync, a directory's own name becomes part of the remote names unless it is given with a trailing slash.
+    Files come from the command line, or from the ``--from-file`` list, where a remote name can be given for each.
+    """
+    entries = listed_files(args) if args.from_file else ((arg, args.remote_name or "") for arg in args.files)
+    for arg, remote_name in entries:
+        path = pathlib.Path(arg)
+        if args.recursive and path.is_dir():
+            if remote_name:
+                base = f"{remote_name.rstrip('/')}/"
+            else:
+                base = "" if arg.endswith(("/", os.sep)) or not path.name else f"{path.name}/"
+            for name, file in walk.walk(path, include=args.include, exclude=args.exclude):
+                yield f"{base}{name}", file
+        else:
+            yield remote_name or path.name, path
+
+
+def listed_files(args: argparse.Namespace) -> Iterator[tuple[str, str]]:
+    """Yield ``(local_path, remote_name)`` from the ``--from-file`` list, as it's read."""
+    if args.from_file == STDIN:
+        yield from filelist.read_entries(sys.stdin.buffer, null=args.null)
+        return
+    with open(args.from_file, "rb") as stream:
+        yield from filelist.read_entries(stream, null=args.null)
+
+
+def sync_directory(aws: "AWS", args: argparse.Namespace, url: str, jobs: int, *, progress: "Progress") -> list[str]:
+    """Upload new or changed files under ``args.sync``; with ``--delete``, also remove remote files gone locally.
+
+    Returns the keys changed. Uploads in flight show in ``progress`` until they are done and listed.
+    """
+    remote = {obj.key[len(args.prefix) :]: obj for obj in aws.list_objects(args.prefix)}
+
+    def upload_if_changed(item: tuple[str, pathlib.Path]) -> tuple[str, str]:
+        name, path = item
+        transfer_config = aws.transfer_config(path.stat().st_size)
+        threshold, chunksize = transfer_config.multipart_threshold, transfer_config.multipart_chunksize
+        if sync.is_unchanged(path, remote.get(name), threshold, chunksize):
+            return name, "unchanged"
+        key = f"{args.prefix}{name}"
+        try:
+            aws.upload(args.prefix, path, name, dedup=args.dedup, progress=progress.track(key, path.stat().st_size))
+        finally:
+            progress.finish(key)
+        return name, "uploaded"
+
+    totals = {"uploaded": 0, "unchanged": 0, "deleted": 0}
+    touched = []
+    files = walk.walk(args.sync, include=args.include, exclude=args.exclude)
+    for name, status in ordered_map(upload_if_changed, files, jobs):
+        remote.pop(name, None)
+        totals[status] += 1
+        if status == "uploaded":
+            with progress.paused():
+                print(f"{url}{args.prefix}{name} ...ok.")
+            touched.append(f"{args.prefix}{name}")
+    if args.delete:
+        gone = [
+            f"{args.prefix}{name}"
+            for name in sorted(remote)
+            if name and not name.endswith("/") and walk.selects(name, include=args.include, exclude=args.exclude)
+        ]
+        totals["deleted"] = aws.delete_keys(gone, jobs=jobs)
+        for key in gone:
+            print(f"{url}{key} ...deleted.")
+        touched.extend(gone)
+    print(f"Sync: {', '.join(f'{n} {status}' for status, n in totals.items())}.")
+    return touched
+
+
+def copy_objects(aws: "AWS", args: argparse.Namespace, url: str, jobs: int) -> tuple[list[str], int]:
+    """Copy or move objects server-side from ``SRC`` to ``DST``, both relative to the prefix, reporting in order.
+
+    A ``DST`` ending with a slash keeps the source's name. With ``--recursive``, everything under ``SRC`` is
+    copied under ``DST``, as it's listed, ``jobs`` at a time. Returns the keys changed, both sources and
+    destinations for a move, and the number of sources that weren't found.
+    """
+    source, destination = args.move or args.copy
+    done = "moved." if args.move else "copied."
+    if args.recursive:
+        base, target = f"{args.prefix}{source.rstrip('/')}/", f"{args.prefix}{destination.rstrip('/')}/"
+        names = (key[len(base) :] for key in aws.list_keys(base))
+        selected = (name for name in names if name and walk.selects(name, include=args.include, exclude=args.exclude))
+        pairs: Iterator[tuple[str, str]] = ((f"{base}{name}", f"{target}{name}") for name in selected)
+    else:
+        pairs = iter([(f"{args.prefix}{source}", f"{args.prefix}{copy_destination(source, destination)}")])
+    pairs, pending = itertools.tee(pairs)  # the pool reads ahead of the output loop
+    results = ordered_map(lambda pair: aws.copy(*pair, move=bool(args.move)), pending, jobs)
+    touched = []
+    totals: collections.Counter[str] = collections.Counter()
+    for (from_key, to_key), copied in zip(pairs, results):
+        status = done if copied else "not found."
+        print(f"{url}{from_key} -> {url}{to_key} ...{status}")
+        totals[status] += 1
+        if copied:
+            touched.extend((from_key, to_key) if args.move else (to_key,))
+    if args.recursive and not totals:
+        print(f"No files under {url}{args.prefix}{source.rstrip('/')}/")
+    elif totals.total() > 1:
+        print(f"{totals.total()} files: {', '.join(f'{n} {status[:-1]}' for status, n in totals.items())}.")
+    return touched, totals["not found."]
+
+
+def copy_destination(source: str, destination: str) -> str:
+    """The name a single file is copied to: a destination ending with a slash keeps the source's name."""
+    return destination + source.rpartition("/")[2] if destination.endswith("/") else destination
+
+
+def download_files(aws: "AWS", args: argparse.Namespace, url: str, jobs: int, *, progress: "Progress") -> int:
+    """Download each named file under the prefix into the current directory, keeping its base name.
+
+    Files are fetched one after the other, each in ranges requested ``jobs`` at a time. Returns the number of
+    files that failed: those not found, and those that didn't match their ETag.
+    """
+    from sobe.aws import ETagMismatch
+
+    totals: collections.Counter[str] = collections.Counter()
+    for name in args.files:
+        key = f"{args.prefix}{name}"
+        with progress.paused():
+            write(f"{url}{key} ...")
+            progress.begin_line(key, f"{url}{key} ...")
+        try:
+            found = aws.download(
+                key, pathlib.Path(name.rpartition("/")[2]), jobs=jobs, progress=progress.track(key, None)
+            )
+            status = "ok." if found else "not found."
+        except ETagMismatch:
+            status = "ETag mismatch."
+        finally:
+            progress.finish(key)
+        with progress.paused():
+            print(status)
+        totals[status] += 1
+    if totals.total() > 1:
+        print(f"{totals.total()} files: {', '.join(f'{n} {status[:-1]}' for status, n in totals.items())}.")
+    return totals.total() - totals["ok."]
+
+
+def delete_matching(aws: "AWS", args: argparse.Namespace, url: str, jobs: int, *, confirm_over: int) -> list[str]:
+    """Delete the remote files selected by ``--recursive`` or globs, streaming the listing into batched deletes.
+
+    Returns the keys deleted. With ``--dry-run``, only lists them. When more than ``confirm_over`` files match,
+    nothing is deleted without ``--yes`` or a confirmation on the terminal, asked before the listing goes on.
+    """
+    keys = matching_keys(aws, args)
+    if args.dry_run:
+        count = 0
+        for key in keys:
+            print(f"{url}{key} ...would be deleted.")
+            count += 1
+        print(f"{count} {'file' if count == 1 else 'files'} would be deleted.")
+        return []
+    first = list(itertools.islice(keys, confirm_over + 1))
+    if len(first) > confirm_over and not args.yes:
+        question = f"More than {confirm_over:,} files match under {url}{args.prefix}. Delete them all?"
+        if not confirm(question):
+            print("Nothing deleted.")
+            raise SystemExit(1)
+    touched: list[str] = []
+    for batch in aws.delete_batches(itertools.chain(first, keys), jobs=jobs):
+        for key in batch:
+            print(f"{url}{key} ...deleted.")
+        touched.extend(batch)
+    if touched:
+        print(f"{len(touched)} {'file' if len(touched) == 1 else 'files'} deleted.")
+    else:
+        print(f"No files match under {url}{args.prefix}")
+    return touched
+
+
+def matching_keys(aws: "AWS", args: argparse.Namespace) -> Iterator[str]:
+    """Yield the keys under ``args.prefix`` that a ``--recursive`` or glob delete selects, as they're listed.
+
+    Each file argument is a glob matched against whole names relative to the prefix. With ``--recursive``, a
+    match also selects everything under it, and no arguments select everything; ``--include`` and ``--exclude``
+    filter the result. An argument that is the exact name of a file (or with ``--recursive``, of a directory) is
+    taken literally, so ``photo[1].jpg`` deletes that file and not ``photo1.jpg``. Listings start from the literal
+    beginning of the globs, so ``logs/2021-*`` lists only ``logs/2021-``, and never overlap.
+    """
+    patterns = []
+    for pattern in (arg.rstrip("/") for arg in args.files):
+        literal = any(c in pattern for c in GLOB_CHARACTERS) and exists_remotely(aws, args, pattern)
+        patterns.append(glob.escape(pattern) if literal else pattern)
+    starts = sorted({literal_prefix(pattern) for pattern in patterns} if patterns else {""})
+    # A listing covers another that starts within it, unless, without --recursive, that one is in a subdirectory.
+    starts = [
+        start
+        for i, start in enumerate(starts)
+        if not any(
+            start.startswith(other) and (args.recursive or "/" not in start[len(other) :]) for other in starts[:i]
+        )
+    ]
+    for start in starts:
+        for key in aws.list_keys(f"{args.prefix}{start}", recursive=args.recursive):
+            name = key[len(args.prefix) :]
+            if not name or not walk.selects(name, include=args.include, exclude=args.exclude):
+                continue
+            parts = name.split("/")
+            paths = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)] if args.recursive else [name]
+            if not patterns or any(fnmatch.fnmatchcase(path, p) for path in paths for p in patterns):
+                yield key
+
+
+def exists_remotely(aws: "AWS", args: argparse.Namespace, name: str) -> bool:
+    """Whether a file has exactly this name under the prefix, or with ``--recursive``, a directory does."""
+    key = f"{args.prefix}{name}"
+    if next(aws.list_keys(key, recursive=False), None) == key:  # the name itself is listed first
+        return True
+    return args.recursive and next(aws.list_keys(f"{key}/", recursive=True), None) is not None
+
+
+def literal_prefix(pattern: str) -> str:
+    """The beginning of a glob, up to its first special character."""
+    end = min((i for i, c in enumerate(pattern) if c in GLOB_CHARACTERS), default=len(pattern))
+    return pattern[:end]
+
+
+def confirm(question: str) -> bool:
+    """Ask a yes or no question on the terminal. Without one, the answer is no."""
+    if not sys.stdin.isatty():
+        print(f"{question} Not deleting without --yes, as there's no terminal to ask on.")
+        return False
+    try:
+        return input(f"{question} [y/N] ").strip().lower() in ("y", "yes")
+    except EOFError:
+        return False
+
+
+def watch_directory(aws: "AWS", args: argparse.Namespace, url: str, jobs: int, *, progress: "Progress") -> None:
+    """Upload files written under ``args.watch`` until interrupted, keeping one AWS session throughout.
+
+    A file is uploaded once it has gone ``args.settle`` seconds without changing. With ``--invalidate``, the keys
+    uploaded are invalidated together once the whole directory has been quiet for as long. A file that fails to
+    upload is reported and left out, so its next change tries again, and watching goes on.
+    """
+    from sobe.aws import TRANSFER_ERRORS
+    from sobe.watch import Debouncer, open_watcher, stat_key
+
+    uploaded = {
+        name: stat_key(path) for name, path in walk.walk(args.watch, include=args.include, exclude=args.exclude)
+    }
+    debouncer = Debouncer(args.settle)
+    touched: list[str] = []
+
+    def upload(name: str) -> tuple[str, str] | None:
+        """Upload a settled file, returning its key and status, or None if there was nothing to upload."""
+        path = args.watch / name
+        current = stat_key(path)
+        if current is None or uploaded.get(name) == current:
+            return None  # deleted, or written with the same contents as what is already uploaded
+        key = f"{args.prefix}{name}"
+        try:
+            aws.upload(args.prefix, path, name, dedup=args.dedup, progress=progress.track(key, current[0]))
+        except TRANSFER_ERRORS as err:
+            return key, f"failed: {err}"
+        finally:
+            progress.finish(key)
+        uploaded[name] = current
+        return key, "ok."
+
+    with open_watcher(args.watch, include=args.include, exclude=args.exclude) as watcher:
+        print(f"Watching {args.watch} for changes ({watcher.method}). Press Ctrl+C to stop.")
+        try:
+            while True:
+                debouncer.touch(watcher.wait(debouncer.timeout()))
+                for result in ordered_map(upload, debouncer.settled(), jobs):
+                    if result:
+                        key, status = result
+                        with progress.paused():
+                            print(f"{url}{key} ...{status}")
+                        if status == "ok.":
+                            touched.append(key)
+                if touched and debouncer.quiet():
+                    if args.invalidate:
+                        invalidate(aws, touched, wait=not args.no_wait)
+                    touched = []
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+            if touched and args.invalidate:
+                invalidate(aws, touched, wait=not args.no_wait)
 
 
 def parse_args(argv=None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Upload files to your AWS drop box.")
-    parser.add_argument("--version", action="version", version=f"sobe {get_version()}")
+    parser.add_argument("--version", action=VersionAction)
     parser.add_argument("-y", "--year", type=str, help="set remote directory (usually a year)")
     parser.add_argument("-t", "--content-type", type=str, help="override detected MIME type for uploaded files")
     parser.add_argument("-l", "--list", action="store_true", help="list all files in the year")
     parser.add_argument("-d", "--delete", action="store_true", help="delete instead of upload")
+    parser.add_argument("-g", "--get", action="store_true", help="download the named remote files instead of upload")
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="show what a --recursive or glob --delete would delete"
+    )
+    parser.add_argument("--yes", action="store_true", help="delete however many files match, without asking")
     parser.add_argument("-i", "--invalidate", action="store_true", help="invalidate CloudFront cache")
+    parser.add_argument("--no-wait", action="store_true", help="start the cache invalidation without waiting for it")
+    parser.add_argument("--invalidation-status", metavar="ID", help="show the status of a cache invalidation and exit")
+    parser.add_argument(
+        "--cleanup-incomplete", action="store_true", help="abort unfinished multipart uploads in the year and exit"
+    )
+    parser.add_argument(
+        "--older-than",
+        type=duration,
+        metavar="AGE",
+        help="with --cleanup-incomplete, only abort uploads started this long ago, like 12h or 7d (default: 1d)",
+    )
     parser.add_argument("-p", "--policy", action="store_true", help="generate IAM policy requirements and exit")
     parser.add_argument("-r", "--remote-name", type=str, help="upload a single file with a different remote name")
-    parser.add_argument("files", nargs="*", help="Source files.")
+    parser.add_argument(
+        "--copy", nargs=2, metavar=("SRC", "DST"), help="copy a remote file, or a directory with --recursive"
+    )
+    parser.add_argument(
+        "--move", nargs=2, metavar=("SRC", "DST"), help="move or rename a remote file, or a directory with --recursive"
+    )
+    parser.add_argument("-s", "--sync", type=pathlib.Path, help="upload only new or changed files from a directory")
+    parser.add_argument("-w", "--watch", type=pathlib.Path, help="keep uploading files written to a directory")
+    parser.add_argument(
+        "--settle", type=float, metavar="SECONDS", help=f"with --watch, upload {SETTLE:g}s after a file's last write"
+    )
+    parser.add_argument(
+        "-R", "--recursive", action="store_true", help="upload (or delete) directories with all their contents"
+    )
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB", help="only upload matching files")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="skip matching files")
+    parser.add_argument("--dedup", action="store_true", help="copy files already uploaded elsewhere server-side")
+    parser.add_argument("--stats", action="store_true", help="print request counts and latencies per API at the end")
+    parser.add_argument("--stats-json", type=pathlib.Path, metavar="FILE", help="write request metrics to a JSON file")
+    parser.add_argument("--no-progress", action="store_true", help="don't show transfer progress on the terminal")
+    parser.add_argument(
+        "-f", "--from-file", metavar="LIST", help="read files to transfer from a list, one per line (- for stdin)"
+    )
+    parser.add_argument("-0", "--null", action="store_true", help="entries in the --from-file list end with NUL")
+    parser.add_argument(
+        "--limit-rate", type=byte_rate, metavar="RATE", help="cap transfer bandwidth, in bytes per second, like 2MB"
+    )
+    parser.add_argument("-j", "--jobs", type=int, help="number of files to transfer in parallel")
+    parser.add_argument("files", nargs="*", help="Source files. Use - for standard input, with --remote-name.")
     args = parser.parse_args(argv)
     num_arg_types = sum(map(bool, args.__dict__.values()))
 
@@ -79,16 +625,146 @@ def parse_args(argv=None) -> argparse.Namespace:
             parser.error("--policy cannot be used with other arguments")
         return args
 
+    if args.invalidation_status:
+        if num_arg_types != 1:
+            parser.error("--invalidation-status cannot be used with other arguments")
+        return args
+
+    if args.cleanup_incomplete and num_arg_types - (args.year is not None) - bool(args.older_than) != 1:
+        parser.error("--cleanup-incomplete can only be used with --year and --older-than")
+
+    if args.older_than is not None and not args.cleanup_incomplete:
+        parser.error("--older-than requires --cleanup-incomplete")
+
+    if args.no_wait and not args.invalidate:
+        parser.error("--no-wait requires --invalidate")
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
     if args.year is None:
         args.year = str(datetime.date.today().year)
-    elif not (args.files or args.list):
-        parser.error("--year requires files or --list to be specified")
+    elif not (
+        args.files
+        or args.from_file
+        or args.list
+        or args.sync
+        or args.watch
+        or args.cleanup_incomplete
+        or args.copy
+        or args.move
+        or (args.delete and args.recursive)
+    ):
+        parser.error(
+            "--year requires files, --list, --sync, --watch, --cleanup-incomplete, --copy, --move"
+            " or --delete --recursive"
+        )
     args.prefix = args.year if args.year == "" or args.year.endswith("/") else f"{args.year}/"
 
+    if args.cleanup_incomplete:
+        if args.older_than is None:
+            args.older_than = STALE_UPLOAD
+        args.paths = []
+        return args
+
+    # Deletes by directory or glob are matched against a listing of the bucket, not against local files.
+    # Checked before the other modes return, since --sync --delete would otherwise ignore --dry-run.
+    args.remote_delete = (
+        args.delete
+        and not (args.sync or args.watch or args.copy or args.move or args.get)
+        and (args.recursive or any(c in arg for arg in args.files for c in GLOB_CHARACTERS))
+    )
+    if (args.dry_run or args.yes) and not args.remote_delete:
+        parser.error("--dry-run and --yes require --delete with --recursive or a glob")
+
+    if args.dedup and (args.delete or args.list or STDIN in args.files):
+        parser.error("--dedup is only valid for uploads of files")
+
+    if args.null and not args.from_file:
+        parser.error("-0 requires --from-file")
+
+    if args.from_file:
+        if args.files or args.remote_name or args.list or args.sync or args.watch:
+            parser.error("--from-file cannot be used with files, --remote-name, --list, --sync or --watch")
+        if args.from_file != STDIN and not os.path.exists(args.from_file):
+            parser.error(f"--from-file requires an existing file: {args.from_file}")
+
+    if args.settle is not None and not args.watch:
+        parser.error("--settle requires --watch")
+
+    if (args.include or args.exclude) and not (args.recursive or args.sync or args.watch):
+        parser.error("--include and --exclude require --recursive, --sync or --watch")
+
+    if args.copy or args.move:
+        if args.copy and args.move:
+            parser.error("--copy and --move cannot be used at the same time")
+        if args.files or args.from_file or args.list or args.delete or args.get or args.sync or args.watch:
+            parser.error(
+                "--copy and --move cannot be used with files, --from-file, --list, --delete, --get, --sync or --watch"
+            )
+        if args.content_type or args.remote_name or args.dedup:
+            parser.error(
+                "--copy and --move keep the remote file as it is; --content-type, --remote-name and --dedup don't apply"
+            )
+        source, destination = args.copy or args.move
+        if not (source.strip("/") and destination.strip("/")):
+            parser.error("--copy and --move require a source and a destination")
+        if not args.recursive:
+            destination = copy_destination(source, destination)
+        if source.rstrip("/") == destination.rstrip("/"):
+            parser.error("--copy and --move require a destination different from the source")
+        if args.recursive and f"{destination.rstrip('/')}/".startswith(f"{source.rstrip('/')}/"):
+            # the listing of the source would come across the copies as they're made, and copy them again
+            parser.error("--copy and --move --recursive cannot put a directory inside itself")
+        args.paths = []
+        return args
+
+    if args.get:
+        if args.list or args.delete or args.sync or args.watch or args.from_file or args.recursive:
+            parser.error("--get cannot be used with --list, --delete, --sync, --watch, --from-file or --recursive")
+        if args.content_type or args.remote_name or args.dedup or args.invalidate:
+            parser.error("--get downloads files as they are; --content-type, --remote-name, --dedup and -i don't apply")
+        if not args.files:
+            parser.error("--get requires the names of remote files")
+        if any(not name.rpartition("/")[2] for name in args.files):
+            parser.error("--get takes names of files, not directories")
+        args.paths = []
+        return args
+
+    if args.watch:
+        if args.files or args.list or args.sync or args.delete or args.content_type or args.remote_name:
+            parser.error("--watch cannot be used with files, --list, --sync, --delete, --content-type or --remote-name")
+        if args.recursive:
+            parser.error("--watch always includes subdirectories; --recursive is not needed")
+        if not args.watch.is_dir():
+            parser.error(f"--watch requires an existing directory: {args.watch}")
+        if args.settle is None:
+            args.settle = SETTLE
+        elif args.settle < 0:
+            parser.error("--settle cannot be negative")
+        args.paths = []
+        return args
+
+    if args.sync:
+        if args.files or args.list or args.content_type or args.remote_name or args.recursive:
+            parser.error("--sync cannot be used with files, --list, --content-type, --remote-name or --recursive")
+        if not args.sync.is_dir():
+            parser.error(f"--sync requires an existing directory: {args.sync}")
+        args.paths = []
+        return args
+
+    if args.recursive:
+        if args.list or args.remote_name:
+            parser.error("--recursive cannot be used with --list or --remote-name")
+        if args.delete and args.from_file:
+            parser.error("--delete --recursive takes remote names or globs, not --from-file")
+        if not (args.files or args.from_file or args.delete):
+            parser.error("--recursive requires directories to be specified")
+
     if args.content_type or args.remote_name:
         if args.delete or args.list:
             parser.error("Arguments like --content-type and --remote-name are only valid for uploads")
-        if not args.files:
+        if not (args.files or args.from_file):
             parser.error("You must specify files to be uploaded")
         elif args.remote_name and len(args.files) > 1:
             parser.error("--remote-name can only be used when uploading a single file")
@@ -98,9 +774,23 @@ def parse_args(argv=None) -> argparse.Namespace:
         if args.files:
             parser.error("--list does not support file filtering yet")
     elif args.delete:
-        if not args.files:
+        if not (args.files or args.from_file or args.recursive):
             parser.error("--delete requires files to be specified")
 
+    if args.remote_delete:
+        args.paths = []
+        return args
+
+    if args.from_file:
+        args.paths = []  # read and checked as the transfer goes
+        return args
+
+    if STDIN in args.files:
+        if args.files != [STDIN] or not args.remote_name or args.recursive:
+            parser.error("Standard input (-) must be the only file, and requires --remote-name")
+        args.paths = [pathlib.Path(STDIN)]
+        return args
+
     args.paths = [pathlib.Path(p) for p in args.files]
     if not (args.delete or args.list):
         missing = [p for p in args.paths if not p.exists()]
@@ -109,12 +799,53 @@ def parse_args(argv=None) -> argparse.Namespace:
             for p in missing:
                 print(f"  {p}")
             raise SystemExit(1)
+        if not args.recursive:
+            directories = [p for p in args.paths if p.is_dir()]
+            if directories:
+                parser.error(f"{directories[0]} is a directory; use --recursive to upload its contents")
 
     return args
 
 
+def byte_rate(value: str) -> int:
+    """Parse a rate like ``500KB`` or ``2MB/s`` for argparse."""
+    try:
+        rate = parse_size(value.removesuffix("/s"))
+    except ValueError:
+        rate = 0
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"invalid rate: {value!r}")
+    return rate
+
+
+def duration(value: str) -> datetime.timedelta:
+    """Parse an age like ``90s``, ``30m``, ``12h`` or ``7d`` for argparse. A bare number is seconds."""
+    unit = DURATION_UNITS.get(value[-1:].lower())
+    try:
+        amount = float(value[:-1] if unit else value)
+    except ValueError:
+        amount = -1
+    if not 0 <= amount < float("inf"):
+        raise argparse.ArgumentTypeError(f"invalid age: {value!r}")
+    return datetime.timedelta(seconds=amount * (unit or 1))
+
+
+class VersionAction(argparse.Action):
+    """Like argparse's "version" action, but only looks up the installed version when it's asked for."""
+
+    def __init__(self, option_strings: list[str], dest: str = argparse.SUPPRESS, **kwargs) -> None:
+        kwargs.setdefault("help", "show program's version number and exit")
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:
+        print(f"sobe {get_version()}")
+        parser.exit()
+
+
 def get_version() -> str:
     """Get the current version of the sobe package."""
+    import importlib.metadata
+
     try:
         return importlib.metadata.version("sobe")
     except importlib.metadata.PackageNotFoundError:  # pragma: no cover
@@ -0,0 +1,94 @@
+"""Content type detection: cached guesses from file names, falling back to a look at the first bytes."""
+
+import codecs
+import pathlib
+import threading
+from collections.abc import Mapping
+
+HEADER_SIZE = 8192  # enough for the signatures of common formats
+DEFAULT_TYPE = "application/octet-stream"
+TEXT_TYPE = "text/plain"
+
+
+class ContentTypes:
+    """Guesses content types, remembering the answer for each extension.
+
+    ``overrides`` maps extensions (like ``".md"`` or ``"tar.gz"``) to content types, taking precedence over the
+    system's MIME database. Files without a known extension are identified from their first bytes only.
+    """
+
+    def __init__(self, overrides: Mapping[str, str] | None = None) -> None:
+        self._overrides = {f".{ext.lower().lstrip('.')}": value for ext, value in (overrides or {}).items()}
+        self._by_extension: dict[str, str | None] = {}
+        self._init_lock = threading.Lock()
+
+    def guess(self, path: pathlib.Path) -> str:
+        """Return the content type for a local file."""
+        return self.guess_by_name(path.name) or self._sniff_file(path)
+
+    def guess_stream(self, name: str, header: bytes) -> str:
+        """Return the content type for streamed data, given its name and first bytes."""
+        return self.guess_by_name(name) or sniff(header)
+
+    def guess_by_name(self, name: str) -> str | None:
+        """Return the content type for a file name, or None when its extension doesn't tell."""
+        suffixes = [suffix.lower() for suffix in pathlib.PurePath(name).suffixes[-2:]]
+        key = "".join(suffixes)
+        if key not in self._by_extension:
+            self._by_extension[key] = self._lookup(suffixes)
+        return self._by_extension[key]
+
+    def _lookup(self, suffixes: list[str]) -> str | None:
+        if not suffixes:
+            return None
+        for candidate in ("".join(suffixes), suffixes[-1]):
+            if candidate in self._overrides:
+                return self._overrides[candidate]
+        import mimetypes
+
+        with self._init_lock:
+            if not mimetypes.inited:
+                mimetypes.init()  # reads the system's MIME database, once per process
+        guess, _ = mimetypes.guess_type(f"file{''.join(suffixes)}")
+        return guess
+
+    def _sniff_file(self, path: pathlib.Path) -> str:
+        with path.open("rb") as f:
+            return sniff(f.read(HEADER_SIZE))
+
+
+def sniff(header: bytes) -> str:
+    """Identify content from its first bytes, defaulting to ``application/octet-stream``.
+
+    Content without a known signature is ``text/plain`` when its first bytes are UTF-8 text, as the deep scan of
+    ``puremagic.magic_file`` would say of a README or a Makefile.
+    """
+    if not header:
+        return DEFAULT_TYPE
+
+    import puremagic
+
+    for result in puremagic.magic_string(header):  # result is ordered by confidence
+        guess = getattr(result, "mime_type", None)
+        if guess:
+            return guess
+    return TEXT_TYPE if is_text(header) else DEFAULT_TYPE
+
+
+def is_text(header: bytes) -> bool:
+    """Whether the first bytes of a file are UTF-8 (or ASCII) text, the last character possibly cut short."""
+    if b"\0" in header:
+        return False
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(header, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+_default = ContentTypes()
+
+
+def guess_content_type(path: pathlib.Path) -> str:
+    """Return a guessed content type for the given file, without user overrides."""
+    return _default.guess(path)
@@ -0,0 +1,53 @@
+"""Bounded worker pool shared by the CLI and AWS operations."""
+
+import collections
+import itertools
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split ``items`` lazily into lists of at most ``size`` elements."""
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], jobs: int, *, processes: bool = False) -> Iterator[R]:
+    """Apply ``func`` to each item using up to ``jobs`` threads, yielding results in input order.
+
+    At most ``2 * jobs`` items are in flight at once, so ``items`` may be a lazy iterator of any length.
+    Exceptions are re-raised when their result is reached, and pending work is cancelled.
+    With ``processes``, CPU-bound work runs in a process pool instead; ``func`` and items must be picklable.
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    # concurrent.futures imports logging, which costs startup time
+    from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+    pending: collections.deque[Future[R]] = collections.deque()
+    if processes:
+        import multiprocessing
+
+        # forking a process that already runs threads can deadlock, so workers start from scratch
+        executor: Executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=jobs)
+    with executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= 2 * jobs:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,146 @@
+"""Live progress of transfers on the terminal: bytes done, throughput and time left, per file and in total."""
+
+import collections
+import contextlib
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import TextIO
+
+from sobe.stats import format_bytes
+
+RENDER_INTERVAL = 0.2  # seconds between redraws, however often bytes arrive
+RATE_WINDOW = 5.0  # seconds of history behind the throughput figures
+
+
+class Transfer:
+    """Byte counts of one file in flight, with recent samples to measure its throughput."""
+
+    def __init__(self, total: int | None, now: float) -> None:
+        self.total = total
+        self.done = 0
+        self.samples: collections.deque[tuple[float, int]] = collections.deque([(now, 0)])
+
+
+class Progress:
+    """A single status line, redrawn in place on a terminal while transfers run.
+
+    :meth:`track` hands out a callback for each transfer, to be called with the number of bytes sent since the
+    last call, from any thread. Callbacks only count bytes; the line is redrawn at most every ``interval``
+    seconds, so fast links with small chunks don't spend their time writing to the terminal.
+
+    Other output must be written inside :meth:`paused`, which takes the progress text off the line first. When
+    ``inline``, the progress continues the line last written to standard output, as set with :meth:`begin_line`.
+    A disabled instance hands out no callbacks and draws nothing.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO = sys.stderr,
+        *,
+        enabled: bool = True,
+        inline: bool = False,
+        interval: float = RENDER_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.stream = stream
+        self.enabled = enabled
+        self.inline = inline
+        self.interval = interval
+        self.clock = clock
+        self._transfers: dict[str, Transfer] = {}
+        self._samples: collections.deque[tuple[float, int]] = collections.deque([(clock(), 0)])
+        self._sent = 0
+        self._current: str | None = None
+        self._line = ""
+        self._drawn = False
+        self._next_render = 0.0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_terminal(cls, *, enabled: bool = True) -> "Progress":
+        """Show progress on standard error if it's a terminal, continuing standard output's line if that is too."""
+        return cls(sys.stderr, enabled=enabled and sys.stderr.isatty(), inline=sys.stdout.isatty())
+
+    def track(self, name: str, total: int | None) -> Callable[[int], None] | None:
+        """Start following a transfer of ``total`` bytes (None if unknown). Returns its progress callback."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._transfers[name] = transfer = Transfer(total, self.clock())
+
+        def callback(sent: int) -> None:
+            with self._lock:
+                transfer.done += sent
+                self._sent += sent
+                if self.clock() >= self._next_render:
+                    self._render()
+
+        return callback
+
+    def finish(self, name: str) -> None:
+        """Stop following a transfer, whether it succeeded or not."""
+        with self._lock:
+            self._transfers.pop(name, None)
+
+    def begin_line(self, name: str, text: str) -> None:
+        """Say, from within :meth:`paused`, which transfer the output line just written is about, and its text."""
+        with self._lock:
+            self._current, self._line = name, text if self.inline else ""
+
+    @contextlib.contextmanager
+    def paused(self) -> Iterator[None]:
+        """Take the progress text off the line, leaving it as it was, and keep it off while the block writes."""
+        with self._lock:
+            if self._drawn:
+                self.stream.write(f"\r{self._line}\033[K")
+                self.stream.flush()
+                self._drawn = False
+            self._current, self._line = None, ""
+            yield
+
+    def _render(self) -> None:
+        now = self.clock()
+        self._next_render = now + self.interval
+        self._samples.append((now, self._sent))
+        for transfer in self._transfers.values():
+            transfer.samples.append((now, transfer.done))
+        parts = []
+        current = self._transfers.get(self._current) if self._current else None
+        if current:
+            parts.append(describe(current.done, current.total, rate(current.samples, now)))
+        if len(self._transfers) > 1 or not current:
+            totals = [t.total for t in self._transfers.values()]
+            total = None if None in totals else sum(totals)  # type: ignore[arg-type]
+            done = sum(t.done for t in self._transfers.values())
+            parts.append(f"{len(self._transfers)} active: {describe(done, total, rate(self._samples, now))}")
+        prefix = f"{self._line} " if self._line else ""
+        self.stream.write(f"\r{prefix}{' | '.join(parts)}\033[K")
+        self.stream.flush()
+        self._drawn = True
+
+
+def rate(samples: collections.deque[tuple[float, int]], now: float) -> float:
+    """Bytes per second over the last ``RATE_WINDOW`` seconds of samples, dropping older ones."""
+    while len(samples) > 2 and samples[1][0] <= now - RATE_WINDOW:
+        samples.popleft()
+    (start, first), (end, last) = samples[0], samples[-1]
+    return (last - first) / (end - start) if end > start else 0.0
+
+
+def describe(done: int, total: int | None, speed: float) -> str:
+    """Like ``12.0 MB/40.0 MB 30% 5.2 MB/s ETA 0:05``, leaving out what isn't known."""
+    text = format_bytes(done)
+    if total:
+        text += f"/{format_bytes(total)} {done * 100 // total}%"
+    text += f" {format_bytes(speed)}/s"
+    if total and speed:
+        text += f" ETA {format_duration((total - done) / speed)}"
+    return text
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
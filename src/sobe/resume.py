@@ -0,0 +1,180 @@
+"""Progress of multipart uploads and of downloads, kept on disk so that an interrupted transfer can continue."""
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+
+from platformdirs import PlatformDirs
+
+
+class UploadState:
+    """The multipart upload of one local file to one key: its upload ID, part size and the parts already sent.
+
+    Each part's ETag is kept, along with its checksum, since completing the upload needs both.
+    Every recorded part is written to the state file right away, so a crash loses at most the parts in flight.
+    """
+
+    def __init__(
+        self,
+        state_path: pathlib.Path,
+        *,
+        upload_id: str,
+        size: int,
+        mtime_ns: int,
+        part_size: int,
+        checksum_algorithm: str = "",
+        parts: dict[int, str] | None = None,
+        checksums: dict[int, str] | None = None,
+    ) -> None:
+        self.state_path = state_path
+        self.upload_id = upload_id
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.part_size = part_size
+        self.checksum_algorithm = checksum_algorithm
+        self.parts = dict(parts or {})
+        self.checksums = dict(checksums or {})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def location(bucket: str, key: str, local_path: pathlib.Path) -> pathlib.Path:
+        """Where the state of uploading this file to this key lives, in the user cache directory."""
+        identity = "\0".join((bucket, key, str(local_path.resolve())))
+        name = hashlib.sha256(identity.encode()).hexdigest()[:32]
+        return PlatformDirs("sobe").user_cache_path / "uploads" / f"{name}.json"
+
+    @classmethod
+    def load(cls, state_path: pathlib.Path) -> "UploadState | None":
+        """Read a state file, or return None when there is none or it can't be read."""
+        try:
+            raw = json.loads(state_path.read_text())
+            parts = {int(number): etag for number, etag in raw["parts"].items()}
+            checksums = {int(number): value for number, value in raw.get("checksums", {}).items()}
+            return cls(
+                state_path,
+                upload_id=raw["upload_id"],
+                size=raw["size"],
+                mtime_ns=raw["mtime_ns"],
+                part_size=raw["part_size"],
+                checksum_algorithm=raw.get("checksum_algorithm", ""),
+                parts=parts,
+                checksums=checksums,
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def matches(self, size: int, mtime_ns: int, part_size: int, checksum_algorithm: str = "") -> bool:
+        """Whether this state was recorded for the same file contents, split and checksummed the same way."""
+        recorded = (self.size, self.mtime_ns, self.part_size, self.checksum_algorithm)
+        return recorded == (size, mtime_ns, part_size, checksum_algorithm)
+
+    def record(self, part: int, etag: str, checksum: str = "") -> None:
+        """Remember that a part was uploaded, and save."""
+        with self._lock:
+            self.parts[part] = etag
+            if checksum:
+                self.checksums[part] = checksum
+            self._write()
+
+    def save(self) -> None:
+        with self._lock:
+            self._write()
+
+    def remove(self) -> None:
+        self.state_path.unlink(missing_ok=True)
+
+    def _write(self) -> None:
+        raw = {
+            "upload_id": self.upload_id,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "part_size": self.part_size,
+            "checksum_algorithm": self.checksum_algorithm,
+            "parts": {str(number): etag for number, etag in sorted(self.parts.items())},
+            "checksums": {str(number): value for number, value in sorted(self.checksums.items())},
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.state_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(raw))
+        os.replace(temporary, self.state_path)
+
+
+class DownloadState:
+    """The download of one object into one local file: the object's ETag and size, and the pieces already written.
+
+    A piece is a part of an object uploaded in parts (``piece_size`` 0), or else a range of ``piece_size`` bytes.
+    The MD5 of each part is kept, since the ETag of such an object is made of them. The state lives in a file
+    beside the download, written as each piece is recorded.
+    """
+
+    def __init__(
+        self,
+        state_path: pathlib.Path,
+        *,
+        etag: str,
+        size: int,
+        piece_size: int,
+        pieces: dict[int, str] | None = None,
+        received: int = 0,
+    ) -> None:
+        self.state_path = state_path
+        self.etag = etag
+        self.size = size
+        self.piece_size = piece_size
+        self.pieces = dict(pieces or {})
+        self.received = received  # bytes in the pieces recorded
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def location(path: pathlib.Path) -> pathlib.Path:
+        """Where the state of downloading into this file lives: beside it."""
+        return path.with_name(f"{path.name}.sobe-download")
+
+    @classmethod
+    def load(cls, state_path: pathlib.Path) -> "DownloadState | None":
+        """Read a state file, or return None when there is none or it can't be read."""
+        try:
+            raw = json.loads(state_path.read_text())
+            pieces = {int(number): md5 for number, md5 in raw["pieces"].items()}
+            return cls(
+                state_path,
+                etag=raw["etag"],
+                size=raw["size"],
+                piece_size=raw["piece_size"],
+                pieces=pieces,
+                received=raw["received"],
+            )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def matches(self, etag: str, size: int, piece_size: int) -> bool:
+        """Whether this state was recorded for the same object, split the same way."""
+        return (self.etag, self.size, self.piece_size) == (etag, size, piece_size)
+
+    def record(self, piece: int, md5: str, length: int) -> None:
+        """Remember that a piece of ``length`` bytes was written, and save."""
+        with self._lock:
+            self.pieces[piece] = md5
+            self.received += length
+            self._write()
+
+    def save(self) -> None:
+        with self._lock:
+            self._write()
+
+    def remove(self) -> None:
+        self.state_path.unlink(missing_ok=True)
+
+    def _write(self) -> None:
+        raw = {
+            "etag": self.etag,
+            "size": self.size,
+            "piece_size": self.piece_size,
+            "pieces": {str(number): md5 for number, md5 in sorted(self.pieces.items())},
+            "received": self.received,
+        }
+        temporary = self.state_path.with_name(f"{self.state_path.name}.tmp")
+        temporary.write_text(json.dumps(raw))
+        os.replace(temporary, self.state_path)
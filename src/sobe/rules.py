@@ -0,0 +1,65 @@
+"""Upload settings per file: the headers and storage class chosen by the ``[rules]`` of the configuration."""
+
+import datetime
+import fnmatch
+import re
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from sobe.config import RuleConfig
+
+# Top-level media types: patterns beginning with one of these and a slash match content types, not names.
+MEDIA_TYPES = ("application", "audio", "font", "image", "message", "model", "multipart", "text", "video")
+
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC)
+
+
+class Rules:
+    """Chooses the ``Cache-Control``, ``Expires`` and storage class of each upload from the rules matching it.
+
+    A pattern like ``"text/html"`` or ``"image/*"``, beginning with a media type, is a glob of the content type,
+    whose parameters are ignored. Any other pattern is a glob of the remote name, matched as ``--include`` is,
+    against the whole name and against its last component. Every matching rule applies, in order, later ones
+    overriding what earlier ones set. Patterns are compiled once for the whole run, while an expiry given in
+    seconds counts from each upload, so a long ``--watch`` keeps setting dates in the future.
+    """
+
+    def __init__(
+        self, rules: Mapping[str, RuleConfig] | None = None, *, clock: Callable[[], datetime.datetime] = utc_now
+    ) -> None:
+        self.clock = clock
+        self._rules: list[tuple[bool, Callable[[str], Any], dict[str, Any]]] = []
+        for pattern, rule in (rules or {}).items():
+            by_type = pattern.partition("/")[0].lower() in MEDIA_TYPES and "/" in pattern
+            match = re.compile(fnmatch.translate(pattern.lower() if by_type else pattern)).match
+            self._rules.append((by_type, match, upload_args(rule)))
+
+    def extra_args(self, name: str, content_type: str) -> dict[str, Any]:
+        """The arguments the rules add to the upload of a file with this remote name and content type."""
+        args: dict[str, Any] = {}
+        if not self._rules:
+            return args
+        media_type = content_type.partition(";")[0].strip().lower()
+        last = name.rpartition("/")[2]
+        for by_type, match, settings in self._rules:
+            if match(media_type) if by_type else match(name) or match(last):
+                args.update(settings)
+        if isinstance(args.get("Expires"), datetime.timedelta):
+            args["Expires"] += self.clock()
+        return args
+
+
+def upload_args(rule: RuleConfig) -> dict[str, Any]:
+    """The upload arguments set by one rule, with an expiry in seconds as a timedelta from the time of upload."""
+    args: dict[str, Any] = {}
+    if rule.cache_control is not None:
+        args["CacheControl"] = rule.cache_control
+    if isinstance(rule.expires, int):
+        args["Expires"] = datetime.timedelta(seconds=rule.expires)
+    elif rule.expires is not None:
+        args["Expires"] = rule.expires
+    if rule.storage_class is not None:
+        args["StorageClass"] = rule.storage_class
+    return args
@@ -0,0 +1,140 @@
+"""Per-request metrics collected from botocore's event hooks, summarized for ``--stats`` and ``--stats-json``."""
+
+import collections
+import json
+import math
+import os
+import pathlib
+import threading
+import time
+from typing import Any, NamedTuple
+
+STARTED = "sobe_stats_started"  # key in botocore's per-call context
+
+
+class Call(NamedTuple):
+    operation: str
+    seconds: float
+    status: int | None  # None when no HTTP response came back
+    retries: int
+    bytes_sent: int
+
+
+class RequestStats:
+    """Records each API call made through the clients it's attached to: latency, retries, bytes sent and status.
+
+    Latency runs from the start of a call to its final response, so it includes retries and their back-off.
+    """
+
+    def __init__(self) -> None:
+        self.calls: list[Call] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def attach(self, client: Any) -> None:
+        """Register with a boto3 client's event system."""
+        events = client.meta.events
+        events.register("before-call", self._before_call)
+        events.register("after-call", self._after_call)
+        events.register("after-call-error", self._after_call_error)
+
+    def _before_call(self, *, model: Any, params: dict[str, Any], context: dict[str, Any], **kwargs) -> None:
+        context[STARTED] = (model.name, time.perf_counter(), body_size(params.get("body")))
+
+    def _after_call(self, *, http_response: Any, parsed: dict[str, Any], context: dict[str, Any], **kwargs) -> None:
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        self._record(context, http_response.status_code, retries)
+
+    def _after_call_error(self, *, context: dict[str, Any], **kwargs) -> None:
+        """The call failed without a response, such as after running out of retries on connection errors."""
+        self._record(context, None, 0)
+
+    def _record(self, context: dict[str, Any], status: int | None, retries: int) -> None:
+        if STARTED not in context:
+            return  # the call started before this was attached
+        operation, started, sent = context.pop(STARTED)
+        call = Call(operation, time.perf_counter() - started, status, retries, sent)
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> dict[str, Any]:
+        """Aggregate the calls so far, per API operation, in a form that serializes to JSON."""
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            calls = list(self.calls)
+        by_operation: dict[str, list[Call]] = collections.defaultdict(list)
+        for call in calls:
+            by_operation[call.operation].append(call)
+        bytes_sent = sum(call.bytes_sent for call in calls)
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": len(calls),
+            "bytes_sent": bytes_sent,
+            "bytes_per_second": round(bytes_sent / elapsed) if elapsed else 0,
+            "operations": {name: _operation_summary(group) for name, group in sorted(by_operation.items())},
+        }
+
+    def report(self) -> str:
+        """A human-readable table of the summary."""
+        summary = self.summary()
+        lines = [f"{'API':<26}{'calls':>7}{'p50':>10}{'p95':>10}{'retries':>9}{'errors':>8}{'sent':>11}"]
+        for name, op in summary["operations"].items():
+            latency = op["latency_ms"]
+            lines.append(
+                f"{name:<26}{op['count']:>7}{latency['p50']:>8.0f}ms{latency['p95']:>8.0f}ms"
+                f"{op['retries']:>9}{op['errors']:>8}{format_bytes(op['bytes_sent']):>11}"
+            )
+        lines.append(
+            f"{summary['requests']} requests in {summary['elapsed_seconds']:.1f}s, "
+            f"{format_bytes(summary['bytes_sent'])} sent ({format_bytes(summary['bytes_per_second'])}/s)."
+        )
+        return "\n".join(lines)
+
+    def write_json(self, path: pathlib.Path) -> None:
+        path.write_text(json.dumps(self.summary(), indent=2) + "\n")
+
+
+def _operation_summary(calls: list[Call]) -> dict[str, Any]:
+    latencies = sorted(call.seconds * 1000 for call in calls)
+    statuses = collections.Counter(str(call.status) if call.status else "none" for call in calls)
+    return {
+        "count": len(calls),
+        "errors": sum(1 for call in calls if call.status is None or call.status >= 400),
+        "retries": sum(call.retries for call in calls),
+        "bytes_sent": sum(call.bytes_sent for call in calls),
+        "statuses": dict(sorted(statuses.items())),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "max": round(latencies[-1], 1),
+        },
+    }
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted, non-empty list."""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def body_size(body: Any) -> int:
+    """Length of a request body, which may be bytes, a file-like object, or absent."""
+    if body is None:
+        return 0
+    if hasattr(body, "__len__"):
+        return len(body)
+    if hasattr(body, "seek") and hasattr(body, "tell"):
+        position = body.tell()
+        end = body.seek(0, os.SEEK_END)
+        body.seek(position)
+        return end - position
+    return 0
+
+
+def format_bytes(size: float) -> str:
+    if size < 1024:
+        return f"{size:.0f} B"
+    for unit in ("KB", "MB"):
+        size /= 1024
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GB"
@@ -0,0 +1,50 @@
+"""Directory synchronization: decide which local files differ from their remote copies."""
+
+import hashlib
+import pathlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sobe.aws import RemoteObject
+
+READ_SIZE = 1024**2
+
+
+def is_unchanged(path: pathlib.Path, remote: "RemoteObject | None", threshold: int, chunksize: int) -> bool:
+    """Whether the remote object already holds the same bytes as the local file.
+
+    Size is compared first. Files not modified since the remote upload are trusted without reading them;
+    newer files are hashed and compared to the ETag, which is what lets a touched-but-identical file be skipped.
+    """
+    if remote is None:
+        return False
+    stat = path.stat()
+    if stat.st_size != remote.size:
+        return False
+    if stat.st_mtime <= remote.last_modified.timestamp():
+        return True
+    return local_etag(path, threshold, chunksize) == remote.etag
+
+
+def local_etag(path: pathlib.Path, threshold: int, chunksize: int) -> str:
+    """Compute the ETag S3 would assign to this file when uploaded with the given multipart settings."""
+    if path.stat().st_size < threshold:
+        digest = hashlib.md5(usedforsecurity=False)
+        with path.open("rb") as f:
+            while block := f.read(READ_SIZE):
+                digest.update(block)
+        return digest.hexdigest()
+
+    part_digests = []
+    with path.open("rb") as f:
+        while True:
+            digest = hashlib.md5(usedforsecurity=False)
+            remaining = chunksize
+            while remaining and (block := f.read(min(READ_SIZE, remaining))):
+                digest.update(block)
+                remaining -= len(block)
+            if remaining == chunksize:
+                break
+            part_digests.append(digest.digest())
+    combined = hashlib.md5(b"".join(part_digests), usedforsecurity=False)
+    return f"{combined.hexdigest()}-{len(part_digests)}"
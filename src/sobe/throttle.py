@@ -0,0 +1,44 @@
+"""Bandwidth limiting shared by every transfer thread, for ``--limit-rate``."""
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class RateLimiter:
+    """A token bucket holding the combined transfer rate of all threads to ``rate`` bytes per second.
+
+    After an idle spell, up to ``burst`` bytes (one second's worth by default) may go at once. A thread that
+    takes more than is available goes into debt and sleeps it off, outside the lock, so threads queue fairly.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = burst or rate
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """Account for ``amount`` bytes transferred, waiting as long as the rate requires. Negative amounts are ignored.
+
+        This is also a transfer progress callback; boto3 reports bytes it has to send again as negative.
+        """
+        if amount <= 0:
+            return
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - amount
+            self._updated = now
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            self.sleep(wait)
@@ -0,0 +1,46 @@
+"""Streaming traversal of local directory trees."""
+
+import fnmatch
+import os
+import pathlib
+from collections.abc import Iterator, Sequence
+
+
+def walk(
+    root: pathlib.Path, *, include: Sequence[str] = (), exclude: Sequence[str] = ()
+) -> Iterator[tuple[str, pathlib.Path]]:
+    """Yield ``(relative_name, path)`` for every regular file under ``root``, with forward slashes in names.
+
+    Files are yielded as each directory is scanned, and only directories waiting to be visited are kept in
+    memory, so trees of any size can be walked. Symlinked directories are not followed. ``exclude`` globs
+    also prune whole directories; ``include`` globs, when given, restrict which files are yielded.
+    """
+    pending = [(root, "")]
+    while pending:
+        directory, base = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = f"{base}{entry.name}"
+                if _matches(name, exclude):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((pathlib.Path(entry.path), f"{name}/"))
+                elif entry.is_file() and _is_included(name, include):
+                    yield name, pathlib.Path(entry.path)
+
+
+def selects(name: str, *, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> bool:
+    """Whether :func:`walk` would yield a file with this relative name, judging by the globs alone."""
+    parts = name.split("/")
+    ancestors = ("/".join(parts[:i]) for i in range(1, len(parts) + 1))
+    return not any(_matches(ancestor, exclude) for ancestor in ancestors) and _is_included(name, include)
+
+
+def _is_included(name: str, include: Sequence[str]) -> bool:
+    return not include or _matches(name, include)
+
+
+def _matches(name: str, patterns: Sequence[str]) -> bool:
+    """Match globs against the whole relative name and against its last component alone."""
+    basename = name.rpartition("/")[2]
+    return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(basename, p) for p in patterns)
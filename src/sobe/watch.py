@@ -0,0 +1,230 @@
+"""Watching a directory tree for files being written, with inotify on Linux and polling elsewhere."""
+
+import abc
+import ctypes
+import os
+import pathlib
+import select
+import stat
+import struct
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Self
+
+from sobe import walk
+
+POLL_INTERVAL = 1.0  # seconds between scans when polling
+READ_SIZE = 64 * 1024  # room for many inotify events, and at least one with the longest name
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by len bytes of NUL-padded name
+
+
+class Watcher(abc.ABC):
+    """Reports the relative names of files under ``root`` that were created or written to.
+
+    Names are filtered with ``include`` and ``exclude`` globs, as :func:`sobe.walk.walk` does.
+    """
+
+    method = ""
+
+    def __init__(self, root: pathlib.Path, *, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> None:
+        self.root = root
+        self.include = include
+        self.exclude = exclude
+
+    @abc.abstractmethod
+    def wait(self, timeout: float | None) -> set[str]:
+        """Wait up to ``timeout`` seconds (forever for None) for changes. May return early with none."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class PollingWatcher(Watcher):
+    """Scans the tree every ``interval`` seconds, reporting files whose size or modification time changed."""
+
+    method = "polling"
+
+    def __init__(
+        self,
+        root: pathlib.Path,
+        *,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        interval: float = POLL_INTERVAL,
+    ) -> None:
+        super().__init__(root, include=include, exclude=exclude)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int] | None]:
+        return {name: stat_key(path) for name, path in walk.walk(self.root, include=self.include, exclude=self.exclude)}
+
+    def wait(self, timeout: float | None) -> set[str]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {name for name, key in snapshot.items() if self._snapshot.get(name) != key}
+        self._snapshot = snapshot
+        return changed
+
+
+class InotifyWatcher(Watcher):
+    """Watches every directory in the tree with Linux's inotify, adding directories as they are created.
+
+    Raises OSError if inotify can't be set up, such as when the per-user limit of watches is reached.
+    """
+
+    method = "inotify"
+
+    def __init__(self, root: pathlib.Path, *, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> None:
+        super().__init__(root, include=include, exclude=exclude)
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: dict[int, str] = {}  # watch descriptor to relative name of the directory, with a slash
+        try:
+            for base in directories(root, exclude):
+                self._add(base)
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, base: str) -> None:
+        path = self.root / base
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        self._directories[wd] = base
+
+    def wait(self, timeout: float | None) -> set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        changed: set[str] = set()
+        while ready:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                break
+            for wd, mask, name in parse_events(data):
+                self._handle(wd, mask, name, changed)
+        return changed
+
+    def _handle(self, wd: int, mask: int, name: str, changed: set[str]) -> None:
+        if mask & IN_Q_OVERFLOW:  # events were lost, so anything may have changed
+            changed.update(found for found, _ in walk.walk(self.root, include=self.include, exclude=self.exclude))
+            return
+        if mask & IN_IGNORED:  # the directory is gone
+            self._directories.pop(wd, None)
+            return
+        base = self._directories.get(wd)
+        if base is None:
+            return
+        relative = f"{base}{name}"
+        if not mask & IN_ISDIR:
+            if walk.selects(relative, include=self.include, exclude=self.exclude):
+                changed.add(relative)
+        elif mask & (IN_CREATE | IN_MOVED_TO) and walk.selects(relative, exclude=self.exclude):
+            # Files can be written to a new directory before it's watched, so it's scanned once watched.
+            try:
+                for sub in directories(self.root / relative, self.exclude, f"{relative}/"):
+                    self._add(sub)
+            except OSError:
+                return  # removed again already
+            for inner, _ in walk.walk(self.root / relative):
+                if walk.selects(f"{relative}/{inner}", include=self.include, exclude=self.exclude):
+                    changed.add(f"{relative}/{inner}")
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_watcher(root: pathlib.Path, *, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> Watcher:
+    """Watch with inotify where it's available, and fall back to polling otherwise."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, include=include, exclude=exclude)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, include=include, exclude=exclude)
+
+
+def parse_events(data: bytes) -> Iterator[tuple[int, int, str]]:
+    """Yield ``(wd, mask, name)`` for each ``struct inotify_event`` in a buffer read from inotify."""
+    offset = 0
+    while offset < len(data):
+        wd, mask, _, length = EVENT.unpack_from(data, offset)
+        offset += EVENT.size
+        yield wd, mask, os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+        offset += length
+
+
+def directories(root: pathlib.Path, exclude: Sequence[str] = (), base: str = "") -> Iterator[str]:
+    """Yield ``base`` and the relative name of each directory under ``root`` not excluded, each with a slash."""
+    yield base
+    for dirpath, dirnames, _ in os.walk(root):
+        parent = pathlib.Path(dirpath).relative_to(root).as_posix()
+        parent = base if parent == "." else f"{base}{parent}/"
+        dirnames[:] = [d for d in dirnames if walk.selects(f"{parent}{d}", exclude=exclude)]
+        yield from (f"{parent}{d}/" for d in dirnames)
+
+
+def stat_key(path: pathlib.Path) -> tuple[int, int] | None:
+    """Size and modification time of a regular file, or None if it isn't one (anymore)."""
+    try:
+        result = path.stat()
+    except FileNotFoundError:
+        return None
+    return (result.st_size, result.st_mtime_ns) if stat.S_ISREG(result.st_mode) else None
+
+
+class Debouncer:
+    """Holds back changed names until each has gone ``settle`` seconds without changing again.
+
+    Once nothing is held back, the whole tree has been quiet for at least that long.
+    """
+
+    def __init__(self, settle: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.settle = settle
+        self.clock = clock
+        self._pending: dict[str, float] = {}  # name to time of its last change
+
+    def touch(self, names: Iterable[str]) -> None:
+        now = self.clock()
+        for name in names:
+            self._pending[name] = now
+
+    def settled(self) -> list[str]:
+        """Release the names that have settled, in order."""
+        cutoff = self.clock() - self.settle
+        ready = sorted(name for name, changed in self._pending.items() if changed <= cutoff)
+        for name in ready:
+            del self._pending[name]
+        return ready
+
+    def quiet(self) -> bool:
+        return not self._pending
+
+    def timeout(self) -> float | None:
+        """Seconds until the next name settles, or None with nothing held back."""
+        if not self._pending:
+            return None
+        return max(min(self._pending.values()) + self.settle - self.clock(), 0.0)
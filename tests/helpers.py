@@ -0,0 +1,13 @@
+class Clock:
+    """A fake clock for the ``clock`` and ``sleep`` arguments of timing code: time moves only when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
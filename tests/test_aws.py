@@ -1,13 +1,46 @@
+import base64
+import datetime
+import hashlib
+import io
 import json
+import os
 import pathlib
 import tempfile
-from unittest.mock import Mock, patch
+import threading
+import zlib
+from unittest.mock import ANY, Mock, patch
 
 import botocore.exceptions
 import pytest
 
-from sobe.aws import AWS
-from sobe.config import AWSConfig
+from sobe import checksum
+from sobe.aws import (
+    AWS,
+    BatchDeleteError,
+    BufferBody,
+    ETagMismatch,
+    InvalidationTimeout,
+    PrefixedStream,
+    RemoteObject,
+    auto_chunksize,
+    invalidation_paths,
+)
+from sobe.config import AWSConfig, RuleConfig
+from sobe.dedup import HashIndex
+from sobe.resume import DownloadState, UploadState
+from sobe.rules import Rules
+
+
+def sha256_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def crc32_of(data: bytes) -> str:
+    return base64.b64encode(zlib.crc32(data).to_bytes(4, "big")).decode()
+
+
+def md5_of(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
 
 
 def mock_boto_session():
@@ -43,8 +76,70 @@ class TestAWS:
 
         assert aws.config == self.config
         mock_session_class.assert_called_once_with(region_name="ca-west-1")
-        mock_session.resource.assert_called_once_with("s3", verify=True)
-        mock_session.client.assert_called_once_with("cloudfront", verify=True)
+        mock_session.resource.assert_called_once()
+        assert mock_session.resource.call_args.kwargs["verify"] is True
+        assert mock_session.resource.call_args.kwargs["config"].max_pool_connections == 10
+        assert mock_session.resource.call_args.kwargs["config"].retries is None
+        mock_session.client.assert_called_once_with("cloudfront", config=ANY, verify=True)
+
+    def test_init_retries(self):
+        mock_session, _, _ = mock_boto_session()
+        config = self.config._replace(retry_mode="adaptive", max_attempts=8)
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            AWS(config)
+
+        expected = {"mode": "adaptive", "total_max_attempts": 8}
+        assert mock_session.resource.call_args.kwargs["config"].retries == expected
+        assert mock_session.client.call_args.kwargs["config"].retries == expected
+
+    def test_init_attaches_stats(self):
+        mock_session, _, mock_cloudfront = mock_boto_session()
+        stats = Mock()
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            AWS(self.config, stats=stats)
+
+        stats.attach.assert_any_call(mock_session.resource.return_value.meta.client)
+        stats.attach.assert_any_call(mock_cloudfront)
+
+    def test_upload_rate_limited(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        limiter = Mock()
+        progress = Mock()
+
+        with (
+            tempfile.NamedTemporaryFile(suffix=".txt") as f,
+            patch("sobe.aws.boto3.Session", return_value=mock_session),
+        ):
+            aws = AWS(self.config, limiter=limiter)
+            aws.upload("2025/", pathlib.Path(f.name))
+            assert mock_bucket.upload_file.call_args.kwargs["Callback"] == limiter.consume
+            aws.upload("2025/", pathlib.Path(f.name), progress=progress)
+            mock_bucket.upload_file.call_args.kwargs["Callback"](100)
+            aws.upload_stream("2025/", io.BytesIO(b"data"), "data.bin")
+            assert mock_bucket.upload_fileobj.call_args.kwargs["Callback"] == limiter.consume
+
+        limiter.consume.assert_called_once_with(100)
+        progress.assert_called_once_with(100)
+
+    @pytest.mark.parametrize(
+        ("transfer", "jobs", "expected"),
+        [
+            ({}, 32, 320),
+            ({"max_concurrency": 3}, 8, 24),
+            ({"max_concurrency": 3}, 2, 10),
+            ({"use_threads": False}, 32, 32),
+        ],
+    )
+    def test_init_pool_sized_to_threads(self, transfer, jobs, expected):
+        mock_session, _, _ = mock_boto_session()
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            AWS(self.config._replace(transfer=transfer), jobs=jobs)
+
+        assert mock_session.resource.call_args.kwargs["config"].max_pool_connections == expected
 
     @patch("mimetypes.guess_type")
     def test_upload_with_known_mime_type(self, mock_guess_type):
@@ -61,9 +156,54 @@ class TestAWS:
                 aws.upload("2025/", test_file)
 
         mock_bucket.upload_file.assert_called_once_with(
-            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "text/plain"}
+            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "text/plain"}, Callback=None, Config=ANY
+        )
+
+    def test_upload_with_checksum_algorithm(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        config = self.config._replace(checksum_algorithm="SHA256")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_file = pathlib.Path(temp_dir) / "notes.txt"
+            test_file.write_text("test content")
+            with patch("sobe.aws.boto3.Session", return_value=mock_session):
+                aws = AWS(config)
+                aws.upload("2025/", test_file)
+                aws.upload_stream("2025/", io.BytesIO(b"streamed"), "notes.txt")
+
+        extra_args = {"ContentType": "text/plain", "ChecksumAlgorithm": "SHA256"}
+        assert mock_bucket.upload_file.call_args.kwargs["ExtraArgs"] == extra_args
+        assert mock_bucket.upload_fileobj.call_args.kwargs["ExtraArgs"] == extra_args
+
+    def test_upload_with_rules(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        rules = Rules(
+            {
+                "text/*": RuleConfig(cache_control="public, max-age=60"),
+                "assets/*": RuleConfig(
+                    cache_control="public, max-age=31536000, immutable", storage_class="STANDARD_IA"
+                ),
+            }
         )
 
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_file = pathlib.Path(temp_dir) / "notes.txt"
+            test_file.write_text("test content")
+            with patch("sobe.aws.boto3.Session", return_value=mock_session):
+                aws = AWS(self.config, rules=rules)
+                aws.upload("2025/", test_file, "assets/notes.txt")
+                aws.upload_stream("2025/", io.BytesIO(b"streamed"), "notes.txt")
+
+        assert mock_bucket.upload_file.call_args.kwargs["ExtraArgs"] == {
+            "ContentType": "text/plain",
+            "CacheControl": "public, max-age=31536000, immutable",
+            "StorageClass": "STANDARD_IA",
+        }
+        assert mock_bucket.upload_fileobj.call_args.kwargs["ExtraArgs"] == {
+            "ContentType": "text/plain",
+            "CacheControl": "public, max-age=60",
+        }
+
     def test_upload_with_forced_content_type(self):
         mock_session, mock_bucket, _ = mock_boto_session()
 
@@ -77,11 +217,108 @@ class TestAWS:
                 aws.upload("2025/", test_file, content_type="application/x-custom")
 
         mock_bucket.upload_file.assert_called_once_with(
-            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "application/x-custom"}
+            str(test_file),
+            f"2025/{test_file.name}",
+            ExtraArgs={"ContentType": "application/x-custom"},
+            Callback=None,
+            Config=ANY,
+        )
+
+    def _dedup_upload(self, head):
+        """Upload a file with dedup against an index that has seen its bytes at 2024/old.bin."""
+        mock_session, mock_bucket, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        if isinstance(head, Exception):
+            mock_client.head_object.side_effect = head
+        else:
+            mock_client.head_object.return_value = head
+        with tempfile.TemporaryDirectory() as temp_dir:
+            test_file = pathlib.Path(temp_dir) / "new.bin"
+            test_file.write_bytes(b"installer")
+            digest = sha256_of(b"installer")
+            index = HashIndex(pathlib.Path(temp_dir) / "index.json")
+            index.add(digest, "2024/old.bin")
+            with patch("sobe.aws.boto3.Session", return_value=mock_session):
+                aws = AWS(self.config, hash_index=index)
+                source = aws.upload("2025/", test_file, content_type="application/x-bin", dedup=True)
+        return source, digest, index, mock_bucket, mock_client
+
+    def test_upload_dedup_copies_existing_bytes(self):
+        digest = sha256_of(b"installer")
+        source, _, index, mock_bucket, mock_client = self._dedup_upload(
+            {"ContentLength": 9, "Metadata": {"sha256": digest}}
+        )
+        assert source == "2024/old.bin"
+        mock_client.head_object.assert_called_once_with(Bucket="test-bucket", Key="2024/old.bin")
+        mock_bucket.copy.assert_called_once_with(
+            {"Bucket": "test-bucket", "Key": "2024/old.bin"},
+            "2025/new.bin",
+            ExtraArgs={
+                "ContentType": "application/x-bin",
+                "Metadata": {"sha256": digest},
+                "MetadataDirective": "REPLACE",
+            },
+            Callback=None,
+            Config=ANY,
+        )
+        mock_bucket.upload_file.assert_not_called()
+        assert index.get(digest) == "2025/new.bin"
+
+    @pytest.mark.parametrize(
+        "head",
+        [
+            {"ContentLength": 9, "Metadata": {"sha256": "different"}},
+            {"ContentLength": 3, "Metadata": {}},
+            botocore.exceptions.ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"),
+        ],
+    )
+    def test_upload_dedup_uploads_when_index_is_stale(self, head):
+        source, digest, index, mock_bucket, _ = self._dedup_upload(head)
+        assert source is None
+        mock_bucket.copy.assert_not_called()
+        mock_bucket.upload_file.assert_called_once_with(
+            ANY,
+            "2025/new.bin",
+            ExtraArgs={"ContentType": "application/x-bin", "Metadata": {"sha256": digest}},
+            Callback=None,
+            Config=ANY,
+        )
+        assert index.get(digest) == "2025/new.bin"
+
+    def test_upload_dedup_head_error(self):
+        error = botocore.exceptions.ClientError({"Error": {"Code": "403", "Message": "Forbidden"}}, "HeadObject")
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._dedup_upload(error)
+
+    def test_upload_compressed(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+
+        with tempfile.NamedTemporaryFile(suffix=".gz", delete=True) as f:
+            test_file = pathlib.Path(f.name)
+
+            with patch("sobe.aws.boto3.Session") as mock_session_class:
+                mock_session_class.return_value = mock_session
+                aws = AWS(self.config)
+                progress = Mock()
+                aws.upload(
+                    "2025/",
+                    test_file,
+                    "page.html",
+                    content_type="text/html",
+                    content_encoding="gzip",
+                    progress=progress,
+                )
+
+        mock_bucket.upload_file.assert_called_once_with(
+            str(test_file),
+            "2025/page.html",
+            ExtraArgs={"ContentType": "text/html", "ContentEncoding": "gzip"},
+            Callback=progress,
+            Config=ANY,
         )
 
     @patch("mimetypes.guess_type")
-    @patch("puremagic.magic_file")
+    @patch("puremagic.magic_string")
     def test_upload_with_unknown_mime_type_default_octet_stream(self, mock_magic_file, mock_guess_type):
         """If both mimetypes and puremagic fail to identify, default to application/octet-stream."""
         mock_guess_type.return_value = (None, None)
@@ -99,11 +336,15 @@ class TestAWS:
                 aws.upload("2025/", test_file)
 
         mock_bucket.upload_file.assert_called_once_with(
-            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "application/octet-stream"}
+            str(test_file),
+            f"2025/{test_file.name}",
+            ExtraArgs={"ContentType": "application/octet-stream"},
+            Callback=None,
+            Config=ANY,
         )
 
     @patch("mimetypes.guess_type")
-    @patch("puremagic.magic_file")
+    @patch("puremagic.magic_string")
     def test_upload_with_unknown_mime_type_puremagic_fallback(self, mock_magic_file, mock_guess_type):
         """Fallback to puremagic when mimetypes fails and puremagic provides a mime_type."""
         mock_guess_type.return_value = (None, None)
@@ -112,6 +353,7 @@ class TestAWS:
 
         with tempfile.NamedTemporaryFile(mode="wb", suffix=".bin", delete=True) as f:
             f.write(b"\x89PNG\r\n\x1a\n")  # minimal PNG header to be realistic (though we mock puremagic)
+            f.flush()
             test_file = pathlib.Path(f.name)
 
             with patch("sobe.aws.boto3.Session") as mock_session_class:
@@ -120,9 +362,92 @@ class TestAWS:
                 aws.upload("2025/", test_file)
 
         mock_bucket.upload_file.assert_called_once_with(
-            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "image/png"}
+            str(test_file), f"2025/{test_file.name}", ExtraArgs={"ContentType": "image/png"}, Callback=None, Config=ANY
         )
 
+    def test_transfer_config_auto_chunksize(self):
+        mock_session, _, _ = mock_boto_session()
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            small = aws.transfer_config(4096)
+            huge = aws.transfer_config(12 * 1024**3)
+
+        assert small.multipart_chunksize == 8 * 1024**2
+        assert huge.multipart_chunksize > 8 * 1024**2
+        assert 12 * 1024**3 / huge.multipart_chunksize <= 1000
+
+    def test_transfer_config_from_settings(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        config = self.config._replace(
+            transfer={"multipart_threshold": 1024, "multipart_chunksize": 2048, "max_concurrency": 3}
+        )
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=True) as f:
+            test_file = pathlib.Path(f.name)
+            with patch("sobe.aws.boto3.Session") as mock_session_class:
+                mock_session_class.return_value = mock_session
+                aws = AWS(config)
+                aws.upload("2025/", test_file, content_type="text/plain")
+
+        transfer_config = mock_bucket.upload_file.call_args.kwargs["Config"]
+        assert transfer_config.multipart_threshold == 1024
+        assert transfer_config.multipart_chunksize == 2048
+        assert transfer_config.max_concurrency == 3
+
+    def test_upload_stream(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        data = b"%PDF-1.4" + os.urandom(5000)
+        received = []
+        mock_bucket.upload_fileobj.side_effect = lambda body, key, **kwargs: received.append(body.read())
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            progress = Mock()
+            aws.upload_stream("2025/", io.BytesIO(data), "dump", progress=progress)
+
+        assert received == [data]
+        _, key = mock_bucket.upload_fileobj.call_args.args
+        kwargs = mock_bucket.upload_fileobj.call_args.kwargs
+        assert key == "2025/dump"
+        assert kwargs["ExtraArgs"] == {"ContentType": "application/pdf"}
+        assert kwargs["Callback"] is progress
+        assert kwargs["Config"].multipart_chunksize == 16 * 1024**2
+        assert kwargs["Config"].max_in_memory_upload_chunks == 10
+
+    def test_upload_stream_forced_content_type(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            aws.upload_stream("2025/", io.BytesIO(b""), "dump.sql.zst", content_type="application/zstd")
+
+        assert mock_bucket.upload_fileobj.call_args.kwargs["ExtraArgs"] == {"ContentType": "application/zstd"}
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="named pipes not supported")
+    def test_upload_named_pipe_is_streamed(self):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        received = []
+        mock_bucket.upload_fileobj.side_effect = lambda body, key, **kwargs: received.append(body.read())
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fifo = pathlib.Path(temp_dir) / "pipe"
+            os.mkfifo(fifo)
+            writer = threading.Thread(target=fifo.write_bytes, args=(b"streamed",))
+            writer.start()
+            with patch("sobe.aws.boto3.Session") as mock_session_class:
+                mock_session_class.return_value = mock_session
+                aws = AWS(self.config)
+                aws.upload("2025/", fifo, "out.txt")
+            writer.join()
+
+        assert received == [b"streamed"]
+        mock_bucket.upload_file.assert_not_called()
+        assert mock_bucket.upload_fileobj.call_args.args[1] == "2025/out.txt"
+
     def test_delete_existing_file(self):
         mock_session, mock_bucket, _ = mock_boto_session()
         mock_object = Mock()
@@ -174,6 +499,186 @@ class TestAWS:
             with pytest.raises(botocore.exceptions.ClientError):
                 aws.delete("2025", "forbidden.txt")
 
+    def test_delete_many(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+
+        def head_object(Bucket, Key):
+            if Key == "2025/b.txt":
+                raise botocore.exceptions.ClientError({"Error": {"Code": "404"}}, "HeadObject")
+            return {}
+
+        mock_client.head_object.side_effect = head_object
+        mock_client.delete_objects.return_value = {}
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            result = aws.delete_many("2025/", ["a.txt", "b.txt", "c.txt", "a.txt"], jobs=2)
+
+        assert result == {"a.txt": True, "b.txt": False, "c.txt": True}
+        assert mock_client.head_object.call_count == 3
+        mock_client.get_paginator.assert_not_called()
+        mock_client.delete_objects.assert_called_once_with(
+            Bucket="test-bucket",
+            Delete={"Objects": [{"Key": "2025/a.txt"}, {"Key": "2025/c.txt"}], "Quiet": True},
+        )
+
+    def test_delete_many_head_error(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.head_object.side_effect = botocore.exceptions.ClientError({"Error": {"Code": "403"}}, "HeadObject")
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            aws = AWS(self.config)
+            with pytest.raises(botocore.exceptions.ClientError):
+                aws.delete_many("2025/", ["a.txt", "b.txt"])
+        mock_client.delete_objects.assert_not_called()
+
+    def test_delete_many_lists_only_the_span_of_names(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        pages = [
+            {"Contents": [{"Key": "2025/b.txt"}, {"Key": "2025/ba.txt"}]},
+            {"Contents": [{"Key": "2025/d.txt"}], "CommonPrefixes": [{"Prefix": "2025/sub/"}]},
+            {"Contents": [{"Key": "2025/z.txt"}]},
+        ]
+        fetched = []
+        mock_client.get_paginator.return_value.paginate.return_value = (fetched.append(page) or page for page in pages)
+        mock_client.delete_objects.return_value = {}
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session), patch("sobe.aws.HEAD_CHECK_LIMIT", 2):
+            aws = AWS(self.config)
+            result = aws.delete_many("2025/", ["b.txt", "c.txt", "d.txt"])
+
+        assert result == {"b.txt": True, "c.txt": False, "d.txt": True}
+        assert fetched == pages[:2]  # the second page goes past d.txt
+        mock_client.get_paginator.assert_called_once_with("list_objects_v2")
+        mock_client.get_paginator().paginate.assert_called_once_with(
+            Bucket="test-bucket", Prefix="2025/", Delimiter="/", StartAfter="2025/b.tx"
+        )
+        mock_client.head_object.assert_not_called()
+        mock_client.delete_objects.assert_called_once_with(
+            Bucket="test-bucket",
+            Delete={"Objects": [{"Key": "2025/b.txt"}, {"Key": "2025/d.txt"}], "Quiet": True},
+        )
+
+    def test_delete_keys_batches_of_1000(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.delete_objects.return_value = {}
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            count = aws.delete_keys((f"k{i}" for i in range(2500)), jobs=3)
+
+        assert count == 2500
+        sizes = sorted(len(c.kwargs["Delete"]["Objects"]) for c in mock_client.delete_objects.call_args_list)
+        assert sizes == [500, 1000, 1000]
+
+    def test_delete_batches_as_keys_come(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.delete_objects.return_value = {}
+        listed = []
+
+        def listing():
+            for i in range(1500):
+                listed.append(i)
+                yield f"k{i}"
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            batches = AWS(self.config).delete_batches(listing())
+            first = next(batches)
+            assert (len(first), len(listed)) == (1000, 1000)
+            assert [len(batch) for batch in batches] == [500]
+
+    def _copy(self, head, *, move=False):
+        mock_session, mock_bucket, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        if isinstance(head, Exception):
+            mock_client.head_object.side_effect = head
+        else:
+            mock_client.head_object.return_value = head
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            copied = AWS(self.config).copy("2024/a.iso", "2025/a.iso", move=move)
+        return copied, mock_client, mock_bucket
+
+    def test_copy(self):
+        copied, mock_client, mock_bucket = self._copy({"ContentLength": 5 * 1024**3, "ContentType": "text/plain"})
+        assert copied is True
+        mock_client.copy_object.assert_called_once_with(
+            Bucket="test-bucket", Key="2025/a.iso", CopySource={"Bucket": "test-bucket", "Key": "2024/a.iso"}
+        )
+        mock_bucket.copy.assert_not_called()
+        mock_client.delete_object.assert_not_called()
+
+    def test_move_keeps_storage_class(self):
+        copied, mock_client, _ = self._copy({"ContentLength": 3, "StorageClass": "GLACIER_IR"}, move=True)
+        assert copied is True
+        assert mock_client.copy_object.call_args.kwargs["StorageClass"] == "GLACIER_IR"
+        mock_client.delete_object.assert_called_once_with(Bucket="test-bucket", Key="2024/a.iso")
+
+    def test_copy_in_parts_above_5gb(self):
+        head = {
+            "ContentLength": 6 * 1024**3,
+            "ContentType": "application/x-iso9660-image",
+            "CacheControl": "max-age=60",
+            "Metadata": {"sha256": "abc"},
+            "ETag": '"e-720"',
+        }
+        _, mock_client, mock_bucket = self._copy(head)
+        mock_client.copy_object.assert_not_called()
+        mock_bucket.copy.assert_called_once_with(
+            {"Bucket": "test-bucket", "Key": "2024/a.iso"},
+            "2025/a.iso",
+            ExtraArgs={
+                "CacheControl": "max-age=60",
+                "ContentType": "application/x-iso9660-image",
+                "Metadata": {"sha256": "abc"},
+                "MetadataDirective": "REPLACE",
+            },
+            Config=ANY,
+        )
+        assert mock_bucket.copy.call_args.kwargs["Config"].multipart_chunksize == auto_chunksize(6 * 1024**3)
+
+    def test_copy_missing_source(self):
+        not_found = botocore.exceptions.ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        copied, mock_client, _ = self._copy(not_found, move=True)
+        assert copied is False
+        mock_client.copy_object.assert_not_called()
+        mock_client.delete_object.assert_not_called()
+
+    def test_move_onto_itself(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            aws = AWS(self.config)
+            with pytest.raises(ValueError, match="onto itself"):
+                aws.copy("2024/a.iso", "2024/a.iso", move=True)
+        mock_client.head_object.assert_not_called()
+        mock_client.delete_object.assert_not_called()
+
+    def test_copy_head_error(self):
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._copy(botocore.exceptions.ClientError({"Error": {"Code": "403"}}, "HeadObject"))
+
+    def test_delete_keys_errors(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.delete_objects.return_value = {
+            "Errors": [{"Key": "2025/a.txt", "Code": "AccessDenied", "Message": "Access Denied"}]
+        }
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            with pytest.raises(BatchDeleteError, match="2025/a.txt.*AccessDenied") as risen:
+                aws.delete_keys(["2025/a.txt"])
+
+        assert risen.value.errors[0]["Key"] == "2025/a.txt"
+
     @patch("sobe.aws.datetime.datetime")
     def test_invalidate_cache(self, mock_datetime):
         # Mock datetime
@@ -212,8 +717,60 @@ class TestAWS:
             },
         )
         assert mock_cloudfront.get_invalidation.call_count == 3
+        mock_cloudfront.get_invalidation.assert_called_with(DistributionId="E1234567890123", Id="E1234567890123")
         assert mock_sleep.call_count == 3
 
+    def test_wait_for_invalidation_backoff(self):
+        mock_session, _, mock_cloudfront = mock_boto_session()
+        mock_cloudfront.get_invalidation.side_effect = [{"Invalidation": {"Status": "InProgress"}}] * 6 + [
+            {"Invalidation": {"Status": "Completed"}}
+        ]
+
+        with (
+            patch("sobe.aws.boto3.Session") as mock_session_class,
+            patch("sobe.aws.time.sleep") as mock_sleep,
+        ):
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            statuses = list(aws.wait_for_invalidation("I1"))
+
+        assert statuses == ["Created"] + ["InProgress"] * 6
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert 1 <= delays[0] <= 2
+        assert 15 <= delays[-1] <= 30
+        assert all(delay <= 30 for delay in delays)
+
+    def test_wait_for_invalidation_timeout(self):
+        mock_session, _, mock_cloudfront = mock_boto_session()
+        mock_cloudfront.get_invalidation.return_value = {"Invalidation": {"Status": "InProgress"}}
+        clock = iter(range(0, 1000, 5))
+
+        with (
+            patch("sobe.aws.boto3.Session") as mock_session_class,
+            patch("sobe.aws.time.sleep"),
+            patch("sobe.aws.time.monotonic", side_effect=lambda: next(clock)),
+        ):
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config._replace(invalidation_timeout=20))
+            with pytest.raises(InvalidationTimeout) as risen:
+                list(aws.wait_for_invalidation("I1"))
+
+        assert risen.value.invalidation == "I1"
+        assert risen.value.status == "InProgress"
+
+    def test_invalidate_cache_keys(self):
+        mock_session, _, mock_cloudfront = mock_boto_session()
+        mock_cloudfront.create_invalidation.return_value = {"Invalidation": {"Id": "I1"}}
+        mock_cloudfront.get_invalidation.return_value = {"Invalidation": {"Status": "Completed"}}
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class, patch("sobe.aws.time.sleep"):
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            list(aws.invalidate_cache(["2025/b.txt", "2025/a.txt"]))
+
+        batch = mock_cloudfront.create_invalidation.call_args.kwargs["InvalidationBatch"]
+        assert batch["Paths"] == {"Quantity": 2, "Items": ["/2025/a.txt", "/2025/b.txt"]}
+
     def test_generate_needed_permissions_success(self):
         mock_session, _, _ = mock_boto_session()
         mock_sts = Mock()
@@ -260,23 +817,480 @@ class TestAWS:
         statement = policy["Statement"][0]
         assert "arn:aws:cloudfront::YOUR_ACCOUNT_ID:distribution/E1234567890123" in statement["Resource"]
 
-    def test_list_year_directory(self):
+    @pytest.mark.parametrize(("recursive", "delimiter"), [(True, {}), (False, {"Delimiter": "/"})])
+    def test_list_keys(self, recursive, delimiter):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "2025/a.txt"}, {"Key": "2025/sub/b.txt"}]},
+            {},
+        ]
+
+        with patch("sobe.aws.boto3.Session", return_value=mock_session):
+            keys = list(AWS(self.config).list_keys("2025/", recursive=recursive))
+
+        assert keys == ["2025/a.txt", "2025/sub/b.txt"]
+        mock_client.get_paginator.assert_called_once_with("list_objects_v2")
+        mock_client.get_paginator().paginate.assert_called_once_with(Bucket="test-bucket", Prefix="2025/", **delimiter)
+
+    def test_list_objects(self):
         mock_session, mock_bucket, _ = mock_boto_session()
+        modified = Mock()
+        mock_bucket.objects.filter.return_value = [
+            Mock(key="2025/a.txt", size=3, last_modified=modified, e_tag='"abc"'),
+            Mock(key="2025/sub/b.txt", size=5, last_modified=modified, e_tag='"def-2"'),
+        ]
+
+        with patch("sobe.aws.boto3.Session") as mock_session_class:
+            mock_session_class.return_value = mock_session
+            aws = AWS(self.config)
+            objects = list(aws.list_objects("2025/"))
+
+        assert objects == [
+            RemoteObject("2025/a.txt", 3, modified, "abc"),
+            RemoteObject("2025/sub/b.txt", 5, modified, "def-2"),
+        ]
+        mock_bucket.objects.filter.assert_called_once_with(Prefix="2025/")
 
-        obj1 = Mock()
-        obj1.key = "2025/"  # no (base directory placeholder)
-        obj2 = Mock()
-        obj2.key = "2025/file1.txt"  # yes
-        obj3 = Mock()
-        obj3.key = "2025/file2.txt"  # yes
-        obj4 = Mock()
-        obj4.key = "2025/subdir/file3.txt"  # yes, but as subdir/
-        mock_bucket.objects.filter.return_value = [obj1, obj2, obj3, obj4]
+    def test_list_year_directory(self):
+        mock_session, _, _ = mock_boto_session()
+        mock_client = mock_session.resource.return_value.meta.client
+        mock_client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Contents": [{"Key": "2025/"}, {"Key": "2025/file1.txt"}],  # skips the base directory placeholder
+                "CommonPrefixes": [{"Prefix": "2025/a-subdir/"}],
+            },
+            {"Contents": [{"Key": "2025/file2.txt"}], "CommonPrefixes": [{"Prefix": "2025/subdir/"}]},
+            {},
+        ]
 
         with patch("sobe.aws.boto3.Session") as mock_session_class:
             mock_session_class.return_value = mock_session
             aws = AWS(self.config)
             listing = aws.list("2025/")
+            assert not mock_client.get_paginator.called  # lazy until iterated
+            names = list(listing)
 
-        assert listing == ["file1.txt", "file2.txt", "subdir/"]
-        mock_bucket.objects.filter.assert_called_once_with(Prefix="2025/")
+        assert names == ["a-subdir/", "file1.txt", "file2.txt", "subdir/"]
+        mock_client.get_paginator.assert_called_once_with("list_objects_v2")
+        mock_client.get_paginator().paginate.assert_called_once_with(
+            Bucket="test-bucket", Prefix="2025/", Delimiter="/"
+        )
+
+
+class TestResumableUpload:
+    """Files of 20 bytes, uploaded in 8-byte parts."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.temp_dir.name)
+        self.file = self.root / "big.iso"
+        self.file.write_bytes(b"0123456789abcdefghij")
+        self.config = AWSConfig(
+            bucket="test-bucket",
+            cloudfront="E1234567890123",
+            session={},
+            service={},
+            transfer={"multipart_threshold": 8, "multipart_chunksize": 8, "use_threads": False},
+        )
+        self.mock_session, _, _ = mock_boto_session()
+        self.client = self.mock_session.resource.return_value.meta.client
+        self.client.create_multipart_upload.return_value = {"UploadId": "new-id"}
+        self.sent: list[tuple[int, bytes]] = []
+        self.client.upload_part.side_effect = self._receive_part
+        self.dirs = patch("sobe.resume.PlatformDirs")
+        self.dirs.start().return_value.user_cache_path = self.root / "cache"
+
+    def teardown_method(self):
+        self.dirs.stop()
+        self.temp_dir.cleanup()
+
+    def _receive_part(self, **kwargs):
+        self.sent.append((kwargs["PartNumber"], kwargs["Body"].read()))  # the body is released once sent
+        return {"ETag": f'"e{kwargs["PartNumber"]}"'}
+
+    def _state(self, upload_id="old-id", parts=None, size=20, checksum_algorithm="CRC32"):
+        path = UploadState.location("test-bucket", "2025/big.iso", self.file)
+        mtime_ns = self.file.stat().st_mtime_ns
+        checksums = dict.fromkeys(parts or {}, "old")
+        state = UploadState(
+            path,
+            upload_id=upload_id,
+            size=size,
+            mtime_ns=mtime_ns,
+            part_size=8,
+            checksum_algorithm=checksum_algorithm,
+            parts=parts,
+            checksums=checksums,
+        )
+        state.save()
+        return state
+
+    def _upload(self, progress=None, limiter=None):
+        with patch("sobe.aws.boto3.Session", return_value=self.mock_session):
+            aws = AWS(self.config, limiter=limiter)
+            aws.upload("2025/", self.file, content_type="application/x-iso9660-image", progress=progress)
+
+    def _sent_parts(self):
+        return self.sent
+
+    def test_upload_in_parts(self):
+        self._upload()
+
+        self.client.create_multipart_upload.assert_called_once_with(
+            Bucket="test-bucket",
+            Key="2025/big.iso",
+            ChecksumAlgorithm="CRC32",
+            ContentType="application/x-iso9660-image",
+        )
+        assert self._sent_parts() == [(1, b"01234567"), (2, b"89abcdef"), (3, b"ghij")]
+        crc32s = [crc32_of(b"01234567"), crc32_of(b"89abcdef"), crc32_of(b"ghij")]
+        assert [c.kwargs["ChecksumCRC32"] for c in self.client.upload_part.call_args_list] == crc32s
+        assert {c.kwargs["ChecksumAlgorithm"] for c in self.client.upload_part.call_args_list} == {"CRC32"}
+        self.client.complete_multipart_upload.assert_called_once_with(
+            Bucket="test-bucket",
+            Key="2025/big.iso",
+            UploadId="new-id",
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": 1, "ETag": '"e1"', "ChecksumCRC32": crc32s[0]},
+                    {"PartNumber": 2, "ETag": '"e2"', "ChecksumCRC32": crc32s[1]},
+                    {"PartNumber": 3, "ETag": '"e3"', "ChecksumCRC32": crc32s[2]},
+                ]
+            },
+        )
+        assert list((self.root / "cache" / "uploads").iterdir()) == []
+
+    def test_upload_with_checksum_algorithm(self):
+        self.config = self.config._replace(checksum_algorithm="SHA256")
+
+        self._upload()
+
+        assert self.client.create_multipart_upload.call_args.kwargs["ChecksumAlgorithm"] == "SHA256"
+        first = self.client.upload_part.call_args_list[0].kwargs
+        assert first["ChecksumSHA256"] == base64.b64encode(hashlib.sha256(b"01234567").digest()).decode()
+        assert "ChecksumCRC32" not in first
+        parts = self.client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        assert parts[0]["ChecksumSHA256"] == first["ChecksumSHA256"]
+
+    def test_dedup_hashes_and_sends_from_one_mapping(self):
+        mapped = Mock(wraps=checksum.mapped)
+        index = HashIndex(self.root / "index.json")
+        with patch("sobe.aws.boto3.Session", return_value=self.mock_session), patch("sobe.aws.checksum.mapped", mapped):
+            AWS(self.config, hash_index=index).upload("2025/", self.file, dedup=True)
+
+        mapped.assert_called_once_with(self.file)
+        assert self._sent_parts() == [(1, b"01234567"), (2, b"89abcdef"), (3, b"ghij")]
+        digest = sha256_of(b"0123456789abcdefghij")
+        assert self.client.create_multipart_upload.call_args.kwargs["Metadata"] == {"sha256": digest}
+        assert index.get(digest) == "2025/big.iso"
+
+    def test_parts_rate_limited(self):
+        limiter = Mock()
+        self.client.upload_part.side_effect = lambda **kwargs: {"ETag": kwargs["Body"].read().decode()}
+
+        self._upload(limiter=limiter)
+
+        assert [c.args[0] for c in limiter.consume.call_args_list] == [8, 8, 4]
+        assert self.client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"][2]["ETag"] == "ghij"
+
+    def test_interrupted_upload_keeps_state(self):
+        def fail_on_two(**kwargs):
+            if kwargs["PartNumber"] == 2:
+                raise ConnectionError
+            return {"ETag": '"e1"'}
+
+        self.client.upload_part.side_effect = fail_on_two
+        with pytest.raises(ConnectionError):
+            self._upload()
+
+        state = UploadState.load(UploadState.location("test-bucket", "2025/big.iso", self.file))
+        assert state is not None
+        assert (state.upload_id, state.parts) == ("new-id", {1: '"e1"'})
+        self.client.complete_multipart_upload.assert_not_called()
+
+    def test_resume(self):
+        self._state(parts={1: '"e1"', 2: '"lost"'})
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {"Parts": [{"PartNumber": 1, "ETag": '"e1"'}, {"PartNumber": 2, "ETag": '"other"'}]}
+        ]
+
+        progress = Mock()
+        self._upload(progress)
+
+        self.client.get_paginator.assert_called_once_with("list_parts")
+        self.client.create_multipart_upload.assert_not_called()
+        assert self._sent_parts() == [(2, b"89abcdef"), (3, b"ghij")]
+        sent = [c.args[0] for c in progress.call_args_list]
+        assert sent[0] == 8  # the part already uploaded
+        assert sorted(sent[1:]) == [4, 8]
+        assert self.client.complete_multipart_upload.call_args.kwargs["UploadId"] == "old-id"
+        parts = self.client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        assert [part["ChecksumCRC32"] for part in parts] == ["old", crc32_of(b"89abcdef"), crc32_of(b"ghij")]
+
+    @pytest.mark.parametrize("changed", [{"size": 10}, {"checksum_algorithm": "SHA256"}])
+    def test_changed_file_starts_over(self, changed):
+        self._state(**changed)
+
+        self._upload()
+
+        self.client.abort_multipart_upload.assert_called_once_with(
+            Bucket="test-bucket", Key="2025/big.iso", UploadId="old-id"
+        )
+        assert [part for part, _ in self._sent_parts()] == [1, 2, 3]
+        assert self.client.complete_multipart_upload.call_args.kwargs["UploadId"] == "new-id"
+
+    def test_expired_upload_starts_over(self):
+        no_such_upload = botocore.exceptions.ClientError({"Error": {"Code": "NoSuchUpload"}}, "ListParts")
+        self._state(parts={1: '"e1"'})
+        self.client.get_paginator.return_value.paginate.side_effect = no_such_upload
+        self.client.abort_multipart_upload.side_effect = no_such_upload
+
+        self._upload()
+
+        assert [part for part, _ in self._sent_parts()] == [1, 2, 3]
+        assert self.client.complete_multipart_upload.call_args.kwargs["UploadId"] == "new-id"
+
+    def test_list_parts_error(self):
+        self._state()
+        self.client.get_paginator.return_value.paginate.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "AccessDenied"}}, "ListParts"
+        )
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._upload()
+
+    def test_abort_error(self):
+        self._state(size=10)
+        self.client.abort_multipart_upload.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "AccessDenied"}}, "AbortMultipartUpload"
+        )
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._upload()
+
+    def test_abort_incomplete(self):
+        day = datetime.datetime(2026, 1, 2, tzinfo=datetime.UTC)
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {
+                "Uploads": [
+                    {"Key": "2025/a.iso", "UploadId": "a", "Initiated": day - datetime.timedelta(days=3)},
+                    {"Key": "2025/new.iso", "UploadId": "new", "Initiated": day + datetime.timedelta(hours=1)},
+                    {"Key": "2025/b.iso", "UploadId": "b", "Initiated": day - datetime.timedelta(seconds=1)},
+                ]
+            },
+            {},
+        ]
+        with patch("sobe.aws.boto3.Session", return_value=self.mock_session):
+            keys = list(AWS(self.config).abort_incomplete("2025/", started_before=day))
+            everything = list(AWS(self.config).abort_incomplete("2025/"))
+
+        assert keys == ["2025/a.iso", "2025/b.iso"]
+        assert everything == ["2025/a.iso", "2025/new.iso", "2025/b.iso"]
+        self.client.get_paginator.assert_called_with("list_multipart_uploads")
+        self.client.get_paginator.return_value.paginate.assert_called_with(Bucket="test-bucket", Prefix="2025/")
+        self.client.abort_multipart_upload.assert_any_call(Bucket="test-bucket", Key="2025/b.iso", UploadId="b")
+
+
+class TestDownload:
+    """Objects of 20 bytes, fetched in 8-byte ranges, or in the parts they were uploaded in."""
+
+    data = b"0123456789abcdefghij"
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = pathlib.Path(self.temp_dir.name) / "big.iso"
+        self.config = AWSConfig(
+            bucket="test-bucket",
+            cloudfront="E1234567890123",
+            session={},
+            service={},
+            transfer={"multipart_chunksize": 8},
+        )
+        self.mock_session, _, _ = mock_boto_session()
+        self.client = self.mock_session.resource.return_value.meta.client
+        self.parts = [(0, 12), (12, 20)]  # the bounds of each part, for objects uploaded in parts
+        self.client.get_object.side_effect = self._serve
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def _serve(self, **kwargs):
+        if "PartNumber" in kwargs:
+            start, end = self.parts[kwargs["PartNumber"] - 1]
+        else:
+            first, _, last = kwargs["Range"].removeprefix("bytes=").partition("-")
+            start, end = int(first), int(last) + 1
+        body = Mock()
+        body.iter_chunks.return_value = [
+            chunk for chunk in (self.data[start : start + 5], self.data[start + 5 : end]) if chunk
+        ]
+        return {"ContentRange": f"bytes {start}-{end - 1}/{len(self.data)}", "ContentLength": end - start, "Body": body}
+
+    def _head(self, etag=None, **fields):
+        self.client.head_object.return_value = {"ETag": etag or f'"{md5_of(self.data)}"', "ContentLength": 20, **fields}
+
+    def _download(self, jobs=1, progress=None, limiter=None):
+        with patch("sobe.aws.boto3.Session", return_value=self.mock_session):
+            return AWS(self.config, limiter=limiter).download("2025/big.iso", self.file, jobs=jobs, progress=progress)
+
+    def test_download_in_ranges(self):
+        self._head()
+        received = []
+        assert self._download(jobs=3, progress=received.append) is True
+        assert self.file.read_bytes() == self.data
+        ranges = sorted(c.kwargs["Range"] for c in self.client.get_object.call_args_list)
+        assert ranges == ["bytes=0-7", "bytes=16-19", "bytes=8-15"]
+        assert {c.kwargs["IfMatch"] for c in self.client.get_object.call_args_list} == {f'"{md5_of(self.data)}"'}
+        assert sum(received) == 20
+        assert not DownloadState.location(self.file).exists()
+
+    def test_download_in_parts(self):
+        digests = bytes.fromhex(md5_of(self.data[:12])) + bytes.fromhex(md5_of(self.data[12:]))
+        self._head(f'"{md5_of(digests)}-2"')
+        assert self._download() is True
+        assert self.file.read_bytes() == self.data
+        assert [c.kwargs["PartNumber"] for c in self.client.get_object.call_args_list] == [1, 2]
+
+    def test_etag_mismatch_removes_the_file(self):
+        self._head('"0123456789abcdef0123456789abcdef"')
+        with pytest.raises(ETagMismatch, match="doesn't match"):
+            self._download()
+        assert not self.file.exists()
+        assert not DownloadState.location(self.file).exists()
+
+    @pytest.mark.parametrize("fields", [{"ServerSideEncryption": "aws:kms"}, {"SSECustomerAlgorithm": "AES256"}])
+    def test_encrypted_objects_are_not_checked(self, fields):
+        self._head('"0123456789abcdef0123456789abcdef"', **fields)
+        assert self._download() is True
+        assert self.file.read_bytes() == self.data
+
+    def test_object_changed_while_downloading(self):
+        self._head()
+        error = {"Error": {"Code": "PreconditionFailed"}}
+        self.client.get_object.side_effect = botocore.exceptions.ClientError(error, "GetObject")
+        with pytest.raises(ETagMismatch, match="changed"):
+            self._download()
+        assert not self.file.exists()
+
+    def test_other_errors_keep_the_state(self):
+        self._head()
+        error = {"Error": {"Code": "InternalError"}}
+        self.client.get_object.side_effect = botocore.exceptions.ClientError(error, "GetObject")
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._download()
+        assert self.file.stat().st_size == 20
+        assert DownloadState.load(DownloadState.location(self.file)) is not None
+
+    def test_resume(self):
+        self._head()
+        self.file.write_bytes(self.data[:8] + bytes(12))
+        state = DownloadState(DownloadState.location(self.file), etag=f'"{md5_of(self.data)}"', size=20, piece_size=8)
+        state.record(1, "", 8)
+        received = []
+        limiter = Mock()
+        assert self._download(progress=received.append, limiter=limiter) is True
+        assert self.file.read_bytes() == self.data
+        assert [c.kwargs["Range"] for c in self.client.get_object.call_args_list] == ["bytes=8-15", "bytes=16-19"]
+        assert received == [8, 5, 3, 4]
+        assert sum(c.args[0] for c in limiter.consume.call_args_list) == 12
+        assert not state.state_path.exists()
+
+    def test_stale_state_starts_over(self):
+        self._head()
+        self.file.write_bytes(b"x" * 20)
+        DownloadState(DownloadState.location(self.file), etag='"old"', size=20, piece_size=8, pieces={1: ""}).save()
+        with patch("sobe.aws.os.posix_fallocate", side_effect=OSError):
+            assert self._download() is True
+        assert self.file.read_bytes() == self.data
+        assert self.client.get_object.call_count == 3
+
+    def test_empty_object(self):
+        self.client.head_object.return_value = {"ETag": f'"{md5_of(b"")}"', "ContentLength": 0}
+        assert self._download() is True
+        assert self.file.read_bytes() == b""
+        self.client.get_object.assert_not_called()
+
+    def test_not_found(self):
+        error = {"Error": {"Code": "404"}}
+        self.client.head_object.side_effect = botocore.exceptions.ClientError(error, "HeadObject")
+        assert self._download() is False
+        assert not self.file.exists()
+
+    def test_head_error(self):
+        error = {"Error": {"Code": "403"}}
+        self.client.head_object.side_effect = botocore.exceptions.ClientError(error, "HeadObject")
+        with pytest.raises(botocore.exceptions.ClientError):
+            self._download()
+
+
+class TestAutoChunksize:
+    def test_small_files_use_default(self):
+        assert auto_chunksize(0) == 8 * 1024**2
+        assert auto_chunksize(100 * 1024**2) == 8 * 1024**2
+
+    def test_rounds_up_to_whole_mebibyte(self):
+        size = 20 * 1024**3 + 1
+        chunksize = auto_chunksize(size)
+        assert chunksize % 1024**2 == 0
+        assert -(-size // chunksize) <= 1000
+
+    def test_capped_at_part_limit(self):
+        assert auto_chunksize(5 * 1024**4) == 5 * 1024**3
+
+
+class TestInvalidationPaths:
+    def test_individual_paths(self):
+        assert invalidation_paths(["2025/a b.txt", "index.html", "index.html"]) == ["/2025/a%20b.txt", "/index.html"]
+
+    def test_collapse_to_deepest_wildcards(self):
+        keys = [f"2025/{month:02}/photo{n}.jpg" for month in range(1, 13) for n in range(300)]
+        assert invalidation_paths(keys) == [f"/2025/{month:02}/*" for month in range(1, 13)]
+
+    def test_collapse_to_shallower_wildcards(self):
+        keys = [f"2025/{day}/{n}.jpg" for day in range(100) for n in range(40)]
+        assert invalidation_paths(keys) == ["/2025/*"]
+
+    def test_collapse_with_root_keys(self):
+        keys = [f"2025/{n}.jpg" for n in range(3000)] + ["index.html"]
+        assert invalidation_paths(keys) == ["/*"]
+
+
+class TestPrefixedStream:
+    def test_reads_prefix_then_stream(self):
+        stream = PrefixedStream(b"abc", io.BytesIO(b"defgh"))
+        assert stream.readable() is True
+        assert stream.read(2) == b"ab"
+        assert stream.read(3) == b"cde"
+        assert stream.read(10) == b"fgh"
+        assert stream.read(10) == b""
+
+    def test_read_all(self):
+        assert PrefixedStream(b"abc", io.BytesIO(b"def")).read() == b"abcdef"
+
+
+class TestBufferBody:
+    def test_reads_and_seeks(self):
+        body = BufferBody(memoryview(b"abcdefgh"))
+        assert (body.readable(), body.seekable(), len(body)) == (True, True, 8)
+        assert body.read(3) == b"abc"
+        assert body.tell() == 3
+        assert body.read() == b"defgh"
+        assert body.read(1) == b""
+        assert body.seek(-2, io.SEEK_END) == 6
+        assert body.read(None) == b"gh"
+        assert body.seek(-10, io.SEEK_CUR) == 0
+        assert body.read(2) == b"ab"
+
+    def test_reads_through_limiter(self):
+        limiter = Mock()
+        body = BufferBody(memoryview(b"abcdefgh"), limiter)
+        body.read(5)
+        body.read()
+        assert [c.args[0] for c in limiter.consume.call_args_list] == [5, 3]
+
+    def test_close_releases_the_view(self):
+        data = bytearray(b"abc")
+        view = memoryview(data)
+        with BufferBody(view[1:]) as body:
+            assert body.read() == b"bc"
+        view.release()  # would fail while a slice of it is still held
+        assert body.closed
@@ -0,0 +1,40 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks import __main__ as runner
+from benchmarks.fake_aws import FakeAWS
+from benchmarks.scenarios import BUCKET, Bench
+
+
+@pytest.mark.slow
+class TestBenchmarks:
+    def test_stand_in_behaves_like_s3(self):
+        credentials = {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test"}
+        with tempfile.TemporaryDirectory() as temp_dir, patch.dict(os.environ, credentials), FakeAWS() as fake:
+            (Path(temp_dir) / "a.txt").write_text("hello")
+            fake.seed(BUCKET, {"bench/sub/b.txt": (2, '"y"')})
+            aws = Bench(Path(temp_dir), fake.endpoint).aws()
+            aws.upload("bench/", Path(temp_dir) / "a.txt")
+
+            assert list(aws.list("bench/")) == ["a.txt", "sub/"]
+            assert aws.delete("bench/", "a.txt") is True
+            assert aws.delete("bench/", "a.txt") is False
+            assert fake.requests == {"PutObject": 1, "ListObjectsV2": 1, "HeadObject": 2, "DeleteObject": 1}
+
+    def test_smoke_run_reports_and_compares(self, capsys):
+        with tempfile.TemporaryDirectory() as temp_dir, patch.object(runner, "BASELINES", Path(temp_dir)):
+            baseline = Path(temp_dir) / "smoke.json"
+            assert runner.main(["--scale", "smoke", "--only", "list", "--save"]) == 0
+            saved = json.loads(baseline.read_text())
+            assert saved["results"]["list"]["requests_by_operation"] == {"ListObjectsV2": 3}
+
+            saved["results"]["list"]["requests"] = 1  # pretend it used to take fewer calls
+            baseline.write_text(json.dumps(saved))
+            assert runner.main(["--scale", "smoke", "--only", "list"]) == 1
+
+        assert "Regressions beyond 25% (marked !): list" in capsys.readouterr().out
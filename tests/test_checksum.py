@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import mmap
+import pathlib
+import sys
+import tempfile
+import zlib
+from unittest.mock import Mock, patch
+
+import pytest
+
+from sobe.checksum import checksum, mapped, release
+
+
+class TestChecksum:
+    def test_crc32(self):
+        assert checksum("CRC32", b"hello") == base64.b64encode(zlib.crc32(b"hello").to_bytes(4, "big")).decode()
+        assert checksum("CRC32", b"") == "AAAAAA=="
+
+    @pytest.mark.parametrize("algorithm", ["SHA1", "SHA256"])
+    def test_digests(self, algorithm):
+        expected = base64.b64encode(hashlib.new(algorithm.lower(), b"hello").digest()).decode()
+        assert checksum(algorithm, memoryview(b"hello")) == expected
+
+    def test_crc32c(self):
+        awscrt = Mock()
+        awscrt.checksums.crc32c.return_value = 0x9A71BB4C
+        with patch.dict(sys.modules, {"awscrt": awscrt, "awscrt.checksums": awscrt.checksums}):
+            assert checksum("CRC32C", b"hello") == "mnG7TA=="
+        awscrt.checksums.crc32c.assert_called_once_with(b"hello")
+
+    def test_crc32c_needs_awscrt(self):
+        with patch.dict(sys.modules, {"awscrt": None}), pytest.raises(ImportError, match="pip install awscrt"):
+            checksum("CRC32C", b"hello")
+
+
+class TestMapped:
+    def test_maps_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "data.bin"
+            path.write_bytes(b"0123456789")
+            with mapped(path) as view:
+                assert view.readonly
+                assert view[2:5] == b"234"
+
+    def test_empty_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "empty.bin"
+            path.touch()
+            with mapped(path) as view:
+                assert len(view) == 0
+
+    def test_release_keeps_contents(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "data.bin"
+            path.write_bytes(bytes(range(256)) * (3 * mmap.PAGESIZE // 256))
+            with mapped(path) as view:
+                release(view, 0, mmap.PAGESIZE)
+                release(view, 10, 2 * mmap.PAGESIZE)
+                release(view, 2 * mmap.PAGESIZE + 1, mmap.PAGESIZE)  # nothing left past the last boundary
+                assert bytes(view) == path.read_bytes()
+
+    def test_release_ignores_other_views(self):
+        release(memoryview(b"hello"), 0, 5)
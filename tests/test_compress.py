@@ -0,0 +1,89 @@
+import gzip
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sobe.compress import compress_file, prepare, should_compress
+from sobe.config import CompressionConfig
+
+TEXT = CompressionConfig(types=("text/*", "application/json"), min_size=10)
+
+
+class TestShouldCompress:
+    @pytest.mark.parametrize(
+        ("content_type", "size", "expected"),
+        [
+            ("text/html", 100, True),
+            ("text/html; charset=utf-8", 100, True),
+            ("Application/JSON", 100, True),
+            ("image/png", 100, False),
+            ("text/css", 5, False),
+        ],
+    )
+    def test_should_compress(self, content_type, size, expected):
+        assert should_compress(content_type, size, TEXT) is expected
+
+    def test_off_by_default(self):
+        assert not should_compress("text/html", 10**6, CompressionConfig())
+
+
+class TestCompressFile:
+    def test_gzip(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "page.html"
+            source.write_bytes(b"hello " * 1000)
+            output = compress_file(source, TEXT, Path(temp_dir))
+            assert output is not None
+            assert output.parent == Path(temp_dir)
+            assert gzip.decompress(output.read_bytes()) == b"hello " * 1000
+
+    def test_skips_when_savings_are_too_small(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "random.txt"
+            source.write_bytes(bytes(range(256)))
+            assert compress_file(source, TEXT, Path(temp_dir)) is None
+            assert list(Path(temp_dir).iterdir()) == [source]
+
+    def test_removes_output_on_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(FileNotFoundError):
+                compress_file(Path(temp_dir) / "missing.txt", TEXT, Path(temp_dir))
+            assert list(Path(temp_dir).iterdir()) == []
+
+    def test_brotli(self):
+        brotli = MagicMock()
+        brotli.Compressor.return_value.process.side_effect = lambda data: data[:1]
+        brotli.Compressor.return_value.finish.return_value = b"!"
+        with tempfile.TemporaryDirectory() as temp_dir, patch.dict(sys.modules, {"brotli": brotli}):
+            source = Path(temp_dir) / "page.html"
+            source.write_bytes(b"hello " * 1000)
+            output = compress_file(source, TEXT._replace(encoding="br"), Path(temp_dir))
+            assert output is not None
+            assert output.suffix == ".br"
+            assert output.read_bytes() == b"h!"
+        brotli.Compressor.assert_called_once_with(quality=11)
+
+    def test_brotli_missing(self):
+        with patch.dict(sys.modules, {"brotli": None}), pytest.raises(ImportError, match="pip install brotli"):
+            compress_file(Path("page.html"), TEXT._replace(encoding="br"))
+
+
+class TestPrepare:
+    def test_compresses_matching_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "data.json"
+            source.write_text("[" + "1," * 100 + "1]")
+            name, path, content_type, compressed = prepare(("data.json", source, "application/json"), TEXT)
+            assert (name, path, content_type) == ("data.json", source, "application/json")
+            assert compressed is not None
+            compressed.unlink()
+
+    def test_passes_other_files_through(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "photo.jpg"
+            source.write_bytes(b"\xff" * 100)
+            assert prepare(("photo.jpg", source, "image/jpeg"), TEXT) == ("photo.jpg", source, "image/jpeg", None)
+            assert prepare(("x", source, None), TEXT) == ("x", source, None, None)
@@ -1,3 +1,5 @@
+import datetime
+import re
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
@@ -10,28 +12,154 @@ class TestConfig:
         """Test Config.from_dict with all values provided."""
         raw = {
             "url": "https://test.example.com/",
+            "jobs": 16,
+            "confirm_delete": 50,
+            "content_types": {".md": "text/markdown"},
+            "compress": {"types": ["text/*"], "encoding": "br", "level": 5, "min_size": "4KB", "min_savings": 0.2},
+            "rules": {
+                "text/html": {"cache_control": "max-age=60"},
+                "*.iso": {"expires": 86400, "storage_class": "STANDARD_IA"},
+            },
             "aws": {
                 "bucket": "test-bucket",
                 "cloudfront": "E1234567890123",
+                "invalidation_timeout": 60,
+                "retry_mode": "adaptive",
+                "max_attempts": 10,
+                "checksum_algorithm": "SHA256",
                 "session": {"region_name": "us-west-2"},
                 "service": {"verify": False},
+                "transfer": {"multipart_threshold": "64MB", "multipart_chunksize": "auto", "max_concurrency": 4},
             },
         }
         result = config.Config.from_dict(raw)
 
         assert result.url == "https://test.example.com/"
+        assert result.jobs == 16
+        assert result.confirm_delete == 50
+        assert result.content_types == {".md": "text/markdown"}
+        assert result.compress == config.CompressionConfig(("text/*",), "br", 5, 4096, 0.2)
+        assert result.rules == {
+            "text/html": config.RuleConfig(cache_control="max-age=60"),
+            "*.iso": config.RuleConfig(expires=86400, storage_class="STANDARD_IA"),
+        }
         assert isinstance(result.aws, config.AWSConfig)
         assert result.aws.bucket == "test-bucket"
         assert result.aws.cloudfront == "E1234567890123"
+        assert result.aws.invalidation_timeout == 60
+        assert result.aws.retry_mode == "adaptive"
+        assert result.aws.max_attempts == 10
+        assert result.aws.checksum_algorithm == "SHA256"
+        assert result.aws.transfer == {
+            "multipart_threshold": 64 * 1024**2,
+            "multipart_chunksize": "auto",
+            "max_concurrency": 4,
+        }
 
     def test_from_dict_with_defaults(self):
         """Test Config.from_dict with default values."""
         result = config.Config.from_dict({})
 
         assert result.url == "https://example.com/"
+        assert result.jobs == 4
+        assert result.confirm_delete == 1000
+        assert result.content_types == {}
+        assert result.compress == config.CompressionConfig()
+        assert result.compress.types == ()
+        assert result.rules == {}
         assert isinstance(result.aws, config.AWSConfig)
         assert result.aws.bucket == "example-bucket"
         assert result.aws.cloudfront == "E1111111111111"
+        assert result.aws.transfer == {}
+        assert result.aws.invalidation_timeout == 1800
+        assert result.aws.retry_mode is None
+        assert result.aws.max_attempts is None
+        assert result.aws.checksum_algorithm is None
+
+    def test_from_dict_rejects_unknown_encoding(self):
+        with pytest.raises(config.ConfigError, match="compress.encoding"):
+            config.Config.from_dict({"compress": {"encoding": "zstd"}})
+
+    def test_from_dict_rejects_bad_retries(self):
+        with pytest.raises(config.ConfigError, match="aws.retry_mode"):
+            config.Config.from_dict({"aws": {"retry_mode": "eager"}})
+        with pytest.raises(config.ConfigError, match="aws.max_attempts"):
+            config.Config.from_dict({"aws": {"max_attempts": 0}})
+
+    @pytest.mark.parametrize(
+        ("raw", "key"),
+        [
+            ({"aws": {"transfer": {"multipart_chunksize": "abc"}}}, "aws.transfer.multipart_chunksize"),
+            ({"compress": {"min_size": "1XB"}}, "compress.min_size"),
+        ],
+    )
+    def test_from_dict_rejects_bad_sizes(self, raw, key):
+        with pytest.raises(config.ConfigError, match=f'{key} must be a number of bytes or a size like "8MB"'):
+            config.Config.from_dict(raw)
+
+    @pytest.mark.parametrize(
+        ("transfer", "message"),
+        [
+            ({"chunk_size": "16MB"}, "aws.transfer.chunk_size is not a setting; use one of: multipart_threshold"),
+            ({"max_concurrency": 0}, "aws.transfer.max_concurrency must be a whole number of at least 1, not 0"),
+            ({"max_concurrency": "4"}, "aws.transfer.max_concurrency must be a whole number"),
+            ({"max_concurrency": True}, "aws.transfer.max_concurrency must be a whole number"),
+        ],
+    )
+    def test_from_dict_rejects_bad_transfer_settings(self, transfer, message):
+        with pytest.raises(config.ConfigError, match=message):
+            config.Config.from_dict({"aws": {"transfer": transfer}})
+
+    def test_from_dict_rejects_unknown_checksum_algorithm(self):
+        with pytest.raises(config.ConfigError, match="aws.checksum_algorithm"):
+            config.Config.from_dict({"aws": {"checksum_algorithm": "MD5"}})
+
+    @pytest.mark.parametrize(
+        ("raw", "expected"),
+        [
+            ("Wed, 21 Oct 2026 07:28:00 GMT", datetime.datetime(2026, 10, 21, 7, 28, tzinfo=datetime.UTC)),
+            (datetime.datetime(2026, 10, 21, 7, 28), datetime.datetime(2026, 10, 21, 7, 28, tzinfo=datetime.UTC)),
+            (0, 0),
+        ],
+    )
+    def test_rule_expires(self, raw, expected):
+        assert config.Config.from_dict({"rules": {"*.pdf": {"expires": raw}}}).rules["*.pdf"].expires == expected
+
+    @pytest.mark.parametrize(
+        ("rule", "message"),
+        [
+            ({"cache_contrl": "max-age=60"}, "unknown settings: cache_contrl"),
+            ({"expires": "tomorrow"}, "not an HTTP date"),
+            ({"expires": -1}, "number of seconds"),
+            ({"expires": True}, "number of seconds"),
+            ({"expires": datetime.date(2026, 1, 1)}, "number of seconds"),
+            ({"storage_class": "COLD"}, "storage_class must be one of"),
+        ],
+    )
+    def test_from_dict_rejects_bad_rules(self, rule, message):
+        with pytest.raises(config.ConfigError, match=message):
+            config.Config.from_dict({"rules": {"*.pdf": rule}})
+
+
+class TestParseSize:
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (1234, 1234),
+            ("1234", 1234),
+            ("16KB", 16 * 1024),
+            ("8MB", 8 * 1024**2),
+            ("8 MiB", 8 * 1024**2),
+            ("1.5gb", 3 * 1024**3 // 2),
+        ],
+    )
+    def test_parse_size(self, value, expected):
+        assert config.parse_size(value) == expected
+
+    @pytest.mark.parametrize("value", ["abc", "", "8TB", ["8MB"]])
+    def test_invalid_size(self, value):
+        with pytest.raises(ValueError, match=re.escape(f"invalid size {value!r}: expected a number of bytes")):
+            config.parse_size(value)
 
 
 class TestLoadConfig:
@@ -52,6 +180,20 @@ class TestLoadConfig:
 
         assert result.aws.bucket == "not default"
 
+    def test_invalid_setting_names_the_file(self):
+        with (
+            patch("sobe.config.PlatformDirs", self.mock_pd),
+            patch("sobe.config.tomllib", self.mock_toml),
+            pytest.raises(config.ConfigError) as excinfo,
+        ):
+            self.path.exists.return_value = True
+            self.toml_result["aws"] = {"bucket": "not default", "retry_mode": "eager"}
+            config.load_config()
+
+        assert excinfo.value.path is self.path
+        assert excinfo.value.key == "aws.retry_mode"
+        assert str(excinfo.value) == f"{self.path}: aws.retry_mode must be one of: legacy, standard, adaptive"
+
     def test_file_does_not_exist(self):
         with (
             patch("sobe.config.PlatformDirs", self.mock_pd),
@@ -0,0 +1,46 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from sobe.dedup import HashIndex
+
+
+class TestHashIndex:
+    def test_missing_file_is_empty(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = HashIndex(Path(temp_dir) / "none.json")
+            assert index.get("abc") is None
+            index.save()
+            assert not index.path.exists()
+
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "dedup" / "bucket.json"
+            index = HashIndex(path)
+            index.add("abc", "2025/a.pdf")
+            index.add("def", "2025/b.pdf")
+            index.discard("def")
+            index.discard("missing")
+            index.save()
+
+            assert json.loads(path.read_text()) == {"abc": "2025/a.pdf"}
+            assert HashIndex(path).get("abc") == "2025/a.pdf"
+            assert not path.with_suffix(".tmp").exists()
+
+    def test_save_skips_unchanged(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "bucket.json"
+            path.write_text('{"abc": "2025/a.pdf"}')
+            index = HashIndex(path)
+            index.add("abc", "2025/a.pdf")
+            with patch("sobe.dedup.os.replace") as mock_replace:
+                index.save()
+            mock_replace.assert_not_called()
+
+    def test_for_bucket(self):
+        with patch("sobe.dedup.PlatformDirs") as mock_dirs:
+            mock_dirs.return_value.user_cache_path = Path("/cache/sobe")
+            index = HashIndex.for_bucket("my-bucket")
+        mock_dirs.assert_called_once_with("sobe")
+        assert index.path == Path("/cache/sobe/dedup/my-bucket.json")
@@ -0,0 +1,33 @@
+import io
+from unittest.mock import patch
+
+from sobe.filelist import read_entries, split
+
+
+class TestReadEntries:
+    def test_lines(self):
+        stream = io.BytesIO(b"a.txt\n\nsub/b.txt\tremote/b.txt\r\nlast.txt")
+        assert list(read_entries(stream)) == [("a.txt", ""), ("sub/b.txt", "remote/b.txt"), ("last.txt", "")]
+
+    def test_null_delimited(self):
+        stream = io.BytesIO(b"with\nnewline.txt\0\0mapped.txt\tother.txt\0")
+        assert list(read_entries(stream, null=True)) == [("with\nnewline.txt", ""), ("mapped.txt", "other.txt")]
+
+    def test_undecodable_names(self):
+        assert list(read_entries(io.BytesIO(b"caf\xe9.txt\n"))) == [("caf\udce9.txt", "")]
+
+    def test_reads_lazily(self):
+        stream = io.BytesIO(b"".join(b"%d.txt\n" % i for i in range(100_000)))
+        entries = read_entries(stream)
+        assert next(entries) == ("0.txt", "")
+        assert stream.tell() < len(stream.getvalue())
+
+
+class TestSplit:
+    def test_records_across_reads(self):
+        with patch("sobe.filelist.READ_SIZE", 4):
+            assert list(split(io.BytesIO(b"abc\0defghij\0\0k"), b"\0")) == [b"abc", b"defghij", b"", b"k"]
+
+    def test_trailing_separator(self):
+        assert list(split(io.BytesIO(b"a\0b\0"), b"\0")) == [b"a", b"b"]
+        assert list(split(io.BytesIO(b""), b"\0")) == []
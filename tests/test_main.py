@@ -1,12 +1,20 @@
+import datetime
+import gzip
+import io
+import json
 import tempfile
 from argparse import Namespace
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import ANY, Mock, patch
 
+import botocore.exceptions
 import pytest
 
-from sobe.config import Config, MustEditConfig
+from sobe.aws import ETagMismatch, InvalidationTimeout, RemoteObject
+from sobe.config import Config, ConfigError, MustEditConfig
 from sobe.main import main, parse_args
+from sobe.mime import ContentTypes
+from sobe.progress import Progress
 
 
 class TestParseArgs:
@@ -211,6 +219,246 @@ class TestParseArgs:
         with pytest.raises(SystemExit):
             parse_args(["--remote-name", "remote.txt", "--list"])  # list mode not compatible
 
+    def test_parse_args_jobs(self):
+        args = parse_args(["--jobs", "8", "--delete", "file1.txt"])
+        assert args.jobs == 8
+
+    def test_parse_args_jobs_invalid_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--jobs", "-1", "--delete", "file1.txt"])
+        with pytest.raises(SystemExit):
+            parse_args(["--jobs", "0", "--delete", "file1.txt"])
+
+    def test_parse_args_limit_rate(self):
+        assert parse_args(["--limit-rate", "2MB", "--delete", "file1.txt"]).limit_rate == 2 * 1024**2
+        assert parse_args(["--limit-rate", "500KB/s", "--delete", "file1.txt"]).limit_rate == 500 * 1024
+        assert parse_args(["--delete", "file1.txt"]).limit_rate is None
+
+    def test_parse_args_limit_rate_invalid_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--limit-rate", "0", "file1.txt"])
+        with pytest.raises(SystemExit):
+            parse_args(["--limit-rate", "fast", "file1.txt"])
+
+    def test_parse_args_sync(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            args = parse_args(["--sync", temp_dir, "--year", "2024", "--delete"])
+
+        assert args.sync == Path(temp_dir)
+        assert args.prefix == "2024/"
+        assert args.delete is True
+        assert args.paths == []
+
+    def test_parse_args_sync_not_a_directory_error(self):
+        with tempfile.NamedTemporaryFile() as f, pytest.raises(SystemExit):
+            parse_args(["--sync", f.name])
+
+    def test_parse_args_sync_with_files_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir, pytest.raises(SystemExit):
+            parse_args(["--sync", temp_dir, "file.txt"])
+
+    def test_parse_args_watch(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            args = parse_args(["--watch", temp_dir, "--exclude", "*.tmp", "--invalidate"])
+
+        assert args.watch == Path(temp_dir)
+        assert args.settle == 2.0
+        assert args.paths == []
+
+    @pytest.mark.parametrize(
+        "extra",
+        [["file.txt"], ["--delete"], ["--recursive"], ["--settle=-1"]],
+    )
+    def test_parse_args_watch_errors(self, extra):
+        with tempfile.TemporaryDirectory() as temp_dir, pytest.raises(SystemExit):
+            parse_args(["--watch", temp_dir, *extra])
+
+    def test_parse_args_watch_not_a_directory_error(self):
+        with tempfile.NamedTemporaryFile() as f, pytest.raises(SystemExit):
+            parse_args(["--watch", f.name])
+
+    def test_parse_args_settle_without_watch_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--settle", "5", "file.txt"])
+
+    def test_parse_args_from_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            args = parse_args(["--from-file", f.name, "-0", "--recursive", "--content-type", "text/plain"])
+        assert (args.from_file, args.null, args.paths) == (f.name, True, [])
+        assert parse_args(["--from-file", "-", "--delete"]).from_file == "-"
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["-0", "file.txt"],
+            ["--from-file", "-", "file.txt"],
+            ["--from-file", "-", "--remote-name", "x.txt"],
+            ["--from-file", "/nonexistent/list.txt"],
+        ],
+    )
+    def test_parse_args_from_file_errors(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    def test_parse_args_no_wait(self):
+        args = parse_args(["--invalidate", "--no-wait"])
+        assert args.no_wait is True
+
+    def test_parse_args_no_wait_without_invalidate_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--no-wait", "--delete", "file.txt"])
+
+    def test_parse_args_cleanup_incomplete(self):
+        args = parse_args(["--cleanup-incomplete", "--year", "2024"])
+        assert args.cleanup_incomplete is True
+        assert args.prefix == "2024/"
+        assert args.paths == []
+        assert args.older_than == datetime.timedelta(days=1)
+
+    @pytest.mark.parametrize(
+        ("age", "expected"),
+        [("12h", datetime.timedelta(hours=12)), ("7D", datetime.timedelta(days=7)), ("90", datetime.timedelta(0, 90))],
+    )
+    def test_parse_args_older_than(self, age, expected):
+        args = parse_args(["--cleanup-incomplete", f"--older-than={age}", "-y", "2024"])
+        assert args.older_than == expected
+        assert parse_args(["--cleanup-incomplete", "--older-than", "0"]).older_than == datetime.timedelta(0)
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["--cleanup-incomplete", "--list"],
+            ["--older-than", "1d", "--list"],
+            ["--cleanup-incomplete", "--older-than=-1h"],
+            ["--cleanup-incomplete", "--older-than", "soon"],
+            ["--cleanup-incomplete", "--older-than", "infd"],
+        ],
+    )
+    def test_parse_args_cleanup_incomplete_errors(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    @pytest.mark.parametrize("argv", [["--dedup", "--delete", "a.txt"], ["--dedup", "-l"], ["--dedup", "-r", "x", "-"]])
+    def test_parse_args_dedup_only_for_file_uploads(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    def test_parse_args_invalidation_status(self):
+        args = parse_args(["--invalidation-status", "I2J0I21PCUYOIK"])
+        assert args.invalidation_status == "I2J0I21PCUYOIK"
+
+    def test_parse_args_invalidation_status_with_other_args_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["--invalidation-status", "I2J0I21PCUYOIK", "--invalidate"])
+
+    def test_parse_args_recursive(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            args = parse_args(["-R", temp_dir, "--include", "*.jpg", "--exclude", ".git"])
+
+        assert args.recursive is True
+        assert args.include == ["*.jpg"]
+        assert args.exclude == [".git"]
+
+    def test_parse_args_directory_without_recursive_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir, pytest.raises(SystemExit):
+            parse_args([temp_dir])
+
+    def test_parse_args_recursive_delete(self):
+        args = parse_args(["--delete", "--year", "2021/tmp/", "--recursive"])
+        assert (args.remote_delete, args.prefix, args.paths) == (True, "2021/tmp/", [])
+        args = parse_args(["-R", "--delete", "--dry-run", "old"])
+        assert (args.remote_delete, args.dry_run, args.files) == (True, True, ["old"])
+
+    def test_parse_args_sync_delete_dry_run_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir, pytest.raises(SystemExit):
+            parse_args(["--sync", temp_dir, "--delete", "--dry-run"])
+
+    def test_parse_args_glob_delete(self):
+        args = parse_args(["--delete", "--yes", "pattern*.log"])
+        assert (args.remote_delete, args.yes) == (True, True)
+        assert parse_args(["--delete", "a.txt"]).remote_delete is False
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["--dry-run", "--delete", "a.txt"],
+            ["--yes", "a.txt"],
+            ["--copy", "a", "b", "-n"],
+            ["--move", "a/", "b/", "-R", "--yes"],
+            ["--watch", ".", "--dry-run"],
+            ["-R", "--delete", "--from-file", "-"],
+            ["-R", "--list"],
+            ["--year", "2021", "--delete"],
+        ],
+    )
+    def test_parse_args_remote_delete_errors(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    def test_parse_args_copy_and_move(self):
+        args = parse_args(["--year", "", "--move", "2024/a.pdf", "2025/"])
+        assert (args.move, args.copy, args.prefix, args.paths) == (["2024/a.pdf", "2025/"], None, "", [])
+        args = parse_args(["--copy", "old", "new", "-R", "--include", "*.jpg", "--invalidate"])
+        assert (args.copy, args.recursive, args.include) == (["old", "new"], True, ["*.jpg"])
+        assert parse_args(["--copy", "a", "ab", "-R"]).copy == ["a", "ab"]
+        assert parse_args(["--copy", "a", "a/b"]).copy == ["a", "a/b"]
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["--copy", "a", "b", "--move", "a", "c"],
+            ["--copy", "a", "b", "file.txt"],
+            ["--move", "a", "b", "--delete"],
+            ["--copy", "a", "b", "--content-type", "text/plain"],
+            ["--copy", "a", "/"],
+            ["--move", "dir/", "dir"],
+            ["--move", "dir/x", "dir/"],
+            ["--move", "a/", "a/b/", "-R"],
+            ["--copy", "a", "a/b/c", "--recursive"],
+        ],
+    )
+    def test_parse_args_copy_errors(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    def test_parse_args_get(self):
+        args = parse_args(["--get", "-y", "2024", "a.iso", "photos/b.jpg", "--limit-rate", "1MB", "-j", "4"])
+        assert (args.get, args.files, args.prefix, args.paths) == (True, ["a.iso", "photos/b.jpg"], "2024/", [])
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["--get"],
+            ["--get", "--list"],
+            ["--get", "a.iso", "--delete"],
+            ["--get", "a.iso", "-R"],
+            ["--get", "a.iso", "--invalidate"],
+            ["--get", "a.iso", "--dry-run"],
+            ["--get", "photos/"],
+            ["--get", "--copy", "a", "b"],
+        ],
+    )
+    def test_parse_args_get_errors(self, argv):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+    def test_parse_args_recursive_without_files_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["-R"])
+
+    def test_parse_args_include_without_recursive_error(self):
+        with tempfile.NamedTemporaryFile() as f, pytest.raises(SystemExit):
+            parse_args(["--include", "*.txt", f.name])
+
+    def test_parse_args_stdin(self):
+        args = parse_args(["--remote-name", "dump.sql.zst", "-"])
+        assert args.files == ["-"]
+        assert args.paths == [Path("-")]
+
+    def test_parse_args_stdin_without_remote_name_error(self):
+        with pytest.raises(SystemExit):
+            parse_args(["-"])
+
     def test_parse_args_version_flag(self):
         # Argparse's --version action should exit cleanly with code 0
         with pytest.raises(SystemExit) as risen:
@@ -218,7 +466,7 @@ class TestParseArgs:
         assert risen.value.code == 0
 
 
-@patch("sobe.main.AWS")
+@patch("sobe.aws.AWS", **{"return_value.upload.return_value": None})
 @patch("sobe.main.load_config")
 @patch("sobe.main.parse_args")
 class TestMain:
@@ -235,6 +483,29 @@ class TestMain:
         lst=False,
         content_type=None,
         remote_name=None,
+        jobs=None,
+        sync=None,
+        no_wait=False,
+        invalidation_status=None,
+        recursive=False,
+        include=(),
+        exclude=(),
+        dedup=False,
+        cleanup_incomplete=False,
+        older_than=None,
+        stats=False,
+        stats_json=None,
+        no_progress=False,
+        watch=None,
+        settle=None,
+        from_file=None,
+        null=False,
+        limit_rate=None,
+        dry_run=False,
+        yes=False,
+        copy=None,
+        move=None,
+        get=False,
     ) -> Namespace:
         return Namespace(
             policy=policy,
@@ -245,6 +516,31 @@ class TestMain:
             list=lst,
             content_type=content_type,
             remote_name=remote_name,
+            jobs=jobs,
+            sync=sync,
+            no_wait=no_wait,
+            invalidation_status=invalidation_status,
+            recursive=recursive,
+            include=list(include),
+            exclude=list(exclude),
+            dedup=dedup,
+            cleanup_incomplete=cleanup_incomplete,
+            older_than=older_than,
+            stats=stats,
+            stats_json=stats_json,
+            no_progress=no_progress,
+            watch=watch,
+            settle=settle,
+            from_file=from_file,
+            null=null,
+            limit_rate=limit_rate,
+            dry_run=dry_run,
+            yes=yes,
+            copy=copy,
+            move=move,
+            get=get,
+            remote_delete=delete and (recursive or any(c in f for f in files for c in "*?[")),
+            files=list(files),
             paths=list(map(Path, files)),
         )
 
@@ -257,6 +553,17 @@ class TestMain:
 
         mock_print.assert_any_call("Created config file at the path below. You must edit it before use.")
 
+    def test_invalid_config(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args()
+        mock_load_config.side_effect = ConfigError("jobs", "must be at least 1", Path("config.toml"))
+
+        with patch("sobe.main.print") as mock_print, pytest.raises(SystemExit) as excinfo:
+            main()
+
+        assert excinfo.value.code == 1
+        mock_print.assert_called_once_with("Invalid config: config.toml: jobs must be at least 1")
+        mock_aws_class.assert_not_called()
+
     def test_main_policy_mode(self, mock_parse_args, mock_load_config, mock_aws_class):
         mock_parse_args.return_value = self._mock_args(policy=True)
         mock_load_config.return_value = Config.from_dict({})
@@ -273,7 +580,30 @@ class TestMain:
         with patch("sobe.main.write") as mock_write, patch("sobe.main.print") as mock_print:
             main()
         mock_write.assert_called_once_with("https://example.com/2025/test.txt ...")
-        mock_aws_class().upload.assert_called_once_with("2025/", Path("test.txt"), None, content_type=None)
+        mock_aws_class().upload.assert_called_once_with(
+            "2025/", Path("test.txt"), "test.txt", content_type=None, dedup=False, progress=None
+        )
+        mock_print.assert_called_once_with("ok.")
+
+    def test_main_upload_shows_progress(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().upload.side_effect = lambda *args, progress, **kwargs: progress(2048)
+        stream = io.StringIO()
+        progress = Progress(stream, inline=True)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "big.iso"
+            path.write_bytes(b"\0" * 4096)
+            mock_parse_args.return_value = self._mock_args(str(path))
+            with (
+                patch("sobe.main.write"),
+                patch("sobe.main.print") as mock_print,
+                patch("sobe.progress.Progress.for_terminal", return_value=progress) as for_terminal,
+            ):
+                main()
+
+        for_terminal.assert_called_once_with(enabled=True)
+        assert stream.getvalue().startswith("\rhttps://example.com/2025/big.iso ... 2.0 KB/4.0 KB 50%")
+        assert stream.getvalue().endswith("\rhttps://example.com/2025/big.iso ...\033[K")  # cleared for the status
         mock_print.assert_called_once_with("ok.")
 
     def test_main_delete_mode_existing_file(self, mock_parse_args, mock_load_config, mock_aws_class):
@@ -305,18 +635,170 @@ class TestMain:
         mock_aws_class().invalidate_cache.return_value = iter(["Created", "Completed"])
         with patch("sobe.main.write") as _mock_write, patch("sobe.main.print") as _mock_print:
             main()
+        mock_aws_class().invalidate_cache.assert_called_once_with(None)
         _mock_write.assert_any_call("Clearing cache...")
         _mock_write.assert_any_call(".")
         _mock_print.assert_called_with("complete.")
 
+    def test_main_upload_invalidates_only_touched(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a.txt", "b.txt", "c.txt", delete=True, invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().delete_many.return_value = {"a.txt": True, "b.txt": False, "c.txt": True}
+        mock_aws_class().invalidate_cache.return_value = iter(["Created"])
+        with patch("sobe.main.write"), patch("sobe.main.print"):
+            main()
+        mock_aws_class().invalidate_cache.assert_called_once_with(["2025/a.txt", "2025/c.txt"])
+
+    def test_main_invalidate_no_wait(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(invalidate=True, no_wait=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().create_invalidation.return_value = "I123"
+        with patch("sobe.main.print") as mock_print:
+            main()
+        mock_aws_class().create_invalidation.assert_called_once_with(None)
+        mock_aws_class().invalidate_cache.assert_not_called()
+        mock_print.assert_called_once_with(
+            "Cache invalidation I123 started. Check it with: sobe --invalidation-status I123"
+        )
+
+    def test_main_invalidate_timeout(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().invalidate_cache.side_effect = InvalidationTimeout("I123", "InProgress")
+        with patch("sobe.main.write"), patch("sobe.main.print") as mock_print, pytest.raises(SystemExit) as risen:
+            main()
+        assert risen.value.code == 1
+        mock_print.assert_called_with("It is still running on AWS. Check it with: sobe --invalidation-status I123")
+
+    def test_main_invalidation_status(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(invalidation_status="I123")
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().invalidation_status.return_value = "InProgress"
+        with patch("sobe.main.print") as mock_print:
+            main()
+        mock_aws_class().invalidation_status.assert_called_once_with("I123")
+        mock_print.assert_called_once_with("I123: InProgress")
+
+    def test_main_invalidate_nothing_changed(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a.txt", delete=True, invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().delete.return_value = False
+        with patch("sobe.main.write"), patch("sobe.main.print") as mock_print:
+            main()
+        mock_aws_class().invalidate_cache.assert_not_called()
+        mock_print.assert_called_with("Nothing changed, cache left as is.")
+
     def test_main_multiple_files(self, mock_parse_args, mock_load_config, mock_aws_class):
         mock_parse_args.return_value = self._mock_args("file1.txt", "file2.txt")
         mock_load_config.return_value = Config.from_dict({})
         with patch("sobe.main.write") as _mock_write, patch("sobe.main.print") as _mock_print:
             main()
         assert mock_aws_class().upload.call_count == 2
-        mock_aws_class().upload.assert_any_call("2025/", Path("file1.txt"), None, content_type=None)
-        mock_aws_class().upload.assert_any_call("2025/", Path("file2.txt"), None, content_type=None)
+        mock_aws_class().upload.assert_any_call(
+            "2025/", Path("file1.txt"), "file1.txt", content_type=None, dedup=False, progress=None
+        )
+        mock_aws_class().upload.assert_any_call(
+            "2025/", Path("file2.txt"), "file2.txt", content_type=None, dedup=False, progress=None
+        )
+        _mock_print.assert_called_with("2 files: 2 ok.")
+
+    def test_main_jobs_sizes_aws_pool(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("file1.txt", jobs=7)
+        mock_load_config.return_value = Config.from_dict({})
+        with patch("sobe.main.write"), patch("sobe.main.print"):
+            main()
+        mock_aws_class.assert_called_with(
+            mock_load_config.return_value.aws,
+            jobs=7,
+            content_types=ANY,
+            hash_index=None,
+            stats=None,
+            limiter=None,
+            rules=ANY,
+        )
+
+    def test_main_rules(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("page.html")
+        mock_load_config.return_value = Config.from_dict({"rules": {"text/html": {"cache_control": "max-age=60"}}})
+        with patch("sobe.main.write"), patch("sobe.main.print"):
+            main()
+        rules = mock_aws_class.call_args.kwargs["rules"]
+        assert rules.extra_args("page.html", "text/html") == {"CacheControl": "max-age=60"}
+
+    def test_main_limit_rate(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("file1.txt", limit_rate=2_000_000)
+        mock_load_config.return_value = Config.from_dict({})
+        with patch("sobe.main.write"), patch("sobe.main.print"):
+            main()
+        assert mock_aws_class.call_args.kwargs["limiter"].rate == 2_000_000
+
+    def test_main_stats(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stats_json = Path(temp_dir) / "stats.json"
+            mock_parse_args.return_value = self._mock_args("test.txt", stats=True, stats_json=stats_json)
+            mock_load_config.return_value = Config.from_dict({})
+            with patch("sobe.main.write"), patch("sobe.main.print") as mock_print:
+                main()
+            stats = mock_aws_class.call_args.kwargs["stats"]
+            assert json.loads(stats_json.read_text())["requests"] == 0
+        mock_print.assert_called_with(stats.report())
+
+    def test_main_cleanup_incomplete(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(cleanup_incomplete=True, older_than=datetime.timedelta(days=1))
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().abort_incomplete.return_value = iter(["2025/big.iso"])
+        before = datetime.datetime.now(datetime.UTC)
+        with patch("sobe.main.print") as mock_print:
+            main()
+        mock_aws_class().abort_incomplete.assert_called_once_with("2025/", started_before=ANY)
+        cutoff = mock_aws_class().abort_incomplete.call_args.kwargs["started_before"]
+        assert before - datetime.timedelta(days=1) <= cutoff <= datetime.datetime.now(datetime.UTC)
+        mock_print.assert_called_once_with("https://example.com/2025/big.iso ...aborted.")
+
+    def test_main_cleanup_incomplete_nothing_found(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(cleanup_incomplete=True, older_than=datetime.timedelta(0))
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().abort_incomplete.return_value = iter([])
+        with patch("sobe.main.print") as mock_print:
+            main()
+        assert mock_print.call_args.args[0].startswith("No incomplete uploads under https://example.com/2025/ started")
+
+    def test_main_dedup(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a.pdf", "b.pdf", dedup=True)
+        mock_load_config.return_value = Config.from_dict({})
+        # uploads run in parallel, so the result goes by name rather than by call order
+        mock_aws_class().upload.side_effect = lambda prefix, path, name, **kwargs: (
+            "2024/a.pdf" if name == "b.pdf" else None
+        )
+        with (
+            patch("sobe.dedup.HashIndex.for_bucket") as mock_for_bucket,
+            patch("sobe.main.write"),
+            patch("sobe.main.print") as mock_print,
+        ):
+            main()
+        mock_for_bucket.assert_called_once_with("example-bucket")
+        assert mock_aws_class.call_args.kwargs["hash_index"] is mock_for_bucket.return_value
+        mock_aws_class().upload.assert_any_call(
+            "2025/", Path("b.pdf"), "b.pdf", content_type=None, dedup=True, progress=None
+        )
+        mock_print.assert_any_call("ok (copy of 2024/a.pdf).")
+        mock_print.assert_called_with("2 files: 1 ok, 1 ok (copy of 2024/a.pdf).")
+        mock_for_bucket.return_value.save.assert_called_once_with()
+
+    def test_main_parallel_output_order(self, mock_parse_args, mock_load_config, mock_aws_class):
+        names = [f"file{i}.txt" for i in range(20)]
+        mock_parse_args.return_value = self._mock_args(*names, delete=True, jobs=4)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().delete_many.return_value = {name: name != "file3.txt" for name in names}
+        with patch("sobe.main.write") as mock_write, patch("sobe.main.print") as mock_print:
+            main()
+        assert [c.args[0] for c in mock_write.call_args_list] == [f"https://example.com/2025/{n} ..." for n in names]
+        statuses = [c.args[0] for c in mock_print.call_args_list]
+        assert statuses[3] == "didn't exist."
+        assert statuses[:3] == ["deleted."] * 3
+        assert statuses[-1] == "20 files: 19 deleted, 1 didn't exist."
+        mock_aws_class().delete_many.assert_called_once_with("2025/", names, jobs=4)
+        mock_aws_class().delete.assert_not_called()
 
     def test_main_upload_with_content_type(self, mock_parse_args, mock_load_config, mock_aws_class):
         mock_parse_args.return_value = self._mock_args("custom.bin", content_type="application/x-bin")
@@ -326,7 +808,7 @@ class TestMain:
             main()
         _mock_write.assert_called_once_with("https://example.com/2025/custom.bin ...")
         mock_aws_class().upload.assert_called_once_with(
-            "2025/", Path("custom.bin"), None, content_type="application/x-bin"
+            "2025/", Path("custom.bin"), "custom.bin", content_type="application/x-bin", dedup=False, progress=None
         )
         _mock_print.assert_called_once_with("ok.")
 
@@ -359,5 +841,495 @@ class TestMain:
         with patch("sobe.main.write") as _mock_write, patch("sobe.main.print") as _mock_print:
             main()
         _mock_write.assert_called_once_with("https://example.com/2025/remote.txt ...")
-        mock_aws_class().upload.assert_called_once_with("2025/", Path("local.txt"), "remote.txt", content_type=None)
+        mock_aws_class().upload.assert_called_once_with(
+            "2025/", Path("local.txt"), "remote.txt", content_type=None, dedup=False, progress=None
+        )
         _mock_print.assert_called_once_with("ok.")
+
+    def test_main_move(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(year="", move=["2024/a.pdf", "2025/"], invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().copy.return_value = True
+        with patch("sobe.main.print") as mock_print, patch("sobe.main.write"):
+            main()
+        mock_aws_class().copy.assert_called_once_with("2024/a.pdf", "2025/a.pdf", move=True)
+        mock_print.assert_any_call("https://example.com/2024/a.pdf -> https://example.com/2025/a.pdf ...moved.")
+        mock_aws_class().invalidate_cache.assert_called_once_with(["2024/a.pdf", "2025/a.pdf"])
+
+    def test_main_copy_not_found(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(copy=["a.pdf", "b.pdf"], invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().copy.return_value = False
+        with patch("sobe.main.print") as mock_print, pytest.raises(SystemExit):
+            main()
+        mock_aws_class().copy.assert_called_once_with("2025/a.pdf", "2025/b.pdf", move=False)
+        assert [c.args[0] for c in mock_print.call_args_list] == [
+            "https://example.com/2025/a.pdf -> https://example.com/2025/b.pdf ...not found.",
+            "Nothing changed, cache left as is.",
+        ]
+        mock_aws_class().invalidate_cache.assert_not_called()
+
+    def test_main_get(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a.iso", "photos/b.jpg", "gone.txt", get=True, jobs=4)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().download.side_effect = [True, ETagMismatch("2025/photos/b.jpg", "mismatch"), False]
+        with patch("sobe.main.print") as mock_print, patch("sobe.main.write") as mock_write, pytest.raises(SystemExit):
+            main()
+        assert [(c.args[0], c.args[1], c.kwargs["jobs"]) for c in mock_aws_class().download.call_args_list] == [
+            ("2025/a.iso", Path("a.iso"), 4),
+            ("2025/photos/b.jpg", Path("b.jpg"), 4),
+            ("2025/gone.txt", Path("gone.txt"), 4),
+        ]
+        mock_write.assert_any_call("https://example.com/2025/photos/b.jpg ...")
+        assert [c.args[0] for c in mock_print.call_args_list] == [
+            "ok.",
+            "ETag mismatch.",
+            "not found.",
+            "3 files: 1 ok, 1 ETag mismatch, 1 not found.",
+        ]
+
+    def test_main_get_one(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a.iso", get=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().download.return_value = True
+        with patch("sobe.main.print") as mock_print, patch("sobe.main.write"):
+            main()
+        mock_print.assert_called_once_with("ok.")
+
+    def test_main_copy_recursive(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(
+            copy=["photos/", "archive"], recursive=True, exclude=["*.tmp"], jobs=2, invalidate=True
+        )
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().list_keys.return_value = iter(
+            ["2025/photos/", "2025/photos/a.jpg", "2025/photos/x.tmp", "2025/photos/sub/b.jpg"]
+        )
+        mock_aws_class().copy.return_value = True
+        with patch("sobe.main.print") as mock_print, patch("sobe.main.write"):
+            main()
+        mock_aws_class().list_keys.assert_called_once_with("2025/photos/")
+        assert [c.args[0] for c in mock_print.call_args_list[:3]] == [
+            "https://example.com/2025/photos/a.jpg -> https://example.com/2025/archive/a.jpg ...copied.",
+            "https://example.com/2025/photos/sub/b.jpg -> https://example.com/2025/archive/sub/b.jpg ...copied.",
+            "2 files: 2 copied.",
+        ]
+        mock_aws_class().invalidate_cache.assert_called_once_with(["2025/archive/a.jpg", "2025/archive/sub/b.jpg"])
+
+    def test_main_move_recursive_nothing_found(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(move=["old", "new"], recursive=True)
+        mock_load_config.return_value = Config.from_dict({})
+        mock_aws_class().list_keys.return_value = iter([])
+        with patch("sobe.main.print") as mock_print:
+            main()
+        mock_print.assert_called_once_with("No files under https://example.com/2025/old/")
+
+    def _delete_matching(self, mock_aws_class, *, keys):
+        mock_aws_class().list_keys.side_effect = lambda prefix, recursive: (k for k in keys if k.startswith(prefix))
+        mock_aws_class().delete_batches.side_effect = lambda keys, jobs: iter([list(keys)])
+        with patch("sobe.main.print") as mock_print:
+            main()
+        return [c.args[0] for c in mock_print.call_args_list]
+
+    def test_main_delete_recursive(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(delete=True, recursive=True, year="2021/tmp", invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2021/tmp/a.log", "2021/tmp/sub/b.log", "2021/other.log"]
+
+        printed = self._delete_matching(mock_aws_class, keys=keys)
+
+        mock_aws_class().list_keys.assert_called_once_with("2021/tmp/", recursive=True)
+        assert printed[:3] == [
+            "https://example.com/2021/tmp/a.log ...deleted.",
+            "https://example.com/2021/tmp/sub/b.log ...deleted.",
+            "2 files deleted.",
+        ]
+        mock_aws_class().invalidate_cache.assert_called_once_with(["2021/tmp/a.log", "2021/tmp/sub/b.log"])
+
+    def test_main_delete_glob(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("logs/a*", "logs/b?.txt", "logs/ab*", delete=True)
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2025/logs/a1.txt", "2025/logs/b1.txt", "2025/logs/b10.txt", "2025/logs/c.txt"]
+
+        printed = self._delete_matching(mock_aws_class, keys=keys)
+
+        # each glob is first looked up as an exact name; logs/ab* is covered by the listing of logs/a
+        assert [c.args[0] for c in mock_aws_class().list_keys.call_args_list] == [
+            "2025/logs/a*",
+            "2025/logs/b?.txt",
+            "2025/logs/ab*",
+            "2025/logs/a",
+            "2025/logs/b",
+        ]
+        assert mock_aws_class().list_keys.call_args.kwargs == {"recursive": False}
+        assert printed[-1] == "2 files deleted."
+        assert mock_aws_class().delete_batches.call_count == 1
+
+    def test_main_delete_globs_in_subdirectories(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("a*", "a/b*", delete=True)
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2025/a.txt", "2025/a/b.txt"]
+        # without --recursive, a listing only has what's directly under the prefix
+        mock_aws_class().list_keys.side_effect = lambda prefix, recursive: (
+            k for k in keys if k.startswith(prefix) and "/" not in k[len(prefix) :]
+        )
+        mock_aws_class().delete_batches.side_effect = lambda keys, jobs: iter([list(keys)])
+        with patch("sobe.main.print") as mock_print:
+            main()
+
+        assert [c.args[0] for c in mock_aws_class().list_keys.call_args_list][-2:] == ["2025/a", "2025/a/b"]
+        assert mock_print.call_args_list[-1].args[0] == "2 files deleted."
+
+    def test_main_delete_bracketed_name(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("photo[1].jpg", "photo[2].jpg", delete=True)
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2025/photo[1].jpg", "2025/photo1.jpg", "2025/photo2.jpg"]
+
+        printed = self._delete_matching(mock_aws_class, keys=keys)
+
+        # photo[1].jpg exists, so it's taken literally; photo[2].jpg doesn't, so it's a glob
+        assert printed == [
+            "https://example.com/2025/photo[1].jpg ...deleted.",
+            "https://example.com/2025/photo2.jpg ...deleted.",
+            "2 files deleted.",
+        ]
+
+    def test_main_delete_bracketed_directory(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("set[1]", delete=True, recursive=True)
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2025/set[1]/a.jpg", "2025/set1/b.jpg"]
+
+        printed = self._delete_matching(mock_aws_class, keys=keys)
+
+        assert printed == ["https://example.com/2025/set[1]/a.jpg ...deleted.", "1 file deleted."]
+
+    def test_main_delete_recursive_matches_directories(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("old/", delete=True, recursive=True, exclude=["*.keep"])
+        mock_load_config.return_value = Config.from_dict({})
+        keys = ["2025/old", "2025/old/a.txt", "2025/old/b.keep", "2025/older/c.txt", "2025/"]
+
+        printed = self._delete_matching(mock_aws_class, keys=keys)
+
+        assert printed == [
+            "https://example.com/2025/old ...deleted.",
+            "https://example.com/2025/old/a.txt ...deleted.",
+            "2 files deleted.",
+        ]
+
+    def test_main_delete_nothing_matches(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("*.tmp", delete=True, invalidate=True)
+        mock_load_config.return_value = Config.from_dict({})
+
+        printed = self._delete_matching(mock_aws_class, keys=["2025/a.txt"])
+
+        assert printed == ["No files match under https://example.com/2025/", "Nothing changed, cache left as is."]
+
+    def test_main_delete_dry_run(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("*.log", delete=True, dry_run=True)
+        mock_load_config.return_value = Config.from_dict({"confirm_delete": 0})
+
+        printed = self._delete_matching(mock_aws_class, keys=["2025/a.log"])
+
+        assert printed == ["https://example.com/2025/a.log ...would be deleted.", "1 file would be deleted."]
+        mock_aws_class().delete_batches.assert_not_called()
+
+    def test_main_delete_over_threshold_without_terminal(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(delete=True, recursive=True)
+        mock_load_config.return_value = Config.from_dict({"confirm_delete": 1})
+
+        with patch("sobe.main.sys.stdin.isatty", return_value=False), pytest.raises(SystemExit):
+            self._delete_matching(mock_aws_class, keys=["2025/a", "2025/b"])
+
+        mock_aws_class().delete_batches.assert_not_called()
+
+    @pytest.mark.parametrize(("answer", "deleted"), [("y", True), ("no", False), (EOFError, False)])
+    def test_main_delete_over_threshold_asks(self, mock_parse_args, mock_load_config, mock_aws_class, answer, deleted):
+        mock_parse_args.return_value = self._mock_args(delete=True, recursive=True)
+        mock_load_config.return_value = Config.from_dict({"confirm_delete": 1})
+
+        with (
+            patch("sobe.main.sys.stdin.isatty", return_value=True),
+            patch("builtins.input", side_effect=[answer]) as mock_input,
+        ):
+            if deleted:
+                printed = self._delete_matching(mock_aws_class, keys=["2025/a", "2025/b"])
+                assert printed[-1] == "2 files deleted."
+            else:
+                with pytest.raises(SystemExit):
+                    self._delete_matching(mock_aws_class, keys=["2025/a", "2025/b"])
+                mock_aws_class().delete_batches.assert_not_called()
+        mock_input.assert_called_once_with(
+            "More than 1 files match under https://example.com/2025/. Delete them all? [y/N] "
+        )
+
+    def test_main_delete_over_threshold_yes(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args(delete=True, recursive=True, yes=True)
+        mock_load_config.return_value = Config.from_dict({"confirm_delete": 1})
+
+        with patch("builtins.input") as mock_input:
+            printed = self._delete_matching(mock_aws_class, keys=["2025/a", "2025/b"])
+
+        mock_input.assert_not_called()
+        assert printed[-1] == "2 files deleted."
+
+    def test_main_watch(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "old.txt").write_text("already there")
+            watcher = Mock(method="polling")
+            watcher.__enter__ = Mock(return_value=watcher)
+            watcher.__exit__ = Mock(return_value=None)
+
+            def wait(timeout):
+                if watcher.wait.call_count == 1:
+                    (root / "new.txt").write_text("new")
+                    return {"new.txt", "old.txt", "gone.txt"}
+                if watcher.wait.call_count == 2:
+                    return {"new.txt"}  # written again, with the same contents
+                raise KeyboardInterrupt
+
+            watcher.wait.side_effect = wait
+            mock_aws_class().create_invalidation.return_value = "I123"
+            mock_parse_args.return_value = self._mock_args(watch=root, settle=0, invalidate=True, no_wait=True)
+            mock_load_config.return_value = Config.from_dict({})
+
+            with patch("sobe.watch.open_watcher", return_value=watcher), patch("sobe.main.print") as mock_print:
+                main()
+
+        mock_aws_class().upload.assert_called_once_with(
+            "2025/", root / "new.txt", "new.txt", dedup=False, progress=None
+        )
+        mock_aws_class().create_invalidation.assert_called_once_with(["2025/new.txt"])
+        assert [c.args[0] for c in mock_print.call_args_list] == [
+            f"Watching {root} for changes (polling). Press Ctrl+C to stop.",
+            "https://example.com/2025/new.txt ...ok.",
+            "Cache invalidation I123 started. Check it with: sobe --invalidation-status I123",
+            "Stopped watching.",
+        ]
+
+    def test_main_watch_keeps_going_after_a_failed_upload(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            watcher = Mock(method="polling")
+            watcher.__enter__ = Mock(return_value=watcher)
+            watcher.__exit__ = Mock(return_value=None)
+
+            def wait(timeout):
+                if watcher.wait.call_count == 1:
+                    (root / "a.txt").write_text("a")
+                    return {"a.txt"}
+                if watcher.wait.call_count in (2, 3):
+                    return {"a.txt"}  # unchanged, but not uploaded yet, so it's tried again
+                raise KeyboardInterrupt
+
+            watcher.wait.side_effect = wait
+            error = botocore.exceptions.ClientError({"Error": {"Code": "AccessDenied"}}, "PutObject")
+            mock_aws_class().upload.side_effect = [PermissionError("denied"), error, None]
+            mock_parse_args.return_value = self._mock_args(watch=root, settle=0)
+            mock_load_config.return_value = Config.from_dict({})
+
+            with patch("sobe.watch.open_watcher", return_value=watcher), patch("sobe.main.print") as mock_print:
+                main()
+
+        assert mock_aws_class().upload.call_count == 3
+        assert [c.args[0] for c in mock_print.call_args_list] == [
+            f"Watching {root} for changes (polling). Press Ctrl+C to stop.",
+            "https://example.com/2025/a.txt ...failed: denied",
+            (
+                "https://example.com/2025/a.txt ...failed: An error occurred (AccessDenied) when calling the PutObject"
+                " operation: Unknown"
+            ),
+            "https://example.com/2025/a.txt ...ok.",
+            "Stopped watching.",
+        ]
+
+    def test_main_watch_invalidates_when_stopped(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            watcher = Mock(method="inotify")
+            watcher.__enter__ = Mock(return_value=watcher)
+            watcher.__exit__ = Mock(return_value=None)
+
+            def wait(timeout):
+                if watcher.wait.call_count == 1:
+                    (root / "a.txt").write_text("a")
+                    return {"a.txt"}
+                raise KeyboardInterrupt
+
+            watcher.wait.side_effect = wait
+            mock_aws_class().create_invalidation.return_value = "I123"
+            mock_parse_args.return_value = self._mock_args(watch=root, settle=0, invalidate=True, no_wait=True)
+            mock_load_config.return_value = Config.from_dict({})
+
+            with (
+                patch("sobe.watch.open_watcher", return_value=watcher),
+                patch("sobe.watch.Debouncer.quiet", return_value=False),
+                patch("sobe.main.print"),
+            ):
+                main()
+
+        mock_aws_class().create_invalidation.assert_called_once_with(["2025/a.txt"])
+
+    def test_main_sync(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "same.txt").write_text("same")
+            (root / "new.txt").write_text("new")
+            (root / "sub").mkdir()
+            (root / "sub" / "changed.txt").write_text("changed")
+            later = datetime.datetime.now(datetime.UTC) + datetime.timedelta(hours=1)
+            mock_aws_class().list_objects.return_value = [
+                RemoteObject("2025/same.txt", 4, later, ""),
+                RemoteObject("2025/sub/changed.txt", 1, later, ""),
+                RemoteObject("2025/gone.txt", 1, later, ""),
+                RemoteObject("2025/folder/", 0, later, ""),
+            ]
+            mock_aws_class().transfer_config.return_value = Mock(multipart_threshold=100, multipart_chunksize=100)
+            mock_aws_class().delete_keys.side_effect = lambda keys, jobs: len(list(keys))
+            mock_parse_args.return_value = self._mock_args(sync=root, delete=True)
+            mock_load_config.return_value = Config.from_dict({})
+
+            with patch("sobe.main.print") as mock_print:
+                main()
+
+        mock_aws_class().list_objects.assert_called_once_with("2025/")
+        assert mock_aws_class().upload.call_count == 2
+        mock_aws_class().upload.assert_any_call("2025/", root / "new.txt", "new.txt", dedup=False, progress=None)
+        mock_aws_class().upload.assert_any_call(
+            "2025/", root / "sub" / "changed.txt", "sub/changed.txt", dedup=False, progress=None
+        )
+        mock_aws_class().delete_keys.assert_called_once()
+        mock_print.assert_any_call("https://example.com/2025/gone.txt ...deleted.")
+        mock_print.assert_called_with("Sync: 2 uploaded, 1 unchanged, 1 deleted.")
+
+    def test_main_recursive(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "photos"
+            (root / "trip").mkdir(parents=True)
+            (root / "trip" / "a.jpg").write_text("a")
+            (root / "notes.txt").write_text("n")
+            single = Path(temp_dir) / "single.txt"
+            single.write_text("s")
+            args = self._mock_args(str(root), f"{root}/", str(single), recursive=True, include=["*.jpg"], jobs=2)
+            mock_aws_class().content_types = ContentTypes()
+            mock_parse_args.return_value = args
+            mock_load_config.return_value = Config.from_dict({})
+
+            with patch("sobe.main.write") as mock_write, patch("sobe.main.print") as mock_print:
+                main()
+
+        assert [c.args[0] for c in mock_write.call_args_list] == [
+            "https://example.com/2025/photos/trip/a.jpg ...",
+            "https://example.com/2025/trip/a.jpg ...",
+            "https://example.com/2025/single.txt ...",
+        ]
+        upload = mock_aws_class().upload
+        upload.assert_any_call(
+            "2025/", root / "trip" / "a.jpg", "photos/trip/a.jpg", content_type="image/jpeg", dedup=False, progress=None
+        )
+        upload.assert_any_call("2025/", single, "single.txt", content_type="text/plain", dedup=False, progress=None)
+        mock_print.assert_called_with("3 files: 3 ok.")
+
+    def test_main_upload_stdin(self, mock_parse_args, mock_load_config, mock_aws_class):
+        mock_parse_args.return_value = self._mock_args("-", remote_name="dump.sql")
+        mock_load_config.return_value = Config.from_dict({})
+        with patch("sobe.main.write") as mock_write, patch("sobe.main.print"), patch("sobe.main.sys") as mock_sys:
+            main()
+        mock_write.assert_called_once_with("https://example.com/2025/dump.sql ...")
+        mock_aws_class().upload_stream.assert_called_once_with(
+            "2025/", mock_sys.stdin.buffer, "dump.sql", content_type=None, progress=None
+        )
+        mock_aws_class().upload.assert_not_called()
+
+    def test_main_from_file(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "a.txt").write_text("a")
+            (root / "b.txt").write_text("b")
+            (root / "dir").mkdir()
+            listing = root / "list.txt"
+            listing.write_text(f"{root}/a.txt\n{root}/missing.txt\n{root}/dir\n{root}/b.txt\tdocs/b.txt\n")
+            mock_aws_class().create_invalidation.return_value = "I123"
+            mock_parse_args.return_value = self._mock_args(
+                from_file=str(listing), content_type="text/plain", invalidate=True, no_wait=True
+            )
+            mock_load_config.return_value = Config.from_dict({})
+
+            with (
+                patch("sobe.main.write") as mock_write,
+                patch("sobe.main.print") as mock_print,
+                pytest.raises(SystemExit) as risen,
+            ):
+                main()
+
+        assert risen.value.code == 1
+        assert [c.args[0] for c in mock_write.call_args_list] == [
+            "https://example.com/2025/a.txt ...",
+            "https://example.com/2025/missing.txt ...",
+            "https://example.com/2025/dir ...",
+            "https://example.com/2025/docs/b.txt ...",
+        ]
+        assert [c.args[0] for c in mock_print.call_args_list][:5] == [
+            "ok.",
+            "not found.",
+            "is a directory.",
+            "ok.",
+            "4 files: 2 ok, 1 not found, 1 is a directory.",
+        ]
+        mock_aws_class().upload.assert_any_call(
+            "2025/", root / "b.txt", "docs/b.txt", content_type="text/plain", dedup=False, progress=None
+        )
+        mock_aws_class().create_invalidation.assert_called_once_with(["2025/a.txt", "2025/docs/b.txt"])
+
+    def test_main_from_stdin_recursive(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "site" / "css").mkdir(parents=True)
+            (root / "site" / "css" / "style.css").write_text("p {}")
+            mock_parse_args.return_value = self._mock_args(from_file="-", null=True, recursive=True)
+            mock_load_config.return_value = Config.from_dict({})
+            mock_aws_class().content_types = ContentTypes()
+
+            with patch("sobe.main.write") as mock_write, patch("sobe.main.print"), patch("sobe.main.sys") as mock_sys:
+                mock_sys.stdin.buffer = io.BytesIO(f"{root}/site\twww/\0".encode())
+                main()
+
+        mock_write.assert_called_once_with("https://example.com/2025/www/css/style.css ...")
+
+    def test_main_delete_from_file(self, mock_parse_args, mock_load_config, mock_aws_class):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as listing:
+            listing.write("a.txt\nb.txt\n")
+            listing.flush()
+            mock_parse_args.return_value = self._mock_args(from_file=listing.name, delete=True)
+            mock_load_config.return_value = Config.from_dict({})
+            mock_aws_class().delete.side_effect = [True, False]
+            with patch("sobe.main.write"), patch("sobe.main.print") as mock_print:
+                main()
+
+        mock_aws_class().delete_many.assert_not_called()
+        assert mock_print.call_args_list[-1].args[0] == "2 files: 1 deleted, 1 didn't exist."
+
+    def test_main_compresses_matching_types(self, mock_parse_args, mock_load_config, mock_aws_class):
+        uploaded = {}
+
+        def upload(prefix, path, name, *, content_type, content_encoding="", dedup=False, progress=None):
+            uploaded[name] = (path.read_bytes(), content_type, content_encoding)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            page = Path(temp_dir) / "page.html"
+            page.write_text("<p>hello</p>" * 1000)
+            photo = Path(temp_dir) / "photo.jpg"
+            photo.write_bytes(b"\xff\xd8" * 1000)
+            mock_parse_args.return_value = self._mock_args(str(page), str(photo), jobs=2)
+            mock_load_config.return_value = Config.from_dict({"compress": {"types": ["text/*"]}})
+            mock_aws_class().content_types = ContentTypes()
+            mock_aws_class().upload.side_effect = upload
+
+            with patch("sobe.main.write"), patch("sobe.main.print") as mock_print:
+                main()
+
+        body, content_type, encoding = uploaded["page.html"]
+        assert gzip.decompress(body) == b"<p>hello</p>" * 1000
+        assert (content_type, encoding) == ("text/html", "gzip")
+        assert uploaded["photo.jpg"][1:] == ("image/jpeg", "")
+        mock_print.assert_any_call("ok (gzip).")
+        mock_print.assert_called_with("2 files: 1 ok (gzip), 1 ok.")
@@ -0,0 +1,62 @@
+import pathlib
+import tempfile
+from unittest.mock import patch
+
+from sobe import mime
+
+
+class TestContentTypes:
+    def test_guess_by_extension(self):
+        assert mime.ContentTypes().guess(pathlib.Path("photo.JPG")) == "image/jpeg"
+
+    def test_compound_extension(self):
+        assert mime.ContentTypes().guess_by_name("archive.2024.tar.gz") == "application/x-tar"
+
+    def test_memoized_per_extension(self):
+        content_types = mime.ContentTypes()
+        with patch("mimetypes.guess_type", return_value=("text/plain", None)) as mock_guess_type:
+            assert content_types.guess_by_name("a.txt") == "text/plain"
+            assert content_types.guess_by_name("b.TXT") == "text/plain"
+        mock_guess_type.assert_called_once()
+
+    def test_overrides(self):
+        content_types = mime.ContentTypes({"md": "text/markdown; charset=utf-8", ".tar.gz": "application/gzip"})
+        assert content_types.guess_by_name("README.md") == "text/markdown; charset=utf-8"
+        assert content_types.guess_by_name("x.tar.gz") == "application/gzip"
+
+    def test_no_extension_sniffs_header_only(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "screenshot"
+            path.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(100_000))
+            with patch("puremagic.magic_string", wraps=__import__("puremagic").magic_string) as mock_magic:
+                assert mime.ContentTypes().guess(path) == "image/png"
+
+        assert len(mock_magic.call_args.args[0]) == mime.HEADER_SIZE
+
+    def test_guess_stream(self):
+        content_types = mime.ContentTypes()
+        assert content_types.guess_stream("backup.json", b"") == "application/json"
+        assert content_types.guess_stream("dump", b"%PDF-1.4" + bytes(100)) == "application/pdf"
+
+
+class TestSniff:
+    def test_unknown(self):
+        assert mime.sniff(b"zz\xffzzqqq") == "application/octet-stream"
+        assert mime.sniff(b"zzzz\0qqq") == "application/octet-stream"
+
+    def test_text(self):
+        assert mime.sniff(b"all:\n\tmake -C src\n") == "text/plain"
+        assert mime.sniff("Café, naï".encode()[:-1]) == "text/plain"  # cut in the middle of the "ï"
+
+    def test_license_without_extension(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "LICENSE"
+            path.write_text("MIT License\n\nPermission is hereby granted, free of charge, to any person...\n" * 200)
+            assert mime.ContentTypes().guess(path) == "text/plain"
+
+    def test_empty(self):
+        assert mime.sniff(b"") == "application/octet-stream"
+
+
+def test_guess_content_type():
+    assert mime.guess_content_type(pathlib.Path("index.html")) == "text/html"
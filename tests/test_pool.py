@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+from sobe.pool import batched, ordered_map
+
+
+class TestOrderedMap:
+    def test_sequential(self):
+        assert list(ordered_map(str.upper, ["a", "b"], 1)) == ["A", "B"]
+
+    def test_parallel_keeps_input_order(self):
+        def slow_first(n):
+            time.sleep(0.02 if n == 0 else 0)
+            return n * 2
+
+        assert list(ordered_map(slow_first, range(10), 4)) == [n * 2 for n in range(10)]
+
+    def test_parallel_uses_threads(self):
+        seen = set()
+
+        def record(n):
+            seen.add(threading.get_ident())
+            time.sleep(0.01)
+            return n
+
+        list(ordered_map(record, range(8), 4))
+        assert len(seen) > 1
+
+    def test_processes(self):
+        assert list(ordered_map(abs, [-3, 2, -1], 2, processes=True)) == [3, 2, 1]
+
+    def test_bounded_lookahead(self):
+        consumed = []
+
+        def source():
+            for n in range(100):
+                consumed.append(n)
+                yield n
+
+        results = ordered_map(lambda n: n, source(), 2)
+        assert next(results) == 0
+        assert len(consumed) <= 4
+        results.close()
+
+    def test_exception_propagates(self):
+        def fail_on_three(n):
+            if n == 3:
+                raise ValueError(n)
+            return n
+
+        with pytest.raises(ValueError):
+            list(ordered_map(fail_on_three, range(10), 3))
+
+
+class TestBatched:
+    def test_batches(self):
+        assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_empty(self):
+        assert list(batched([], 3)) == []
@@ -0,0 +1,120 @@
+import collections
+import io
+from unittest.mock import patch
+
+from sobe.progress import Progress, describe, format_duration, rate
+from tests.helpers import Clock
+
+MIB = 1024**2
+
+
+def make_progress(**kwargs) -> tuple[Progress, io.StringIO, Clock]:
+    stream, clock = io.StringIO(), Clock()
+    return Progress(stream, clock=clock, **kwargs), stream, clock
+
+
+class TestProgress:
+    def test_disabled(self):
+        progress, stream, _ = make_progress(enabled=False)
+        assert progress.track("2025/a.iso", MIB) is None
+        progress.finish("2025/a.iso")
+        with progress.paused():
+            progress.begin_line("2025/a.iso", "https://example.com/2025/a.iso ...")
+        assert stream.getvalue() == ""
+
+    def test_continues_output_line(self):
+        progress, stream, clock = make_progress(inline=True)
+        callback = progress.track("2025/a.iso", 4 * MIB)
+        with progress.paused():
+            progress.begin_line("2025/a.iso", "https://example.com/2025/a.iso ...")
+
+        clock.now = 1.0
+        callback(MIB)
+
+        assert stream.getvalue() == "\rhttps://example.com/2025/a.iso ... 1.0 MB/4.0 MB 25% 1.0 MB/s ETA 0:03\033[K"
+
+    def test_rate_limited(self):
+        progress, stream, clock = make_progress(interval=0.2)
+        callback = progress.track("2025/a.iso", 100 * MIB)
+        redraws = []
+        for tick in range(1, 101):
+            clock.now = tick * 0.01  # a chunk every 10 ms
+            callback(MIB)
+            redraws.append(stream.getvalue().count("\r"))
+        assert redraws[-1] == 5  # at 0.01, 0.21, 0.41, 0.61, 0.81 seconds
+
+    def test_aggregate_of_concurrent_transfers(self):
+        progress, stream, clock = make_progress(interval=0)
+        first = progress.track("2025/a.iso", 2 * MIB)
+        second = progress.track("2025/b.iso", 2 * MIB)
+        with progress.paused():
+            progress.begin_line("2025/a.iso", "https://example.com/2025/a.iso ...")
+
+        clock.now = 1.0
+        first(MIB)
+        clock.now = 2.0
+        second(MIB)
+
+        last = stream.getvalue().split("\r")[-1]
+        assert last == "1.0 MB/2.0 MB 50% 512.0 KB/s ETA 0:02 | 2 active: 2.0 MB/4.0 MB 50% 1.0 MB/s ETA 0:02\033[K"
+
+    def test_unknown_total(self):
+        progress, stream, clock = make_progress()
+        callback = progress.track("2025/dump", None)
+        clock.now = 2.0
+        callback(MIB)
+        assert stream.getvalue() == "\r1 active: 1.0 MB 512.0 KB/s\033[K"
+
+    def test_paused_restores_line(self):
+        progress, stream, clock = make_progress(inline=True, interval=0)
+        callback = progress.track("2025/a.iso", MIB)
+        with progress.paused():
+            progress.begin_line("2025/a.iso", "https://example.com/2025/a.iso ...")
+        clock.now = 1.0
+        callback(1024)
+        progress.finish("2025/a.iso")
+        stream.truncate(0)
+        stream.seek(0)
+
+        with progress.paused():
+            assert stream.getvalue() == "\rhttps://example.com/2025/a.iso ...\033[K"
+        with progress.paused():
+            pass  # nothing drawn since
+        assert stream.getvalue() == "\rhttps://example.com/2025/a.iso ...\033[K"
+
+    def test_not_inline_leaves_output_line_alone(self):
+        progress, stream, clock = make_progress(inline=False)
+        callback = progress.track("2025/a.iso", MIB)
+        with progress.paused():
+            progress.begin_line("2025/a.iso", "https://example.com/2025/a.iso ...")
+        clock.now = 1.0
+        callback(MIB)
+        assert stream.getvalue() == "\r1.0 MB/1.0 MB 100% 1.0 MB/s ETA 0:00\033[K"
+
+    def test_for_terminal(self):
+        with patch("sobe.progress.sys") as mock_sys:
+            mock_sys.stderr.isatty.return_value = True
+            mock_sys.stdout.isatty.return_value = False
+            progress = Progress.for_terminal()
+            assert (progress.stream, progress.enabled, progress.inline) == (mock_sys.stderr, True, False)
+            assert not Progress.for_terminal(enabled=False).enabled
+            mock_sys.stderr.isatty.return_value = False
+            assert not Progress.for_terminal().enabled
+
+
+class TestHelpers:
+    def test_rate_over_recent_window(self):
+        samples = collections.deque([(0.0, 0), (1.0, 100), (9.0, 100), (10.0, 200)])
+        assert rate(samples, 10.0) == 100 / 9
+        assert list(samples) == [(1.0, 100), (9.0, 100), (10.0, 200)]
+
+    def test_rate_without_elapsed_time(self):
+        assert rate(collections.deque([(1.0, 0)]), 1.0) == 0.0
+
+    def test_describe(self):
+        assert describe(0, 0, 0.0) == "0 B 0 B/s"
+        assert describe(MIB, 4 * MIB, 0.0) == "1.0 MB/4.0 MB 25% 0 B/s"
+
+    def test_format_duration(self):
+        assert format_duration(4.6) == "0:05"
+        assert format_duration(3725) == "1:02:05"
@@ -0,0 +1,79 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sobe.resume import DownloadState, UploadState
+
+
+class TestUploadState:
+    def test_location(self):
+        with patch("sobe.resume.PlatformDirs") as mock_dirs:
+            mock_dirs.return_value.user_cache_path = Path("/cache/sobe")
+            first = UploadState.location("bucket", "2025/a.iso", Path("/data/a.iso"))
+            other_key = UploadState.location("bucket", "2026/a.iso", Path("/data/a.iso"))
+        mock_dirs.assert_called_with("sobe")
+        assert first.parent == Path("/cache/sobe/uploads")
+        assert first.suffix == ".json"
+        assert first != other_key
+
+    def test_save_record_and_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "uploads" / "state.json"
+            state = UploadState(path, upload_id="abc", size=20, mtime_ns=123, part_size=8)
+            state.save()
+            state.record(2, '"e2"')
+            state.record(1, '"e1"', "crc1")
+
+            loaded = UploadState.load(path)
+            assert loaded is not None
+            assert (loaded.upload_id, loaded.parts) == ("abc", {1: '"e1"', 2: '"e2"'})
+            assert loaded.checksums == {1: "crc1"}
+            assert loaded.matches(20, 123, 8)
+            assert not loaded.matches(20, 124, 8)
+            assert not loaded.matches(20, 123, 8, "CRC32")
+
+            loaded.remove()
+            loaded.remove()
+            assert not path.exists()
+
+    @pytest.mark.parametrize("content", [None, "not json", "[]", '{"upload_id": "abc"}'])
+    def test_load_unusable(self, content):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "state.json"
+            if content is not None:
+                path.write_text(content)
+            assert UploadState.load(path) is None
+
+
+class TestDownloadState:
+    def test_location(self):
+        assert DownloadState.location(Path("/data/a.iso")) == Path("/data/a.iso.sobe-download")
+
+    def test_save_record_and_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "a.iso.sobe-download"
+            state = DownloadState(path, etag='"abc-2"', size=20, piece_size=0)
+            state.save()
+            state.record(2, "md5-2", 8)
+            state.record(1, "md5-1", 12)
+
+            loaded = DownloadState.load(path)
+            assert loaded is not None
+            assert (loaded.pieces, loaded.received) == ({1: "md5-1", 2: "md5-2"}, 20)
+            assert loaded.matches('"abc-2"', 20, 0)
+            assert not loaded.matches('"abc-2"', 20, 8)
+            assert not loaded.matches('"def-2"', 20, 0)
+
+            loaded.remove()
+            loaded.remove()
+            assert not path.exists()
+
+    @pytest.mark.parametrize("content", [None, "not json", "[]", '{"etag": "abc"}'])
+    def test_load_unusable(self, content):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "a.iso.sobe-download"
+            if content is not None:
+                path.write_text(content)
+            assert DownloadState.load(path) is None
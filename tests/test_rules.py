@@ -0,0 +1,41 @@
+import datetime
+
+from sobe.config import RuleConfig
+from sobe.rules import Rules
+
+NOW = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+
+
+class TestRules:
+    def test_no_rules(self):
+        assert Rules().extra_args("index.html", "text/html") == {}
+
+    def test_by_content_type(self):
+        rules = Rules({"Text/*": RuleConfig(cache_control="max-age=60")})
+        assert rules.extra_args("index.html", "text/html; charset=utf-8") == {"CacheControl": "max-age=60"}
+        assert rules.extra_args("text/logo.png", "image/png") == {}
+
+    def test_by_name(self):
+        rules = Rules({"assets/*": RuleConfig(storage_class="GLACIER_IR"), "*.iso": RuleConfig(expires=60)})
+        assert rules.extra_args("assets/app.3f2a.js", "text/javascript") == {"StorageClass": "GLACIER_IR"}
+        expires = rules.extra_args("images/debian.iso", "application/x-iso9660-image")["Expires"]
+        assert expires.tzinfo == datetime.UTC
+        assert rules.extra_args("app.js", "text/javascript") == {}
+
+    def test_expiry_counts_from_each_upload(self):
+        now = [NOW]
+        rules = Rules({"*.pdf": RuleConfig(expires=3600)}, clock=lambda: now[0])
+        assert rules.extra_args("a.pdf", "application/pdf") == {"Expires": NOW + datetime.timedelta(hours=1)}
+        now[0] += datetime.timedelta(days=3)  # a --watch running for days
+        assert rules.extra_args("a.pdf", "application/pdf") == {"Expires": NOW + datetime.timedelta(days=3, hours=1)}
+
+    def test_later_rules_override(self):
+        fixed = datetime.datetime(2027, 1, 1, tzinfo=datetime.UTC)
+        rules = Rules(
+            {
+                "*": RuleConfig(cache_control="max-age=300", expires=fixed),
+                "text/html": RuleConfig(cache_control="no-cache"),
+            }
+        )
+        assert rules.extra_args("index.html", "text/html") == {"CacheControl": "no-cache", "Expires": fixed}
+        assert rules.extra_args("a.css", "text/css") == {"CacheControl": "max-age=300", "Expires": fixed}
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+# Generous enough for slow CI machines, yet well under what importing boto3 alone costs.
+IMPORT_BUDGET_US = 150_000
+HEAVY_MODULES = ("boto3", "botocore", "s3transfer", "urllib3", "puremagic")
+MARKER = "-- sobe startup --"
+
+
+def import_times(code: str, env: dict[str, str] | None = None) -> dict[str, int]:
+    """Run code in a fresh interpreter with -X importtime. Returns top-level imports made by the code itself."""
+    script = f"import sys; sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush()\n{code}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **(env or {})},
+    )
+    lines = result.stderr.splitlines()
+    times = {}
+    for line in lines[lines.index(MARKER) + 1 :]:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.rstrip()] = int(cumulative)
+    return times
+
+
+def assert_fast(times: dict[str, int]) -> None:
+    heavy = [name.strip() for name in times if name.strip().split(".")[0] in HEAVY_MODULES]
+    assert heavy == [], f"non-network path imported {heavy}"
+    total = sum(us for name, us in times.items() if not name.startswith(" "))
+    assert total < IMPORT_BUDGET_US, f"imports took {total} us, budget is {IMPORT_BUDGET_US} us"
+
+
+@pytest.mark.slow
+class TestStartup:
+    def test_import_main(self):
+        assert_fast(import_times("import sobe.main"))
+
+    def test_help(self):
+        assert_fast(
+            import_times("from sobe.main import parse_args\ntry: parse_args(['--help'])\nexcept SystemExit: pass")
+        )
+
+    def test_version(self):
+        times = import_times(
+            "from sobe.main import parse_args\ntry: parse_args(['--version'])\nexcept SystemExit: pass"
+        )
+        assert "importlib.metadata" in [name.strip() for name in times]
+        assert_fast(times)
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="XDG_CONFIG_HOME only redirects platformdirs on Linux")
+    def test_must_edit_config(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            code = "from sobe.main import main\ntry: main()\nexcept SystemExit: pass"
+            assert_fast(import_times(code, {"XDG_CONFIG_HOME": temp_dir}))
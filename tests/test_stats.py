@@ -0,0 +1,99 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import botocore.hooks
+import pytest
+
+from sobe.stats import RequestStats, body_size, format_bytes, percentile
+
+
+def attached_client(stats: RequestStats) -> Mock:
+    client = Mock()
+    client.meta.events = botocore.hooks.HierarchicalEmitter()
+    stats.attach(client)
+    return client
+
+
+def call(client: Mock, operation: str, *, body=None, status: int | None = 200, retries: int = 0) -> None:
+    """Emit the events botocore emits around one API call."""
+    context: dict = {}
+    model = Mock()
+    model.name = operation
+    events = client.meta.events
+    events.emit(f"before-call.s3.{operation}", model=model, params={"body": body}, context=context)
+    if status is None:
+        events.emit(f"after-call-error.s3.{operation}", exception=ConnectionError(), context=context)
+    else:
+        parsed = {"ResponseMetadata": {"HTTPStatusCode": status, "RetryAttempts": retries}}
+        events.emit(
+            f"after-call.s3.{operation}", http_response=Mock(status_code=status), parsed=parsed, context=context
+        )
+
+
+class TestRequestStats:
+    def test_records_calls(self):
+        with patch("sobe.stats.time.perf_counter", side_effect=[0.0, 1.0, 1.25, 2.0, 2.5, 3.0, 3.1, 10.0]):
+            stats = RequestStats()
+            client = attached_client(stats)
+            call(client, "PutObject", body=b"x" * 2048, retries=2)
+            call(client, "PutObject", body=None, status=503)
+            call(client, "HeadObject", status=None)
+            summary = stats.summary()
+
+        assert summary["requests"] == 3
+        assert summary["bytes_sent"] == 2048
+        assert summary["elapsed_seconds"] == 10.0
+        assert summary["operations"]["PutObject"] == {
+            "count": 2,
+            "errors": 1,
+            "retries": 2,
+            "bytes_sent": 2048,
+            "statuses": {"200": 1, "503": 1},
+            "latency_ms": {"p50": 250.0, "p95": 500.0, "max": 500.0},
+        }
+        assert summary["operations"]["HeadObject"]["statuses"] == {"none": 1}
+
+    def test_ignores_calls_started_before_attaching(self):
+        stats = RequestStats()
+        client = attached_client(stats)
+        client.meta.events.emit("after-call-error.s3.PutObject", exception=ConnectionError(), context={})
+        assert stats.calls == []
+
+    def test_report_and_json(self):
+        stats = RequestStats()
+        client = attached_client(stats)
+        call(client, "PutObject", body=b"abc")
+        report = stats.report()
+        assert report.splitlines()[0].split() == ["API", "calls", "p50", "p95", "retries", "errors", "sent"]
+        assert report.splitlines()[1].split()[:2] == ["PutObject", "1"]
+        assert report.splitlines()[-1].startswith("1 requests in ")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "stats.json"
+            stats.write_json(path)
+            assert json.loads(path.read_text())["operations"]["PutObject"]["bytes_sent"] == 3
+
+
+@pytest.mark.parametrize(("fraction", "expected"), [(0.0, 1), (0.5, 2), (0.95, 4), (1.0, 4)])
+def test_percentile(fraction, expected):
+    assert percentile([1, 2, 3, 4], fraction) == expected
+
+
+def test_body_size():
+    assert body_size(None) == 0
+    assert body_size(b"abc") == 3
+    assert body_size(iter([b"a"])) == 0
+    stream = io.BytesIO(b"abcdef")
+    stream.seek(2)
+    assert body_size(stream) == 4
+    assert stream.tell() == 2
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"), [(512, "512 B"), (2048, "2.0 KB"), (5 * 1024**2, "5.0 MB"), (3 * 1024**3, "3.0 GB")]
+)
+def test_format_bytes(size, expected):
+    assert format_bytes(size) == expected
@@ -0,0 +1,62 @@
+import datetime
+import hashlib
+import os
+import pathlib
+import tempfile
+
+from sobe import sync
+from sobe.aws import RemoteObject
+
+
+def remote_for(path: pathlib.Path, *, seconds_after: float, etag: str = "") -> RemoteObject:
+    stat = path.stat()
+    modified = datetime.datetime.fromtimestamp(stat.st_mtime + seconds_after, datetime.UTC)
+    return RemoteObject(path.name, stat.st_size, modified, etag)
+
+
+class TestIsUnchanged:
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.temp_dir.name) / "file.txt"
+        self.path.write_bytes(b"hello world")
+        self.md5 = hashlib.md5(b"hello world").hexdigest()
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_missing_remote(self):
+        assert sync.is_unchanged(self.path, None, 100, 100) is False
+
+    def test_different_size(self):
+        remote = remote_for(self.path, seconds_after=60)._replace(size=3)
+        assert sync.is_unchanged(self.path, remote, 100, 100) is False
+
+    def test_remote_newer_trusted_without_hashing(self):
+        remote = remote_for(self.path, seconds_after=60, etag="not-checked")
+        assert sync.is_unchanged(self.path, remote, 100, 100) is True
+
+    def test_local_newer_same_content(self):
+        remote = remote_for(self.path, seconds_after=-60, etag=self.md5)
+        assert sync.is_unchanged(self.path, remote, 100, 100) is True
+
+    def test_local_newer_different_content(self):
+        remote = remote_for(self.path, seconds_after=-60, etag="0" * 32)
+        assert sync.is_unchanged(self.path, remote, 100, 100) is False
+
+
+class TestLocalEtag:
+    def test_single_part(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "f"
+            path.write_bytes(b"x" * 10)
+            assert sync.local_etag(path, 11, 4) == hashlib.md5(b"x" * 10).hexdigest()
+
+    def test_multipart(self):
+        data = os.urandom(10)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "f"
+            path.write_bytes(data)
+            etag = sync.local_etag(path, 10, 4)
+
+        parts = [hashlib.md5(data[i : i + 4]).digest() for i in (0, 4, 8)]
+        assert etag == f"{hashlib.md5(b''.join(parts)).hexdigest()}-3"
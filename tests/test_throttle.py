@@ -0,0 +1,34 @@
+from sobe.throttle import RateLimiter
+from tests.helpers import Clock
+
+
+def make_limiter(rate: float, burst: float | None = None) -> tuple[RateLimiter, Clock]:
+    clock = Clock()
+    return RateLimiter(rate, burst=burst, clock=clock, sleep=clock.sleep), clock
+
+
+class TestRateLimiter:
+    def test_bursts_then_waits(self):
+        limiter, clock = make_limiter(100)
+        limiter.consume(100)
+        assert clock.slept == []
+        limiter.consume(50)
+        assert clock.slept == [0.5]
+        limiter.consume(100)
+        assert clock.slept == [0.5, 1.0]
+
+    def test_refills_while_idle(self):
+        limiter, clock = make_limiter(100, burst=200)
+        limiter.consume(200)
+        clock.now = 10.0  # refills only up to the burst
+        limiter.consume(200)
+        assert clock.slept == []
+        limiter.consume(100)
+        assert clock.slept == [1.0]
+
+    def test_ignores_resent_bytes(self):
+        limiter, clock = make_limiter(100)
+        limiter.consume(100)
+        limiter.consume(-100)
+        limiter.consume(0)
+        assert clock.slept == []
@@ -0,0 +1,60 @@
+import os
+import pathlib
+import tempfile
+
+import pytest
+
+from sobe import walk
+
+
+class TestWalk:
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.temp_dir.name)
+        for name in ["a.txt", "b/c.txt", "b/d.log", "b/e/f.txt", ".git/config", "node_modules/x/y.js"]:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def names(self, **kwargs) -> set[str]:
+        return {name for name, _ in walk.walk(self.root, **kwargs)}
+
+    def test_all_files(self):
+        assert self.names() == {"a.txt", "b/c.txt", "b/d.log", "b/e/f.txt", ".git/config", "node_modules/x/y.js"}
+
+    def test_paths(self):
+        assert dict(walk.walk(self.root))["b/e/f.txt"] == self.root / "b" / "e" / "f.txt"
+
+    def test_exclude_prunes_directories(self):
+        assert self.names(exclude=[".git", "node_modules"]) == {"a.txt", "b/c.txt", "b/d.log", "b/e/f.txt"}
+
+    def test_include(self):
+        assert self.names(include=["*.txt"]) == {"a.txt", "b/c.txt", "b/e/f.txt"}
+
+    def test_include_and_exclude(self):
+        assert self.names(include=["b/*"], exclude=["*.log"]) == {"b/c.txt", "b/e/f.txt"}
+
+    def test_lazy(self):
+        files = walk.walk(self.root / "missing")  # nothing is scanned until the first file is requested
+        with pytest.raises(FileNotFoundError):
+            next(files)
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+    def test_does_not_follow_directory_symlinks(self):
+        (self.root / "b" / "loop").symlink_to(self.root, target_is_directory=True)
+        assert "b/loop/a.txt" not in self.names()
+
+
+class TestSelects:
+    def test_no_globs(self):
+        assert walk.selects("a/b.txt") is True
+
+    def test_excluded_ancestor(self):
+        assert walk.selects("node_modules/x/y.js", exclude=["node_modules"]) is False
+
+    def test_include(self):
+        assert walk.selects("a/b.txt", include=["*.txt"]) is True
+        assert walk.selects("a/b.log", include=["*.txt"]) is False
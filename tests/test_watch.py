@@ -0,0 +1,194 @@
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from sobe.watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_IGNORED,
+    IN_ISDIR,
+    IN_Q_OVERFLOW,
+    Debouncer,
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    directories,
+    open_watcher,
+    parse_events,
+    stat_key,
+)
+from tests.helpers import Clock
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+
+
+class TestDebouncer:
+    def test_releases_names_once_settled(self):
+        clock = Clock()
+        debouncer = Debouncer(2.0, clock=clock)
+        assert debouncer.timeout() is None
+        assert debouncer.quiet()
+
+        debouncer.touch(["b.txt", "a.txt"])
+        clock.now = 1.0
+        debouncer.touch(["b.txt"])  # still being written
+        assert debouncer.settled() == []
+        assert debouncer.timeout() == 1.0
+        assert not debouncer.quiet()
+
+        clock.now = 2.0
+        assert debouncer.settled() == ["a.txt"]
+        assert debouncer.timeout() == 1.0
+        clock.now = 3.5
+        assert debouncer.timeout() == 0.0
+        assert debouncer.settled() == ["b.txt"]
+        assert debouncer.quiet()
+        assert debouncer.timeout() is None
+
+
+class TestPollingWatcher:
+    def test_reports_new_and_changed_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            (root / "same.txt").write_text("same")
+            (root / "changed.txt").write_text("before")
+            with PollingWatcher(root, exclude=["*.tmp"], interval=0) as watcher:
+                (root / "changed.txt").write_text("after, and longer")
+                (root / "sub").mkdir()
+                (root / "sub" / "new.txt").write_text("new")
+                (root / "partial.tmp").write_text("skipped")
+                assert watcher.wait(None) == {"changed.txt", "sub/new.txt"}
+                assert watcher.wait(5) == set()
+
+    def test_waits_at_most_the_interval(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("sobe.watch.time.sleep") as sleep:
+            watcher = PollingWatcher(pathlib.Path(temp_dir), interval=1.0)
+            watcher.wait(0.25)
+            watcher.wait(10)
+        assert [c.args[0] for c in sleep.call_args_list] == [0.25, 1.0]
+
+
+@linux_only
+class TestInotifyWatcher:
+    def test_reports_written_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            (root / "sub").mkdir()
+            (root / "skip").mkdir()
+            with InotifyWatcher(root, include=["*.txt"], exclude=["skip"]) as watcher:
+                assert watcher.wait(0) == set()
+                (root / "a.txt").write_text("a")
+                (root / "sub" / "b.txt").write_text("b")
+                (root / "sub" / "c.bin").write_text("c")
+                (root / "skip" / "d.txt").write_text("d")
+                os.rename(root / "sub" / "c.bin", root / "sub" / "c.txt")
+                assert watcher.wait(1) == {"a.txt", "sub/b.txt", "sub/c.txt"}
+
+    def test_watches_new_directories(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            with InotifyWatcher(root, exclude=["*.tmp"]) as watcher:
+                (root / "new" / "deeper").mkdir(parents=True)
+                (root / "new" / "deeper" / "early.txt").write_text("written before it was watched, maybe")
+                (root / "build.tmp").mkdir()
+                changed = watcher.wait(1)
+                assert changed == {"new/deeper/early.txt"}
+                (root / "new" / "deeper" / "late.txt").write_text("late")
+                (root / "build.tmp" / "ignored.txt").write_text("ignored")
+                assert watcher.wait(1) == {"new/deeper/late.txt"}
+
+    def test_overflow_and_removed_directories(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            (root / "a.txt").write_text("a")
+            (root / "sub").mkdir()
+            with InotifyWatcher(root) as watcher:
+                changed: set[str] = set()
+                watcher._handle(-1, IN_Q_OVERFLOW, "", changed)
+                assert changed == {"a.txt"}
+
+                changed.clear()
+                watcher._handle(12345, IN_CLOSE_WRITE, "unknown.txt", changed)  # from a directory no longer watched
+                watcher._handle(1, IN_CREATE | IN_ISDIR, "vanished", changed)  # removed before it could be watched
+                assert changed == set()
+
+                (root / "sub").rmdir()
+                watcher.wait(1)
+                assert "sub/" not in watcher._directories.values()
+                watcher._handle(1, IN_IGNORED, "", changed)
+                assert "" not in watcher._directories.values()
+
+    def test_init_failure(self):
+        libc = Mock()
+        libc.inotify_init1.return_value = -1
+        with patch("sobe.watch.ctypes.CDLL", return_value=libc), pytest.raises(OSError):
+            InotifyWatcher(pathlib.Path("."))
+
+    def test_add_watch_failure(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            libc = Mock()
+            libc.inotify_init1.return_value = os.open(root, os.O_RDONLY)
+            libc.inotify_add_watch.return_value = -1
+            with (
+                patch("sobe.watch.ctypes.CDLL", return_value=libc),
+                patch("sobe.watch.ctypes.get_errno", return_value=28),
+                pytest.raises(OSError) as raised,
+            ):
+                InotifyWatcher(root)
+            assert raised.value.errno == 28
+            with pytest.raises(OSError):
+                os.fstat(libc.inotify_init1.return_value)  # closed
+
+
+class TestWatcher:
+    def test_needs_wait(self):
+        class Incomplete(Watcher):
+            pass
+
+        with pytest.raises(TypeError, match="wait"):
+            Incomplete(pathlib.Path())
+
+
+class TestOpenWatcher:
+    @linux_only
+    def test_inotify_on_linux(self):
+        with tempfile.TemporaryDirectory() as temp_dir, open_watcher(pathlib.Path(temp_dir)) as watcher:
+            assert watcher.method == "inotify"
+
+    def test_falls_back_to_polling(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            with patch("sobe.watch.InotifyWatcher", side_effect=OSError(28, "No space left on device")):
+                assert open_watcher(root, include=["*.txt"]).method == "polling"
+            with patch("sobe.watch.sys.platform", "darwin"):
+                watcher = open_watcher(root)
+            assert isinstance(watcher, PollingWatcher)
+
+
+class TestHelpers:
+    def test_parse_events(self):
+        data = struct.pack("iIII", 1, IN_CLOSE_WRITE, 0, 16) + b"a.txt".ljust(16, b"\0")
+        data += struct.pack("iIII", 2, IN_IGNORED, 0, 0)
+        assert list(parse_events(data)) == [(1, IN_CLOSE_WRITE, "a.txt"), (2, IN_IGNORED, "")]
+
+    def test_directories(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            (root / "a" / "b").mkdir(parents=True)
+            (root / "node_modules" / "x").mkdir(parents=True)
+            assert sorted(directories(root, ["node_modules"])) == ["", "a/", "a/b/"]
+            assert sorted(directories(root / "a", base="a/")) == ["a/", "a/b/"]
+
+    def test_stat_key(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = pathlib.Path(temp_dir)
+            (root / "a.txt").write_text("abc")
+            assert stat_key(root / "a.txt") == (3, (root / "a.txt").stat().st_mtime_ns)
+            assert stat_key(root) is None
+            assert stat_key(root / "missing") is None